@@ -0,0 +1,87 @@
+"""Microbenchmark: per-line ``iter_lines`` parsing vs ``StreamReader``.
+
+Run with ``python tests/bench_stream_parser.py``.  Replays a synthetic
+Anthropic thinking stream through both parsers and reports streamed tokens
+per second of CPU time (higher is better).
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import threading
+import time
+from typing import Any
+
+import requests
+
+from trust5.core.stream_parser import JSON_CODEC, StreamReader, loads
+
+_TOKENS = 20_000
+_ROUNDS = 5
+
+
+def _body() -> bytes:
+    lines = []
+    for i in range(_TOKENS):
+        kind = "thinking_delta" if i % 2 else "text_delta"
+        field = "thinking" if i % 2 else "text"
+        delta = {"type": "content_block_delta", "index": 0, "delta": {"type": kind, field: f"tok{i} "}}
+        lines.append(f"event: content_block_delta\ndata: {json.dumps(delta)}\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+class _Raw(io.BytesIO):
+    """Hands back at most one TLS record (~1400 bytes) per read, like a live stream."""
+
+    def read(self, amt: int | None = -1) -> bytes:
+        return super().read(min(amt or 1400, 1400))
+
+
+def _response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = _Raw(body)
+    response.encoding = "utf-8"
+    return response
+
+
+def _old(response: requests.Response, abort: threading.Event) -> int:
+    start = time.monotonic()
+    count = 0
+    for raw_line in response.iter_lines(decode_unicode=True):
+        if abort.is_set() or time.monotonic() - start > 600:
+            break
+        if not raw_line or not raw_line.startswith("data: "):
+            continue
+        data: Any = json.loads(raw_line[6:])
+        if data.get("type") == "content_block_delta":
+            count += 1
+    return count
+
+
+def _new(response: requests.Response, abort: threading.Event) -> int:
+    count = 0
+    for raw_line in StreamReader(response, abort, 600):
+        if not raw_line.startswith(b"data: "):
+            continue
+        data: Any = loads(raw_line[6:])
+        if data.get("type") == "content_block_delta":
+            count += 1
+    return count
+
+
+def main() -> None:
+    body = _body()
+    abort = threading.Event()
+    for name, parse in (("iter_lines + json", _old), (f"StreamReader + {JSON_CODEC}", _new)):
+        best = float("inf")
+        for _ in range(_ROUNDS):
+            t0 = time.process_time()
+            assert parse(_response(body), abort) == _TOKENS
+            best = min(best, time.process_time() - t0)
+        print(f"{name:28s} {_TOKENS / best:>12,.0f} tokens/sec CPU  ({best * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -358,6 +358,29 @@ def test_trim_history(_emit, _emit_block):
     assert len(agent.history) < untrimmed_count
 
 
+@patch("trust5.core.agent.emit_block")
+@patch("trust5.core.agent.emit")
+def test_trim_history_keeps_task_and_tool_pairs(_emit, _emit_block):
+    """Trimming pins the task message and never sends a tool result without its call."""
+    tool_responses = [
+        _resp(content="", tool_calls=[_tool_call("Read", {"file_path": f"f{i}.txt"}, call_id=f"tc-{i}")])
+        for i in range(40)
+    ]
+    tool_responses.append(_resp(content="all done"))
+    llm = make_mock_llm(tool_responses)
+    agent = _make_agent(llm, allowed_tools=["Read"])
+
+    with patch.object(agent.tools, "read_file", return_value="data"):
+        agent.run("the task", max_turns=41)
+
+    last_messages = llm.chat.call_args_list[-1][0][0]
+    assert last_messages[0]["role"] == "system"
+    assert last_messages[1] == {"role": "user", "content": "the task"}
+    assert last_messages[2].get("tool_calls")
+    call_ids = {tc["id"] for m in last_messages for tc in m.get("tool_calls", [])}
+    assert all(m["tool_call_id"] in call_ids for m in last_messages if m.get("role") == "tool")
+
+
 # ---------------------------------------------------------------------------
 # Agent — tool_call_id propagation
 # ---------------------------------------------------------------------------
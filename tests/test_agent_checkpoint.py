@@ -0,0 +1,109 @@
+"""Tests for per-turn agent checkpoints and mid-conversation resume."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from trust5.core.agent import Agent
+from trust5.core.agent_checkpoint import AgentCheckpoint
+from trust5.core.conversation import ConversationBuffer
+from trust5.core.llm import LLMError
+
+
+def _write_call(call_id: str, path: Path, content: str) -> dict[str, Any]:
+    args = json.dumps({"file_path": str(path), "content": content})
+    tc = {"id": call_id, "function": {"name": "Write", "arguments": args}}
+    return {"message": {"role": "assistant", "content": "", "tool_calls": [tc]}}
+
+
+def _final(text: str) -> dict[str, Any]:
+    return {"message": {"role": "assistant", "content": text}}
+
+
+def _agent(llm: MagicMock, checkpoint: AgentCheckpoint) -> Agent:
+    return Agent(name="implementer", prompt="sys", llm=llm, allowed_tools=["Write"], checkpoint=checkpoint)
+
+
+def _crashing_run(tmp_path: Path, db: str) -> None:
+    """Two completed turns (each writing a file), then a transient LLM failure."""
+    llm = MagicMock()
+    llm.model = "m"
+    llm.chat.side_effect = [
+        _write_call("w1", tmp_path / "a.py", "a = 1\n"),
+        _write_call("w2", tmp_path / "b.py", "b = 2\n"),
+        LLMError("overloaded", retryable=True),
+    ]
+    with pytest.raises(LLMError):
+        _agent(llm, AgentCheckpoint("stage-1", "implementer", db_path=db)).run("build it", max_turns=5)
+
+
+@pytest.fixture(autouse=True)
+def _quiet() -> Any:
+    with (
+        patch("trust5.core.agent.emit"),
+        patch("trust5.core.agent.emit_block"),
+        patch("trust5.core.tools.emit"),
+        patch("trust5.core.tools.emit_block"),
+        patch("trust5.core.agent_checkpoint.emit"),
+    ):
+        yield
+
+
+def test_rerun_resumes_after_last_completed_turn(tmp_path: Path) -> None:
+    db = str(tmp_path / "trust5.db")
+    _crashing_run(tmp_path, db)
+
+    llm = MagicMock()
+    llm.model = "m"
+    llm.chat.side_effect = [_final("done")]
+    checkpoint = AgentCheckpoint("stage-1", "implementer", db_path=db)
+    agent = _agent(llm, checkpoint)
+    assert agent.run("build it", max_turns=5) == "done"
+
+    sent = llm.chat.call_args_list[0][0][0]
+    assert sent[1] == {"role": "user", "content": "build it"}
+    assert [m["tool_call_id"] for m in sent if m.get("role") == "tool"] == ["w1", "w2"]
+    assert agent._turn == 3
+    assert not checkpoint.resume(_agent(MagicMock(), checkpoint), "build it")  # cleared on success
+
+
+def test_changed_files_are_flagged_and_other_inputs_start_fresh(tmp_path: Path) -> None:
+    db = str(tmp_path / "trust5.db")
+    _crashing_run(tmp_path, db)
+    (tmp_path / "b.py").write_text("b = 3\n")
+
+    checkpoint = AgentCheckpoint("stage-1", "implementer", db_path=db)
+    assert not checkpoint.resume(_agent(MagicMock(), checkpoint), "a different task")
+
+    agent = _agent(MagicMock(), checkpoint)
+    assert checkpoint.resume(agent, "build it")
+    assert agent._resumed_turns == 2
+    assert str(tmp_path / "b.py") in agent.history.memory
+    assert str(tmp_path / "a.py") not in agent.history.memory
+
+
+def test_for_stage_requires_a_stage_id() -> None:
+    assert AgentCheckpoint.for_stage(MagicMock(), "implementer") is None
+    stage = MagicMock()
+    stage.id = "01HSTAGE"
+    assert AgentCheckpoint.for_stage(stage, "repairer") is not None
+    with patch("trust5.core.agent_checkpoint.AGENT_CHECKPOINT_TURNS", False):
+        assert AgentCheckpoint.for_stage(stage, "repairer") is None
+
+
+def test_buffer_snapshot_round_trip() -> None:
+    buf = ConversationBuffer(max_messages=3, max_tokens=10_000)
+    for msg in ({"role": "user", "content": "task"}, *({"role": "assistant", "content": str(i)} for i in range(5))):
+        buf.append(msg)
+    buf.trim()
+    buf.set_memory("notes")
+    restored = ConversationBuffer(max_messages=3, max_tokens=10_000)
+    restored.restore(json.loads(json.dumps(buf.snapshot())))
+    assert restored.as_list() == buf.as_list()
+    assert restored.total_tokens == buf.total_tokens
+    assert restored.memory == "notes"
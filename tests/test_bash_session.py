@@ -0,0 +1,97 @@
+"""Tests for the persistent per-agent bash session behind the Bash tool."""
+
+from __future__ import annotations
+
+import subprocess
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from trust5.core.bash_session import BashSession
+from trust5.core.tools import Tools
+
+
+@pytest.fixture
+def session(tmp_path: Path) -> Iterator[BashSession]:
+    s = BashSession(str(tmp_path))
+    yield s
+    s.close()
+
+
+def test_cwd_and_exports_persist_between_commands(session: BashSession, tmp_path: Path) -> None:
+    (tmp_path / "sub").mkdir()
+    assert session.run("cd sub && export GREETING=hi") == ("", "", 0)
+    out, err, code = session.run("pwd; echo $GREETING; echo oops >&2; exit_code() { return 3; }; exit_code")
+    assert out == f"{tmp_path / 'sub'}\nhi\n"
+    assert (err, code) == ("oops\n", 3)
+    assert session.cwd == str(tmp_path / "sub")
+    # Asking for a different workdir cds there; repeating it keeps the shell's own cwd.
+    (tmp_path / "other").mkdir()
+    assert session.run("pwd", str(tmp_path / "other"))[0] == f"{tmp_path / 'other'}\n"
+    session.run("cd ..")
+    assert session.run("pwd", str(tmp_path / "other"))[0] == f"{tmp_path}\n"
+    assert session.commands == 5 and session.restarts == 0
+
+
+def test_output_without_trailing_newline_syntax_errors_and_stdin(session: BashSession) -> None:
+    assert session.run("printf abc") == ("abc", "", 0)
+    _, err, code = session.run("if then")
+    assert code == 2 and "syntax error" in err
+    assert session.run("cat") == ("", "", 0)  # stdin is /dev/null, not the framing pipe
+
+
+def test_timeout_kills_only_the_command(session: BashSession) -> None:
+    session.run("export KEPT=1")
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        session.run("echo before; sleep 30", timeout=0.5)
+    assert time.monotonic() - started < 5
+    assert session.run("echo $KEPT") == ("1\n", "", 0)
+    assert session.restarts == 0
+
+
+def test_exit_and_stuck_builtins_restart_the_shell(session: BashSession) -> None:
+    with pytest.raises(RuntimeError):
+        session.run("exit 4")
+    assert session.run("echo back") == ("back\n", "", 0)
+    with patch("trust5.core.bash_session._KILL_GRACE", 0.2):
+        with pytest.raises(subprocess.TimeoutExpired):
+            session.run("while :; do :; done", timeout=0.3)
+    assert not session.alive
+    assert session.run("echo again")[0] == "again\n"
+    assert session.restarts == 2
+
+
+def test_tools_run_bash_uses_the_session(session: BashSession, tmp_path: Path) -> None:
+    with patch("trust5.core.tools.run_capture") as run:
+        Tools.run_bash("cd /", str(tmp_path), session=session)
+        result = Tools.run_bash("pwd", str(tmp_path), session=session)
+    run.assert_not_called()
+    assert result == "Stdout:\n/\n\nStderr:\n\nExit Code: 0"
+    assert "blocked" in Tools.run_bash("rm -rf /", str(tmp_path), session=session)
+
+
+def test_rm_targets_are_resolved_from_the_shells_cwd(session: BashSession, tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    (tmp_path / "src").mkdir()
+    Tools.run_bash("cd ..", str(project), session=session)
+    assert session.command_cwd(str(project)) == str(tmp_path)
+    assert "blocked" in Tools.run_bash("rm -rf src", str(project), session=session)
+    assert (tmp_path / "src").is_dir()
+    Tools.run_bash("cd project", str(project), session=session)
+    assert "Exit Code: 0" in Tools.run_bash("rm -rf src", str(project), session=session)
+    assert not (project / "src").exists() and (tmp_path / "src").is_dir()
+
+
+def test_runaway_output_is_bounded(session: BashSession) -> None:
+    with patch("trust5.core.bash_session.SUBPROCESS_OUTPUT_LIMIT", 4096):
+        out, err, code = session.run("seq 1 200000; seq 1 50000 >&2; printf end")  # starts the shell
+    assert code == 0
+    assert out.startswith("1\n2\n") and out.endswith("200000\nend")
+    assert "bytes of output omitted" in out and len(out) < 4200
+    assert err.endswith("50000\n") and len(err) < 4200
+    assert session.run("echo next") == ("next\n", "", 0)  # framing intact after dropping output
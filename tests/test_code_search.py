@@ -0,0 +1,86 @@
+"""Tests for the in-process Grep engine."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import patch
+
+from trust5.core import code_search
+from trust5.core.code_search import search, search_file
+
+
+def _tree(root: Path) -> None:
+    (root / "src").mkdir()
+    (root / "src" / "app.py").write_text("import os\n\ndef handler():\n    return os.getcwd()\n")
+    (root / "src" / "util.py").write_text("def helper():\n    pass\n")
+    (root / "node_modules" / "lib").mkdir(parents=True)
+    (root / "node_modules" / "lib" / "index.js").write_text("def handler() {}\n")
+    (root / ".venv").mkdir()
+    (root / ".venv" / "site.py").write_text("def handler(): ...\n")
+    (root / "logo.png").write_bytes(b"\x89PNG\0\0def handler")
+
+
+def test_prunes_skip_dirs_and_binaries_and_groups_by_file(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    result = search(r"def \w+\(", str(tmp_path))
+    app, util = tmp_path / "src" / "app.py", tmp_path / "src" / "util.py"
+    assert result.splitlines()[:3] == [f"{app}:3:def handler():", "", f"{util}:1:def helper():"]
+    assert "node_modules" not in result and ".venv" not in result and "logo.png" not in result
+    assert result.endswith("2 matches in 2 files (3 files searched)")
+
+
+def test_include_filter_context_and_relative_paths(tmp_path: Path, monkeypatch) -> None:
+    _tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    result = search("getcwd", ".", "app*.py", context=1)
+    assert result.splitlines()[:2] == ["src/app.py-3-def handler():", "src/app.py:4:    return os.getcwd()"]
+    assert "No matches" in search("getcwd", ".", "*.js")
+
+
+def test_adjacent_matches_do_not_repeat_context_lines(tmp_path: Path) -> None:
+    f = tmp_path / "f.txt"
+    f.write_text("a\nhit 1\nhit 2\nb\nc\nhit 3\n")
+    res = search_file(str(f), code_search.compile_pattern("hit")[0], max_matches=10, context=1)
+    assert res is not None
+    assert [(n, m) for n, m, _ in res.rows] == [(1, False), (2, True), (3, True), (4, False), (5, False), (6, True)]
+
+
+def test_caps_per_file_and_overall(tmp_path: Path) -> None:
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / name).write_text("match\n" * 10)
+    result = search("match", str(tmp_path), max_per_file=4, max_total=6)
+    lines = result.splitlines()
+    assert sum(1 for line in lines if line.endswith(":match")) == 6
+    assert f"{tmp_path / 'a.txt'}: ... more matches not shown" in lines
+    assert "c.txt" not in result
+    assert result.endswith("6 matches in 2 files (2 files searched; stopped at 6 matches)")
+
+
+def test_large_files_are_memory_mapped(tmp_path: Path) -> None:
+    big = tmp_path / "big.log"
+    big.write_bytes(b"noise line\n" * 200_000 + b"needle here\n")
+    with patch.object(code_search.mmap, "mmap", wraps=code_search.mmap.mmap) as mapped:
+        result = search("needle", str(big))
+    assert mapped.called
+    assert result.startswith(f"{big}:200001:needle here")
+
+
+def test_invalid_regex_is_searched_literally(tmp_path: Path) -> None:
+    (tmp_path / "a.py").write_text("call(x\n")
+    result = search("call(", str(tmp_path))
+    assert f"{tmp_path / 'a.py'}:1:call(x" in result
+    assert "searched literally" in result
+
+
+def test_matches_never_span_lines_or_run_past_eof(tmp_path: Path) -> None:
+    f = tmp_path / "a.txt"
+    f.write_text("abc\n  indented\nxyz\n\nlast\n")
+
+    def rows(pattern: str) -> list[tuple[int, bool, str]]:
+        res = search_file(str(f), code_search.compile_pattern(pattern)[0], max_matches=50, context=1)
+        return res.rows if res is not None else []
+
+    assert rows(r"\s+") == [(1, False, "abc"), (2, True, "  indented"), (3, False, "xyz")]
+    assert [n for n, m, _ in rows("^$") if m] == [4]
+    assert [n for n, m, _ in rows(".*") if m] == [1, 2, 3, 4, 5]
+    assert rows("c.*x") == []
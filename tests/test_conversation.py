@@ -0,0 +1,102 @@
+"""Tests for the pair-aware, token-budgeted ConversationBuffer."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from trust5.core.conversation import ConversationBuffer
+from trust5.core.token_counter import message_tokens
+
+
+def _user(text: str) -> dict[str, Any]:
+    return {"role": "user", "content": text}
+
+
+def _tool_turn(i: int, n_results: int = 1) -> list[dict[str, Any]]:
+    calls = [{"id": f"c{i}-{k}", "function": {"name": "Read", "arguments": "{}"}} for k in range(n_results)]
+    turn: list[dict[str, Any]] = [{"role": "assistant", "content": "", "tool_calls": calls}]
+    turn += [{"role": "tool", "content": f"result {i}", "tool_call_id": c["id"]} for c in calls]
+    return turn
+
+
+def _fill(buf: ConversationBuffer, turns: int, n_results: int = 1) -> None:
+    buf.append(_user("the task"))
+    for i in range(turns):
+        for msg in _tool_turn(i, n_results):
+            buf.append(msg)
+
+
+def _assert_pairs_intact(messages: list[dict[str, Any]]) -> None:
+    open_ids: set[str] = set()
+    for msg in messages:
+        for tc in msg.get("tool_calls", []):
+            open_ids.add(tc["id"])
+        if msg["role"] == "tool":
+            assert msg["tool_call_id"] in open_ids, f"orphaned tool result {msg['tool_call_id']}"
+
+
+def test_trim_by_count_drops_whole_units_and_pins_task() -> None:
+    buf = ConversationBuffer(max_messages=10, max_tokens=10**9)
+    _fill(buf, turns=20, n_results=3)  # units of 4 messages
+
+    dropped = buf.trim()
+
+    assert len(dropped) == 72
+    assert dropped[0]["role"] == "assistant"
+    assert len(buf) == 9
+    assert buf[0] == _user("the task")
+    assert buf[1]["role"] == "assistant"
+    _assert_pairs_intact(buf.as_list())
+
+
+def test_trim_by_token_budget_uses_cached_counts() -> None:
+    buf = ConversationBuffer(max_messages=1000, max_tokens=10**9)
+    _fill(buf, turns=30)
+    assert buf.total_tokens == sum(message_tokens(m) for m in buf)
+
+    buf.max_tokens = buf.total_tokens // 3
+    buf.trim()
+    assert buf.total_tokens <= buf.max_tokens
+    assert buf.total_tokens == sum(message_tokens(m) for m in buf)
+    assert buf[0]["content"] == "the task"
+    _assert_pairs_intact(buf.as_list())
+
+    # A calibration factor shrinks the effective budget further
+    before = len(buf)
+    buf.trim(factor=2.0)
+    assert len(buf) < before
+
+
+def test_newest_unit_is_never_dropped() -> None:
+    buf = ConversationBuffer(max_messages=1, max_tokens=0)
+    _fill(buf, turns=3, n_results=2)
+    buf.trim()
+    assert [m["role"] for m in buf] == ["user", "assistant", "tool", "tool"]
+
+
+def test_messages_prepends_system_and_pop_removes_newest() -> None:
+    buf = ConversationBuffer(max_messages=60, max_tokens=10**9)
+    buf.append(_user("task"))
+    buf.append({"role": "assistant", "content": ""})
+    system = {"role": "system", "content": "sys"}
+    assert buf.messages(system) == [system, _user("task"), {"role": "assistant", "content": ""}]
+
+    assert buf.pop()["role"] == "assistant"
+    assert buf.pop() == _user("task")
+    assert len(buf) == 0 and buf.total_tokens == 0
+    with pytest.raises(IndexError):
+        buf.pop()
+
+
+def test_backing_list_is_compacted() -> None:
+    buf = ConversationBuffer(max_messages=5, max_tokens=10**9)
+    buf.append(_user("task"))
+    for i in range(500):
+        for msg in _tool_turn(i):
+            buf.append(msg)
+        buf.trim()
+    assert len(buf) <= 5
+    assert len(buf._items) < 100
+    assert buf.total_tokens == sum(message_tokens(m) for m in buf)
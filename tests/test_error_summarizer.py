@@ -27,7 +27,7 @@ class TestSummarizeErrors:
         with patch("trust5.core.error_summarizer.LLM") as llm_cls:
             llm_cls.for_tier.return_value = mock_llm
             result = summarize_errors(raw, failure_type="test")
-        llm_cls.for_tier.assert_called_once_with("fast", thinking_level=None)
+        llm_cls.for_tier.assert_called_once_with("fast", thinking_level=None, stage="")
         mock_llm.chat.assert_called_once()
         assert "ROOT_CAUSE" in result
 
@@ -0,0 +1,101 @@
+"""Tests for summarizing evicted agent turns into working memory."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from trust5.core.agent import Agent
+from trust5.core.history_compactor import HistoryCompactor, render_turns
+from trust5.core.llm import LLMError
+
+
+def _turn(i: int) -> list[dict[str, Any]]:
+    call = {"id": f"c{i}", "function": {"name": "Read", "arguments": json.dumps({"file_path": f"src/m{i}.py"})}}
+    return [
+        {"role": "assistant", "content": f"checking module {i}", "tool_calls": [call]},
+        {"role": "tool", "name": "Read", "content": f"def f{i}(): ...", "tool_call_id": f"c{i}"},
+    ]
+
+
+def _summarizer(*replies: str) -> MagicMock:
+    llm = MagicMock()
+    llm.chat.side_effect = [{"message": {"role": "assistant", "content": r}} for r in replies]
+    return llm
+
+
+def test_render_turns_lists_calls_and_results() -> None:
+    text = render_turns(_turn(1))
+    assert "[assistant] checking module 1" in text
+    assert '[call Read] {"file_path": "src/m1.py"}' in text
+    assert "[result Read] def f1(): ..." in text
+
+
+@patch("trust5.core.history_compactor.emit")
+def test_compaction_is_incremental(_emit: MagicMock) -> None:
+    llm = _summarizer("FILES:\n- src/m1.py: read", "FILES:\n- src/m1.py: read\n- src/m2.py: read")
+    compactor = HistoryCompactor("implementer", llm=llm)
+
+    assert compactor.compact(_turn(1)) == "FILES:\n- src/m1.py: read"
+    compactor.compact(_turn(2))
+
+    second_prompt = llm.chat.call_args_list[1].kwargs["messages"][1]["content"]
+    assert "PREVIOUS MEMORY:\nFILES:\n- src/m1.py: read" in second_prompt
+    assert "src/m2.py" in second_prompt
+    assert "checking module 1" not in second_prompt  # already folded into the memory
+    assert "src/m2.py" in compactor.summary
+
+
+def test_llm_failure_keeps_previous_summary() -> None:
+    llm = MagicMock()
+    llm.chat.side_effect = LLMError("down", retryable=False)
+    compactor = HistoryCompactor("implementer", llm=llm)
+    compactor.summary = "TEST STATUS: 3 failing"
+    assert compactor.compact(_turn(1)) == "TEST STATUS: 3 failing"
+
+
+@patch("trust5.core.history_compactor.emit")
+@patch("trust5.core.agent.emit_block")
+@patch("trust5.core.agent.emit")
+def test_agent_shows_working_memory_after_trim(_emit: MagicMock, _block: MagicMock, _cemit: MagicMock) -> None:
+    replies = [
+        {"message": {"role": "assistant", "content": "", "tool_calls": turn[0]["tool_calls"]}}
+        for turn in (_turn(i) for i in range(6))
+    ]
+    replies.append({"message": {"role": "assistant", "content": "done"}})
+    llm = MagicMock()
+    llm.model = "main-model"
+    llm.chat.side_effect = replies
+
+    with (
+        patch("trust5.core.agent.AGENT_COMPACT_HISTORY", True),
+        patch("trust5.core.agent.MAX_HISTORY_MESSAGES", 4),
+    ):
+        agent = Agent(name="impl", prompt="sys", llm=llm, allowed_tools=["Read"])
+    agent.compactor = HistoryCompactor("impl", llm=_summarizer(*(f"memory v{i}" for i in range(10))))
+
+    with patch.object(agent.tools, "read_file", return_value="data"):
+        assert agent.run("the task", max_turns=7) == "done"
+
+    final_messages = llm.chat.call_args_list[-1][0][0]
+    assert final_messages[1]["content"].startswith("the task")
+    assert "## Working memory" in final_messages[1]["content"]
+    assert final_messages[1]["content"].endswith(agent.compactor.summary)
+    assert agent.history[0] == {"role": "user", "content": "the task"}
+
+
+@patch("trust5.core.auth.registry.get_active_token", return_value=None)
+def test_compactor_llm_does_not_inherit_the_agents_thinking_level(_token: MagicMock) -> None:
+    captured: dict[str, Any] = {}
+
+    def fake_init(self: Any, **kwargs: Any) -> None:
+        captured.update(kwargs)
+
+    with (
+        patch("trust5.core.history_compactor.LLM.__init__", fake_init),
+        patch("trust5.core.history_compactor.LLM.chat", side_effect=LLMError("stop", retryable=False)),
+    ):
+        HistoryCompactor("implementer", stage="core").compact(_turn(1))
+    assert captured["thinking_level"] in (None, "low")  # the fast tier's default, not implementer's "high"
+    assert captured["labels"] == {"tier": "fast", "agent": "implementer-compactor", "stage": "core"}
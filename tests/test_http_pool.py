@@ -0,0 +1,66 @@
+"""Tests for process-wide pooled HTTP sessions."""
+
+from __future__ import annotations
+
+import pytest
+
+from trust5.core import http_pool
+from trust5.core.llm import LLM
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool():
+    http_pool.close_all()
+    yield
+    http_pool.close_all()
+
+
+def test_same_key_returns_same_session() -> None:
+    a = http_pool.get_session("https://api.example.com", "anthropic", "claude:Authorization")
+    b = http_pool.get_session("https://api.example.com", "anthropic", "claude:Authorization")
+    assert a is b
+    assert a.headers["Content-Type"] == "application/json"
+
+
+def test_different_endpoint_or_identity_gets_own_session() -> None:
+    base = http_pool.get_session("https://api.example.com", "anthropic", "")
+    assert http_pool.get_session("https://other.example.com", "anthropic", "") is not base
+    assert http_pool.get_session("https://api.example.com", "google", "") is not base
+    assert http_pool.get_session("https://api.example.com", "anthropic", "claude:x-api-key") is not base
+    assert http_pool.pool_stats()["sessions"] == 4
+
+
+def test_auth_identity_never_contains_token() -> None:
+    secret = "sk-super-secret-token"
+    assert http_pool.auth_identity(None, None, None) == ""
+    assert secret not in http_pool.auth_identity("x-api-key", secret, None)
+    assert http_pool.auth_identity("x-api-key", secret, "claude") == "claude:x-api-key"
+    # Same token → same identity; different token → different identity
+    assert http_pool.auth_identity("x-api-key", secret, None) == http_pool.auth_identity("x-api-key", secret, None)
+    assert http_pool.auth_identity("x-api-key", "other", None) != http_pool.auth_identity("x-api-key", secret, None)
+
+
+def test_ensure_pool_size_grows_existing_sessions() -> None:
+    session = http_pool.get_session("https://api.example.com", "anthropic", "")
+    default = http_pool.pool_stats()["pool_size"]
+    http_pool.ensure_pool_size(default + 10)
+    assert http_pool.pool_stats()["pool_size"] == default + 10 + http_pool._POOL_HEADROOM
+    adapter = session.get_adapter("https://api.example.com")
+    assert adapter._pool_maxsize == default + 10 + http_pool._POOL_HEADROOM  # type: ignore[attr-defined]
+    # Shrinking is a no-op
+    http_pool.ensure_pool_size(1)
+    assert http_pool.pool_stats()["pool_size"] == default + 10 + http_pool._POOL_HEADROOM
+
+
+def test_pool_stats_reports_reuse_counters() -> None:
+    stats = http_pool.pool_stats()
+    assert set(stats) == {"sessions", "pool_size", "requests", "new_connections", "reused_connections"}
+    assert stats["requests"] == 0
+
+
+def test_llm_instances_share_session() -> None:
+    a = LLM(model="m1", backend="ollama", base_url="http://localhost:11434")
+    b = LLM(model="m2", backend="ollama", base_url="http://localhost:11434")
+    c = LLM(model="m1", backend="ollama", base_url="http://localhost:11435")
+    assert a._session is b._session
+    assert a._session is not c._session
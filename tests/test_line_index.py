@@ -0,0 +1,51 @@
+"""Tests for the cached line-offset index behind ranged Read calls."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from trust5.core import line_index
+from trust5.core.constants import MAX_READFILES_FILE_SIZE
+from trust5.core.line_index import get_line_index, read_lines
+from trust5.core.tools import Tools
+
+
+def test_pages_are_served_from_one_index(tmp_path: Path) -> None:
+    log = tmp_path / "build.log"
+    log.write_text("".join(f"line {i}\n" for i in range(1, 1001)))
+    with patch.object(line_index, "_build", wraps=line_index._build) as build:
+        first = Tools.read_file(str(log), offset=101, limit=100)
+        second = Tools.read_file(str(log), offset=201, limit=100)
+    assert build.call_count == 1
+    assert first.splitlines()[:2] == ["[Lines 101-200 of 1000]", "line 101"]
+    assert first.splitlines()[-1] == "line 200"
+    assert second.splitlines()[1] == "line 201"
+    assert read_lines(str(log), 990, 50).splitlines()[0] == "[Lines 990-1000 of 1000]"
+
+
+def test_rewritten_file_is_reindexed(tmp_path: Path) -> None:
+    f = tmp_path / "a.txt"
+    f.write_text("one\ntwo\n")
+    assert get_line_index(str(f)).lines == 2
+    f.write_text("one\ntwo\nthree")
+    os.utime(f, ns=(1, 1))  # a different mtime even on coarse-timestamp filesystems
+    assert get_line_index(str(f)).lines == 3
+    assert read_lines(str(f), 3, 1) == "[Lines 3-3 of 3]\nthree"
+
+
+def test_crlf_and_missing_files(tmp_path: Path) -> None:
+    f = tmp_path / "dos.txt"
+    f.write_bytes(b"a\r\nb\r\n")
+    assert Tools.read_file(str(f), offset=2, limit=1) == "[Lines 2-2 of 2]\nb\n"
+    assert Tools.read_file(str(tmp_path / "missing.txt"), limit=1).startswith("Error reading file")
+
+
+def test_read_files_reports_line_count_of_oversized_files(tmp_path: Path) -> None:
+    big = tmp_path / "big.txt"
+    big.write_text("x" * 99 + "\n" + "y" * MAX_READFILES_FILE_SIZE)
+    result = json.loads(Tools.read_files([str(big)]))
+    assert "2 lines" in result[str(big)]
+    assert "offset/limit" in result[str(big)]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import contextlib
 import threading
 import time
 from unittest.mock import MagicMock, patch
@@ -9,6 +10,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 import requests.exceptions
 
+from trust5.core.auth import token_cache
 from trust5.core.auth.provider import TokenData
 from trust5.core.llm import LLM, LLMError
 from trust5.core.llm_errors import LLMError as LLMErrorDirect
@@ -34,6 +36,13 @@ def _make_llm(**kwargs) -> LLM:
 _EMIT_PATCH = "trust5.core.llm.emit"
 
 
+@pytest.fixture(autouse=True)
+def _clear_token_cache():
+    token_cache.invalidate()
+    yield
+    token_cache.invalidate()
+
+
 # ---------------------------------------------------------------------------
 # 1. test_auth_error_breaks_fallback_chain
 # ---------------------------------------------------------------------------
@@ -446,3 +455,134 @@ def test_agent_task_auth_error_raises_transient() -> None:
 
             assert exc_info.value.retry_after == 120.0
             assert "Auth failed" in str(exc_info.value)
+
+
+# ---------------------------------------------------------------------------
+# 12. test_token_cache_skips_store_until_file_changes
+# ---------------------------------------------------------------------------
+
+
+@patch(_EMIT_PATCH)
+def test_token_cache_skips_store_until_file_changes(mock_emit: MagicMock) -> None:
+    """Fresh tokens are served from memory; a new token-file mtime forces a reload."""
+    llm = _make_llm(provider_name="google", auth_header="Authorization", auth_token="at1")
+    mock_store = MagicMock()
+    mock_store.load.return_value = TokenData(access_token="at1", expires_at=time.time() + 3600)
+    mtime = [1]
+
+    with (
+        patch("trust5.core.auth.token_store.TokenStore", return_value=mock_store) as store_cls,
+        patch("trust5.core.auth.token_cache._file_mtime", side_effect=lambda: mtime[0]),
+    ):
+        for _ in range(5):
+            llm._ensure_token_fresh()
+        assert store_cls.call_count == 1
+
+        # Another process (e.g. `trust5 login`) rewrote the token file
+        mtime[0] = 2
+        mock_store.load.return_value = TokenData(access_token="at2", expires_at=time.time() + 3600)
+        llm._ensure_token_fresh()
+
+    assert store_cls.call_count == 2
+    assert llm._session.headers["Authorization"] == "Bearer at2"
+
+
+# ---------------------------------------------------------------------------
+# 13. test_refresh_single_flight_across_instances
+# ---------------------------------------------------------------------------
+
+
+@patch(_EMIT_PATCH)
+def test_refresh_single_flight_across_instances(mock_emit: MagicMock) -> None:
+    """Separate LLM instances for one provider share a refresh lock and the refreshed token."""
+    llms = [_make_llm(model=f"m{i}", provider_name="google", auth_header="Authorization") for i in range(6)]
+    assert len({id(llm._token_lock) for llm in llms}) == 1
+
+    expiring = TokenData(access_token="old_at", refresh_token="rt", expires_at=time.time() + 5)
+    fresh = TokenData(access_token="new_at", refresh_token="rt", expires_at=time.time() + 3600)
+    mock_store = MagicMock()
+    mock_store.load.return_value = expiring
+    mock_provider = MagicMock()
+
+    def slow_refresh(_token: TokenData) -> TokenData:
+        time.sleep(0.05)
+        return fresh
+
+    mock_provider.refresh.side_effect = slow_refresh
+    barrier = threading.Barrier(len(llms), timeout=5)
+
+    def worker(llm: LLM) -> None:
+        barrier.wait()
+        llm._ensure_token_fresh()
+
+    with (
+        patch("trust5.core.auth.token_store.TokenStore", return_value=mock_store),
+        patch("trust5.core.auth.registry.get_provider", return_value=mock_provider),
+        patch("trust5.core.auth.token_cache._file_mtime", return_value=None),
+    ):
+        threads = [threading.Thread(target=worker, args=(llm,)) for llm in llms]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        assert token_cache.get_token("google", 60) is fresh
+
+    assert mock_provider.refresh.call_count == 1
+
+
+# ---------------------------------------------------------------------------
+# test_parallel_401s_refresh_once
+# ---------------------------------------------------------------------------
+
+
+@patch(_EMIT_PATCH)
+def test_parallel_401s_refresh_once(mock_emit: MagicMock) -> None:
+    """Agents that all get a 401 for the same stale token share one refresh."""
+    old_token = TokenData(access_token="old_at", refresh_token="rt1", expires_at=time.time() + 3600)
+    new_token = TokenData(access_token="new_at", refresh_token="rt2", expires_at=time.time() + 3600)
+    mock_store = MagicMock()
+    mock_store.load.return_value = old_token
+    mock_provider = MagicMock()
+
+    def refresh(token: TokenData) -> TokenData:
+        time.sleep(0.05)
+        mock_store.load.return_value = new_token
+        return new_token
+
+    mock_provider.refresh.side_effect = refresh
+    llms = [_make_llm(provider_name="google", auth_header="Authorization", auth_token="old_at") for _ in range(5)]
+    barrier = threading.Barrier(len(llms), timeout=5)
+    results: list[int] = []
+
+    def serve(headers: dict[str, str]) -> MagicMock:
+        resp = MagicMock()
+        if headers["Authorization"] == "Bearer old_at":
+            barrier.wait()  # every agent's first request goes out with the stale token
+            resp.status_code = 401
+        else:
+            resp.status_code = 200
+        return resp
+
+    def worker(llm: LLM) -> None:
+        results.append(llm._post("http://example.com/api", {"x": 1}, "test-model", 30).status_code)
+
+    sessions = {id(llm._session): llm._session for llm in llms}  # agents may share a pooled session
+    with (
+        patch("trust5.core.auth.registry.get_provider", return_value=mock_provider),
+        patch("trust5.core.auth.token_store.TokenStore", return_value=mock_store),
+        patch.object(LLM, "_ensure_token_fresh"),
+        contextlib.ExitStack() as stack,
+    ):
+        for session in sessions.values():
+            stack.enter_context(
+                patch.object(session, "post", side_effect=lambda *a, _h=session.headers, **k: serve(_h))
+            )
+        token_cache.get_token("google", 0)  # cached: the token every agent started with
+        threads = [threading.Thread(target=worker, args=(llm,)) for llm in llms]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+
+    assert results == [200] * len(llms)
+    assert mock_provider.refresh.call_count == 1
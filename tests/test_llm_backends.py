@@ -0,0 +1,194 @@
+"""Tests for backend request encoding: prompt caching and the incremental conversation encoder."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from trust5.core.llm import LLM
+from trust5.core.llm_encoder import ConversationEncoder, build_body
+
+_TOOLS = [
+    {"type": "function", "function": {"name": "Read", "description": "read", "parameters": {"type": "object"}}},
+    {"type": "function", "function": {"name": "Write", "description": "write", "parameters": {"type": "object"}}},
+]
+
+
+def _make_llm(**kwargs: Any) -> LLM:
+    defaults: dict[str, Any] = dict(model="claude-test", base_url="https://api.example", backend="anthropic")
+    defaults.update(kwargs)
+    with patch("trust5.core.llm.emit"):
+        return LLM(**defaults)
+
+
+def _capture_payload(llm: LLM, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None) -> dict[str, Any]:
+    captured: dict[str, Any] = {}
+
+    def fake_post(url: str, payload: bytes, model: str, timeout: int) -> MagicMock:
+        captured.update(json.loads(payload))
+        return MagicMock()
+
+    with (
+        patch.object(llm, "_post", side_effect=fake_post),
+        patch.object(llm, "_consume_anthropic_stream", return_value={"message": {}, "done": True}),
+        patch.object(llm, "_emit_request_log"),
+    ):
+        llm._do_chat_anthropic(messages, tools, "claude-test", 60)
+    return captured
+
+
+def _conversation() -> list[dict[str, Any]]:
+    return [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "Do the task"},
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [{"id": "toolu_1", "function": {"name": "Read", "arguments": '{"file_path": "a.py"}'}}],
+        },
+        {"role": "tool", "content": "print('a')", "name": "Read", "tool_call_id": "toolu_1"},
+    ]
+
+
+def test_cache_breakpoints_on_system_tools_and_history() -> None:
+    llm = _make_llm(prompt_caching=True)
+    payload = _capture_payload(llm, _conversation(), _TOOLS)
+
+    assert payload["system"] == [
+        {"type": "text", "text": "You are helpful.", "cache_control": {"type": "ephemeral"}},
+    ]
+    assert "cache_control" not in payload["tools"][0]
+    assert payload["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+
+    msgs = payload["messages"]
+    # Latest tool_result and the original user task are both marked.
+    assert msgs[-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert msgs[0]["content"] == [{"type": "text", "text": "Do the task", "cache_control": {"type": "ephemeral"}}]
+    assert all("cache_control" not in b for b in msgs[1]["content"])
+
+
+def test_cache_breakpoints_do_not_mutate_history() -> None:
+    llm = _make_llm(prompt_caching=True)
+    messages = _conversation()
+    _capture_payload(llm, messages, _TOOLS)
+    assert messages[1] == {"role": "user", "content": "Do the task"}
+    assert "cache_control" not in _TOOLS[-1]
+
+
+def test_cache_breakpoints_limited_to_most_recent_history() -> None:
+    llm = _make_llm(prompt_caching=True)
+    messages: list[dict[str, Any]] = [{"role": "system", "content": "sys"}]
+    for i in range(5):
+        messages.append({"role": "user", "content": f"u{i}"})
+        messages.append({"role": "assistant", "content": f"a{i}"})
+    payload = _capture_payload(llm, messages, None)
+
+    marked = [m for m in payload["messages"] if m["role"] == "user" and isinstance(m["content"], list)]
+    assert [m["content"][0]["text"] for m in marked] == ["u3", "u4"]
+
+
+def test_prompt_caching_disabled_leaves_payload_plain() -> None:
+    llm = _make_llm(prompt_caching=False)
+    payload = _capture_payload(llm, _conversation(), _TOOLS)
+    assert payload["system"] == "You are helpful."
+    assert all("cache_control" not in t for t in payload["tools"])
+    assert payload["messages"][0]["content"] == "Do the task"
+
+
+@patch("trust5.core.llm_streams.emit")
+def test_anthropic_stream_reports_cache_usage(mock_emit: MagicMock) -> None:
+    llm = _make_llm()
+    response = MagicMock()
+    response.iter_lines.return_value = iter(
+        [
+            'data: {"type": "message_start", "message": {"usage": {"input_tokens": 12, '
+            '"cache_read_input_tokens": 900, "cache_creation_input_tokens": 88}}}',
+            'data: {"type": "message_delta", "usage": {"output_tokens": 5}}',
+            "event: message_stop",
+        ]
+    )
+    llm._consume_anthropic_stream(response, "claude-test")
+
+    messages = [call.args[1] for call in mock_emit.call_args_list]
+    mtkn = next(m for m in messages if m.startswith("in="))
+    assert "cache_read=900" in mtkn
+    assert "cache_write=88" in mtkn
+    mctx = next(m for m in messages if m.startswith("used="))
+    assert mctx.startswith("used=1000 ")
+
+
+# ── ConversationEncoder ──────────────────────────────────────────────
+
+
+def test_encoder_only_encodes_new_messages() -> None:
+    encoder = ConversationEncoder()
+    messages = _conversation()
+    encoder.encode_anthropic(messages, _TOOLS)
+    assert encoder.misses == 4
+
+    messages.append({"role": "assistant", "content": "done"})
+    encoder.encode_anthropic(messages, _TOOLS)
+    assert encoder.misses == 5
+    assert encoder.hits == 4
+
+
+def test_encoder_output_matches_fresh_encoding() -> None:
+    """A memoized encoding is byte-identical to encoding from scratch."""
+    warm = ConversationEncoder()
+    messages = _conversation()
+    warm.encode_anthropic(messages[:2], _TOOLS, cache_control=True)
+    warm_result = warm.encode_anthropic(messages, _TOOLS, cache_control=True)
+    fresh_result = ConversationEncoder().encode_anthropic(messages, _TOOLS, cache_control=True)
+    assert warm_result == fresh_result
+
+
+def test_encoder_fallback_tool_ids_follow_position() -> None:
+    encoder = ConversationEncoder()
+    call = {"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "Read", "arguments": "{}"}}]}
+    second = {"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "Glob", "arguments": "{}"}}]}
+    encoded = encoder.encode_anthropic([call, second], None)
+    ids = [m["content"][0]["id"] for m in json.loads(encoded.messages_json)]
+    assert ids == ["toolu_0001", "toolu_0002"]
+    # Dropping the first message shifts the counter: the second must be re-encoded.
+    encoded = encoder.encode_anthropic([second], None)
+    assert json.loads(encoded.messages_json)[0]["content"][0]["id"] == "toolu_0001"
+
+
+def test_encoder_reuses_tool_schema_serialization() -> None:
+    encoder = ConversationEncoder()
+    first = encoder.encode_google(_conversation(), _TOOLS).tools_json
+    assert first is not None
+    assert encoder.encode_google(_conversation(), _TOOLS).tools_json is first
+    assert json.loads(first)[0]["functionDeclarations"][1]["name"] == "Write"
+
+
+def test_encoder_google_wraps_non_dict_tool_results() -> None:
+    encoded = ConversationEncoder().encode_google(
+        [{"role": "tool", "name": "Glob", "content": '["a.py", "b.py"]'}, {"role": "tool", "content": "plain"}],
+        None,
+    )
+    contents = json.loads(encoded.contents_json)
+    assert contents[0]["parts"][0]["functionResponse"]["response"] == {"result": ["a.py", "b.py"]}
+    assert contents[1]["parts"][0]["functionResponse"]["response"] == {"result": "plain"}
+
+
+def test_build_body_splices_fragments() -> None:
+    body = build_body({"model": "m", "stream": True}, {"messages": "[1, 2]"})
+    assert json.loads(body) == {"model": "m", "stream": True, "messages": [1, 2]}
+    assert json.loads(build_body({}, {"contents": "[]"})) == {"contents": []}
+
+
+def test_chat_binds_encoder_for_the_call() -> None:
+    llm = _make_llm(backend="ollama")
+    encoder = ConversationEncoder()
+    seen: list[ConversationEncoder] = []
+
+    def fake_do_chat(messages: Any, tools: Any, model: str, timeout: int) -> dict[str, Any]:
+        seen.append(llm._active_encoder())
+        return {"message": {"role": "assistant", "content": "ok"}}
+
+    with patch.object(llm, "_do_chat", side_effect=fake_do_chat):
+        llm.chat([{"role": "user", "content": "hi"}], encoder=encoder)
+    assert seen == [encoder]
+    assert llm._active_encoder() is not encoder
@@ -0,0 +1,118 @@
+"""Tests for LLM record/replay cassettes."""
+
+from __future__ import annotations
+
+import os
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from trust5.core import llm_cassette
+from trust5.core.llm import LLM, LLMError, _model_circuits
+from trust5.core.llm_cassette import Cassette, configure_cassette, request_key
+
+_ANTHROPIC_LINES = [
+    "event: message_start",
+    'data: {"type": "message_start", "message": {"usage": {"input_tokens": 12}}}',
+    'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hello "}}',
+    'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "world"}}',
+    'data: {"type": "message_delta", "usage": {"output_tokens": 2}}',
+    "event: message_stop",
+]
+
+
+@pytest.fixture(autouse=True)
+def _no_cassette():
+    with patch("trust5.core.llm_cassette.emit"), patch("trust5.core.llm.emit"), patch("trust5.core.llm_streams.emit"):
+        yield
+    configure_cassette(None)
+    _model_circuits.pop("claude-test", None)
+
+
+def _make_llm() -> LLM:
+    return LLM(model="claude-test", base_url="https://api.example", backend="anthropic", prompt_caching=False)
+
+
+def _live_response() -> MagicMock:
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {}
+    response.iter_lines.side_effect = lambda decode_unicode=False: iter(_ANTHROPIC_LINES)
+    return response
+
+
+def test_request_key_ignores_key_order_host_and_stream_flag() -> None:
+    a = request_key("https://a.example/v1/messages", b'{"model": "m", "stream": true, "x": 1}', "m")
+    b = request_key("https://b.example/v1/messages", b'{"x": 1, "model": "m"}', "m")
+    c = request_key("https://a.example/v1/messages", b'{"x": 2, "model": "m"}', "m")
+    assert a == b
+    assert a != c
+
+
+def test_record_then_replay_through_stream_consumer(tmp_path: Any) -> None:
+    messages = [{"role": "user", "content": "greet"}]
+
+    configure_cassette(str(tmp_path), "record")
+    llm = _make_llm()
+    with patch.object(llm._session, "post", return_value=_live_response()):
+        recorded = llm.chat(messages)
+    assert recorded["message"]["content"] == "Hello world"
+    assert len(os.listdir(tmp_path)) == 1
+
+    configure_cassette(str(tmp_path), "replay")
+    llm = _make_llm()
+    with patch.object(llm._session, "post", side_effect=AssertionError("network used during replay")):
+        replayed = llm.chat([{"role": "user", "content": "greet"}])
+    assert replayed["message"] == recorded["message"]
+    assert replayed["usage"] == recorded["usage"]
+
+
+def test_replay_falls_back_to_recorded_order_per_model(tmp_path: Any) -> None:
+    cassette = Cassette(str(tmp_path), "record")
+    for text in ("first", "second"):
+        response = MagicMock()
+        response.iter_lines.side_effect = lambda decode_unicode=False, t=text: iter([t])
+        wrapped = cassette.record("https://h/api/chat", {"prompt": text}, "m", response)
+        list(wrapped.iter_lines(decode_unicode=True))
+        wrapped.close()
+
+    replay = Cassette(str(tmp_path), "replay")
+    # Exact key match
+    assert replay.replay("https://h/api/chat", {"prompt": "second"}, "m").text == "second"
+    # Unknown request: next unplayed recording for the model
+    assert replay.replay("https://h/api/chat", {"prompt": "changed"}, "m").text == "first"
+    # Exact match keeps working once played
+    assert replay.replay("https://h/api/chat", {"prompt": "second"}, "m").text == "second"
+    with pytest.raises(LLMError):
+        replay.replay("https://h/api/chat", {"prompt": "changed"}, "m")
+    with pytest.raises(LLMError):
+        replay.replay("https://h/api/chat", {"prompt": "x"}, "other-model")
+
+
+def test_cassette_disabled_by_default() -> None:
+    assert llm_cassette.active_cassette() is None
+    with pytest.raises(ValueError):
+        Cassette("/tmp", "rewind")
+
+
+def test_incomplete_streams_are_not_recorded(tmp_path: Any) -> None:
+    cassette = Cassette(str(tmp_path), "record")
+
+    def wrapped(lines: list[str]) -> Any:
+        response = MagicMock()
+        response.iter_lines.side_effect = lambda decode_unicode=False: iter(lines)
+        return cassette.record("https://h/v1/messages", {"prompt": len(lines)}, "m", response)
+
+    aborted = wrapped(_ANTHROPIC_LINES)
+    reader = aborted.iter_lines(decode_unicode=True)
+    next(reader), next(reader)  # e.g. the hedge loser, closed mid-stream
+    aborted.close()
+    assert os.listdir(tmp_path) == []
+
+    stopped = wrapped(_ANTHROPIC_LINES + ["data: trailing"])
+    for line in stopped.iter_lines(decode_unicode=True):
+        if line == "event: message_stop":
+            break  # consumers stop reading at the terminal event
+    stopped.close()
+    assert len(os.listdir(tmp_path)) == 1
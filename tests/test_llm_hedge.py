@@ -0,0 +1,114 @@
+"""Tests for hedged requests (racing a fallback model on a slow first token)."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from trust5.core import llm_hedge
+from trust5.core.llm import LLM, LLMError, _model_circuits
+
+
+@pytest.fixture(autouse=True)
+def _fast_hedge():
+    llm_hedge.reset_latency_samples()
+    with (
+        patch("trust5.core.llm_hedge.LLM_HEDGE_MIN_DELAY", 0.05),
+        patch("trust5.core.llm_hedge.LLM_HEDGE_MAX_DELAY", 0.2),
+        patch("trust5.core.llm_hedge.emit"),
+        patch("trust5.core.llm.emit"),
+    ):
+        yield
+    llm_hedge.reset_latency_samples()
+    for name in ("slow", "fast", "broken"):
+        _model_circuits.pop(name, None)
+
+
+def _fake_chat(calls: list[str], aborted: list[str]):
+    """_chat_with_retry stand-in: "slow" never streams, "fast" streams at once, "broken" fails."""
+
+    def fake(self: LLM, messages: Any, tools: Any, model: str, timeout: int) -> dict[str, Any]:
+        calls.append(model)
+        if model == "broken":
+            raise LLMError("boom", retryable=False, error_class="permanent")
+        if model == "slow":
+            if self._abort.wait(timeout=5):
+                aborted.append(model)
+            return {"message": {"role": "assistant", "content": "slow"}}
+        self._note_first_chunk(model)
+        return {"message": {"role": "assistant", "content": model}}
+
+    return fake
+
+
+def test_hedge_delay_derived_from_observed_latency() -> None:
+    assert llm_hedge.hedge_delay("m") == 0.2  # no samples: upper bound
+    for _ in range(10):
+        llm_hedge.record_first_token("m", 0.1)
+    assert llm_hedge.hedge_delay("m") == pytest.approx(0.15)
+    for _ in range(10):
+        llm_hedge.record_first_token("quick", 0.001)
+    assert llm_hedge.hedge_delay("quick") == 0.05  # clamped to lower bound
+
+
+def test_slow_primary_is_hedged_and_cancelled() -> None:
+    calls: list[str] = []
+    aborted: list[str] = []
+    llm = LLM(model="slow", fallback_models=["fast"], hedge=True)
+    with patch.object(LLM, "_chat_with_retry", _fake_chat(calls, aborted)):
+        result = llm.chat([{"role": "user", "content": "hi"}])
+    assert result["message"]["content"] == "fast"
+    assert calls == ["slow", "fast"]
+    # The loser is cancelled, not awaited
+    deadline = time.monotonic() + 2
+    while not aborted and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert aborted == ["slow"]
+    assert not llm._abort.is_set()
+
+
+def test_primary_streaming_in_time_is_not_hedged() -> None:
+    calls: list[str] = []
+    llm = LLM(model="fast", fallback_models=["slow"], hedge=True)
+    with patch.object(LLM, "_chat_with_retry", _fake_chat(calls, [])):
+        result = llm.chat([{"role": "user", "content": "hi"}])
+    assert result["message"]["content"] == "fast"
+    assert calls == ["fast"]
+
+
+def test_hedging_disabled_by_default() -> None:
+    calls: list[str] = []
+    aborted: list[str] = []
+    llm = LLM(model="slow", fallback_models=["fast"])
+    with patch.object(LLM, "_chat_with_retry", _fake_chat(calls, aborted)):
+        threading.Timer(0.3, llm.abort).start()
+        result = llm.chat([{"role": "user", "content": "hi"}])
+    assert result["message"]["content"] == "slow"
+    assert calls == ["slow"]
+
+
+def test_failed_hedge_falls_back_to_primary() -> None:
+    calls: list[str] = []
+    aborted: list[str] = []
+    llm = LLM(model="slow", fallback_models=["broken"], hedge=True)
+    with patch.object(LLM, "_chat_with_retry", _fake_chat(calls, aborted)):
+        threading.Timer(0.5, llm.abort).start()
+        result = llm.chat([{"role": "user", "content": "hi"}])
+    # Backup failed before streaming, so the primary is still the answer (ended by the abort)
+    assert result["message"]["content"] == "slow"
+    assert calls == ["slow", "broken"]
+    assert aborted == ["slow"]
+
+
+@patch("trust5.core.auth.registry.get_active_token", return_value=None)
+def test_for_tier_enables_hedging_for_fast_tiers(mock_token: MagicMock) -> None:
+    with patch("trust5.core.llm.LLM_HEDGE_REQUESTS", True):
+        assert LLM.for_tier("fast").hedge is True
+        assert LLM.for_tier("watchdog").hedge is True
+        assert LLM.for_tier("best").hedge is False
+    with patch("trust5.core.llm.LLM_HEDGE_REQUESTS", False):
+        assert LLM.for_tier("fast").hedge is False
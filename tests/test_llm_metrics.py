@@ -0,0 +1,124 @@
+"""Tests for per-call LLM telemetry."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from trust5.core import llm_metrics
+from trust5.core.llm import LLM, LLMError, _model_circuits
+
+_TOOL_STREAM = [
+    'data: {"type": "message_start", "message": {"usage": {"input_tokens": 40}}}',
+    'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Reading"}}',
+    'data: {"type": "content_block_start", "content_block": {"type": "tool_use", "id": "t1", "name": "Read"}}',
+    'data: {"type": "content_block_delta", "delta": {"type": "input_json_delta", "partial_json": "{}"}}',
+    'data: {"type": "content_block_stop"}',
+    'data: {"type": "message_delta", "usage": {"output_tokens": 25}}',
+    "event: message_stop",
+]
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    llm_metrics.get_registry().clear()
+    with patch("trust5.core.llm.emit"), patch("trust5.core.llm_streams.emit"):
+        yield
+    llm_metrics.get_registry().clear()
+    for name in ("metrics-model", "metrics-fallback"):
+        _model_circuits.pop(name, None)
+
+
+def _make_llm(**kwargs: Any) -> LLM:
+    defaults: dict[str, Any] = dict(
+        model="metrics-model",
+        base_url="https://api.example",
+        backend="anthropic",
+        prompt_caching=False,
+        labels={"tier": "fast", "agent": "implementer", "stage": "core"},
+    )
+    defaults.update(kwargs)
+    return LLM(**defaults)
+
+
+def test_streamed_call_records_latency_and_labels() -> None:
+    llm = _make_llm()
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {}
+    response.iter_lines.return_value = iter(_TOOL_STREAM)
+    with patch.object(llm._session, "post", return_value=response):
+        llm.chat([{"role": "user", "content": "go"}])
+
+    (rec,) = llm_metrics.get_registry().snapshot()
+    assert rec["model"] == "metrics-model"
+    assert rec["provider"] == "anthropic"
+    assert (rec["tier"], rec["agent"], rec["stage"]) == ("fast", "implementer", "core")
+    assert rec["first_token_s"] is not None
+    assert rec["first_tool_call_s"] is not None
+    assert rec["first_tool_call_s"] >= rec["first_token_s"]
+    assert rec["input_tokens"] == 40
+    assert rec["output_tokens"] == 25
+    assert rec["outcome"] == "ok"
+    assert rec["retries"] == 0 and rec["fallback_hops"] == 0
+
+
+def test_retries_fallback_hops_and_errors_are_counted() -> None:
+    llm = _make_llm(fallback_models=["metrics-fallback"])
+    calls = {"n": 0}
+
+    def flaky(messages: Any, tools: Any, model: str, timeout: int) -> dict[str, Any]:
+        calls["n"] += 1
+        if model == "metrics-model":
+            raise LLMError("bad request", retryable=False, error_class="permanent")
+        if calls["n"] == 2:
+            raise LLMError("overloaded", retryable=True, retry_after=0, error_class="server")
+        return {"message": {"role": "assistant", "content": "ok"}, "usage": {"output_tokens": 3}}
+
+    with (
+        patch.object(llm, "_do_chat", side_effect=flaky),
+        patch("trust5.core.llm._BACKOFF_SERVER") as backoff,
+    ):
+        backoff.for_attempt.return_value = 0.0
+        llm.chat([{"role": "user", "content": "go"}])
+        with patch.object(llm, "_do_chat", side_effect=LLMError("down", retryable=False, error_class="auth")):
+            with pytest.raises(LLMError):
+                llm.chat([{"role": "user", "content": "go"}])
+
+    ok, failed = llm_metrics.get_registry().snapshot()
+    assert ok["model"] == "metrics-fallback"
+    assert ok["fallback_hops"] == 1
+    assert ok["retries"] == 1
+    assert failed["outcome"] == "error"
+    assert failed["error_class"] == "auth"
+
+
+def test_dump_load_and_summarize(tmp_path: Any) -> None:
+    for model, ttft in (("a", 0.5), ("a", 1.5), ("b", 2.0)):
+        m = llm_metrics.CallMetrics(model=model, provider="p", first_token_s=ttft)
+        m.finish({"usage": {"output_tokens": 10}})
+
+    path = llm_metrics.dump_metrics(str(tmp_path))
+    assert path is not None and path.startswith(str(tmp_path / ".trust5" / "metrics"))
+    records = llm_metrics.load_metrics(str(tmp_path))
+    assert len(records) == 3
+
+    summary = llm_metrics.summarize(records)
+    assert summary["a"]["calls"] == 2
+    assert summary["a"]["ttft_p50"] == 1.5
+    assert summary["b"]["ttft_p90"] == 2.0
+    assert llm_metrics.summarize(records, by="provider")["p"]["calls"] == 3
+
+
+def test_dump_without_records_writes_nothing(tmp_path: Any) -> None:
+    assert llm_metrics.dump_metrics(str(tmp_path)) is None
+    assert llm_metrics.load_metrics(str(tmp_path)) == []
+
+
+@patch("trust5.core.auth.registry.get_active_token", return_value=None)
+def test_for_tier_labels_calls_with_the_stage(mock_token: MagicMock) -> None:
+    llm = LLM.for_tier("best", stage_name="repairer", stage="core")
+    assert llm.labels == {"tier": "best", "agent": "repairer", "stage": "core"}
+    assert LLM.for_tier("watchdog").labels["stage"] == ""
@@ -13,6 +13,15 @@ from trust5.core.llm import (
     _trim_messages_to_context,
     estimate_token_count,
 )
+from trust5.core.token_counter import CharRatioCounter, set_token_counter
+
+
+@pytest.fixture(autouse=True)
+def _char_ratio_counter():
+    """C5 tests below are written against the ~4 chars/token counter."""
+    set_token_counter(CharRatioCounter())
+    yield
+    set_token_counter(None)
 
 
 # ── C5: estimate_token_count tests ─────────────────────────────────────
@@ -0,0 +1,147 @@
+"""Tests for the long-lived, leased MCP client pool."""
+
+from __future__ import annotations
+
+import sys
+import textwrap
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from trust5.core import mcp_manager
+from trust5.core.mcp import MCPClient
+from trust5.core.mcp_pool import MCPPool
+
+_SERVER = textwrap.dedent(
+    """
+    import json, sys
+    for line in sys.stdin:
+        req = json.loads(line)
+        if "id" not in req:
+            continue
+        result = {"capabilities": {}} if req["method"] == "initialize" else {}
+        if req["method"] == "tools/list":
+            result = {"tools": [{"name": "echo"}]}
+        print(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": result}), flush=True)
+    """
+)
+
+
+class _FakeClient:
+    def __init__(self, name: str, tools: list[dict[str, Any]] | None):
+        self.name = name
+        self.tools = tools
+        self.running = True
+        self.answers_ping = True
+        self.list_calls = 0
+        self.start_calls = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.running
+
+    def start(self) -> None:
+        self.start_calls += 1
+        self.running = True
+        self.answers_ping = True
+
+    def stop(self) -> None:
+        self.running = False
+
+    def ping(self) -> bool:
+        return self.answers_ping
+
+    def list_tools(self) -> list[dict[str, Any]]:
+        if self.tools is None:
+            self.list_calls += 1
+            self.tools = [{"name": f"{self.name}_tool"}]
+        return list(self.tools)
+
+
+def _pool(max_per_server: int = 2, health_interval: float = 30.0) -> tuple[MCPPool, list[_FakeClient]]:
+    started: list[_FakeClient] = []
+
+    def start(name: str, tools: list[dict[str, Any]] | None) -> Any:
+        client = _FakeClient(name, tools)
+        client.list_tools()
+        started.append(client)
+        return client
+
+    pool = MCPPool(["docs", "db"], start, max_per_server=max_per_server, health_interval=health_interval)
+    return pool, started
+
+
+def test_released_clients_are_reused_and_catalog_fetched_once() -> None:
+    pool, started = _pool()
+    first = pool.lease()
+    pool.release(first)
+    second = pool.lease()
+    assert second == first
+    assert len(started) == 2  # one per server
+
+    third = pool.lease()  # both busy: a second instance per server, seeded catalog
+    assert [c.name for c in third] == ["docs", "db"]
+    assert len(started) == 4
+    assert sum(c.list_calls for c in started) == 2
+
+    shared = pool.lease()  # at max_per_server: share the least loaded instance
+    assert len(started) == 4 and shared[0] in (first[0], third[0])
+
+
+@patch("trust5.core.mcp_pool.emit")
+def test_dead_or_silent_servers_are_restarted_in_place(_emit: MagicMock) -> None:
+    pool, _ = _pool(health_interval=0.0)
+    clients = pool.lease()
+    pool.release(clients)
+    docs, db = clients
+    docs.running = False  # crashed
+    db.answers_ping = False  # hung
+    assert pool.lease() == clients
+    assert docs.start_calls == 1 and db.start_calls == 1
+    assert pool.restarts == 2
+
+
+@patch("trust5.core.mcp_pool.emit")
+def test_failed_server_is_skipped_and_close_stops_everything(_emit: MagicMock) -> None:
+    def start(name: str, tools: list[dict[str, Any]] | None) -> Any:
+        if name == "db":
+            raise RuntimeError("spawn failed")
+        return _FakeClient(name, tools)
+
+    pool = MCPPool(["docs", "db"], start)
+    idle = pool.lease()
+    pool.release(idle)
+    busy = pool.lease()
+    assert [c.name for c in busy] == ["docs"]
+    assert "failed to start" in _emit.call_args[0][1]
+
+    pool.close()
+    assert busy[0].is_running  # still leased
+    pool.release(busy)
+    assert not busy[0].is_running
+    with pytest.raises(RuntimeError):
+        pool._acquire("docs")
+
+
+@patch("trust5.core.mcp_manager.emit")
+def test_mcp_clients_leases_real_stdio_server_from_pool(_emit: MagicMock, tmp_path: Path) -> None:
+    script = tmp_path / "server.py"
+    script.write_text(_SERVER)
+    manager = mcp_manager.MCPManager(config_path=str(tmp_path / "none.json"))
+    manager._server_configs = {"echo": {"command": sys.executable, "args": [str(script)]}}
+    manager._initialized = True
+    pool = MCPPool(manager.server_names, manager.start_client, health_interval=0.0)
+
+    with patch.object(mcp_manager, "_pool", pool):
+        with mcp_manager.mcp_clients() as clients:
+            (client,) = clients
+            assert isinstance(client, MCPClient)
+            assert client.list_tools() == [{"name": "echo"}]
+            pid = client.process.pid if client.process else None
+        with mcp_manager.mcp_clients() as again:
+            assert again == [client] and client.process and client.process.pid == pid
+            assert client.ping()
+    pool.close()
+    assert not client.is_running
@@ -0,0 +1,116 @@
+"""Tests for multiplexed JSON-RPC requests over MCP stdio connections."""
+
+from __future__ import annotations
+
+import sys
+import textwrap
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from trust5.core.mcp import MCPClient
+from trust5.core.mcp_rpc import MCPCancelledError, MCPTimeoutError, MultiplexedRPC, PendingRequests, RPCStats
+
+# Answers tools/call after arguments["delay"] seconds, without blocking other requests.
+_SERVER = textwrap.dedent(
+    """
+    import json, sys, threading
+    lock = threading.Lock()
+    def reply(req, result):
+        with lock:
+            print(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": result}), flush=True)
+    for line in sys.stdin:
+        req = json.loads(line)
+        if "id" not in req:
+            continue
+        if req["method"] == "tools/call":
+            args = req["params"]["arguments"]
+            threading.Timer(args["delay"], reply, (req, {"content": args["tag"]})).start()
+        else:
+            reply(req, {"capabilities": {}} if req["method"] == "initialize" else {})
+    """
+)
+
+
+@pytest.fixture
+def client(tmp_path: Path) -> Iterator[MCPClient]:
+    script = tmp_path / "server.py"
+    script.write_text(_SERVER)
+    c = MCPClient([sys.executable, str(script)], name="slow", start_timeout=10)
+    c.start()
+    yield c
+    c.stop()
+
+
+def test_fast_call_is_not_stuck_behind_slow_one(client: MCPClient) -> None:
+    finished: list[str] = []
+
+    def call(tag: str, delay: float) -> None:
+        client.call_tool("t", {"tag": tag, "delay": delay})
+        finished.append(tag)
+
+    slow = threading.Thread(target=call, args=("slow", 0.6))
+    slow.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    call("fast", 0.0)
+    assert time.monotonic() - started < 0.5
+    slow.join()
+    assert finished == ["fast", "slow"]
+    stats = client.rpc_stats.snapshot()
+    assert stats["max_in_flight"] == 2 and stats["in_flight"] == 0
+
+
+def test_timeout_and_cancel_leave_connection_usable(client: MCPClient) -> None:
+    with pytest.raises(MCPTimeoutError):
+        client.call_tool("t", {"tag": "late", "delay": 0.5}, timeout=0.05)
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    with pytest.raises(MCPCancelledError):
+        client.call_tool("t", {"tag": "late", "delay": 0.5}, cancel=cancel)
+
+    assert client.call_tool("t", {"tag": "ok", "delay": 0.0}) == {"content": "ok"}
+    time.sleep(0.6)  # late answers arrive and are dropped
+    stats = client.rpc_stats.snapshot()
+    assert (stats["timeouts"], stats["cancelled"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_dead_server_fails_outstanding_requests(client: MCPClient) -> None:
+    errors: list[Exception] = []
+
+    def call() -> None:
+        try:
+            client.call_tool("t", {"tag": "never", "delay": 5})
+        except RuntimeError as e:
+            errors.append(e)
+
+    caller = threading.Thread(target=call)
+    caller.start()
+    time.sleep(0.1)
+    assert client.process is not None
+    client.process.kill()
+    caller.join(timeout=5)
+    assert errors and "closed connection" in str(errors[0])
+    assert not client.ping()
+
+
+def test_responses_resolve_by_id_in_any_order() -> None:
+    pending = PendingRequests("x", RPCStats())
+    (id1, f1), (id2, f2) = pending.register(), pending.register()
+    assert pending.resolve({"id": id2, "result": 2})
+    assert not pending.resolve({"id": 99, "result": 0})
+    assert pending.wait(id2, f2, timeout=1) == {"id": id2, "result": 2}
+    pending.resolve({"id": id1, "error": {"code": -1}})
+    assert pending.wait(id1, f1, timeout=1)["error"] == {"code": -1}
+    assert pending.stats.snapshot()["errors"] == 1
+
+
+def test_transport_without_transmit_fails_at_construction() -> None:
+    class Incomplete(MultiplexedRPC):
+        pass
+
+    with pytest.raises(TypeError, match="_transmit"):
+        Incomplete()  # type: ignore[abstract]
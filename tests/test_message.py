@@ -0,0 +1,95 @@
+"""Tests for stream-token coalescing in trust5.core.message."""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+
+from trust5.core import message
+from trust5.core.event_bus import K_MSG, K_STREAM_END, K_STREAM_START, K_STREAM_TOKEN, Event, EventBus
+from trust5.core.message import M, emit, emit_stream_end, emit_stream_start, emit_stream_token
+
+
+@pytest.fixture
+def events() -> Iterator[queue.Queue[Event | None]]:
+    bus = EventBus("unused.sock")  # never started: in-process listeners only
+    q = bus.subscribe()
+    with patch("trust5.core.message.get_bus", return_value=bus):
+        yield q
+    message._stream_local.__dict__.clear()
+
+
+def _drain(q: queue.Queue[Event | None]) -> list[Event]:
+    out = []
+    while not q.empty():
+        event = q.get_nowait()
+        assert event is not None
+        out.append(event)
+    return out
+
+
+def test_tokens_coalesce_into_one_event_per_window(events: queue.Queue[Event | None]) -> None:
+    emit_stream_start(M.ATHK, "[m] Thinking")
+    for i in range(1000):
+        emit_stream_token(f"t{i} ")
+    emit_stream_end()
+
+    got = _drain(events)
+    assert got[0].kind == K_STREAM_START and got[-1].kind == K_STREAM_END
+    tokens = [e for e in got if e.kind == K_STREAM_TOKEN]
+    assert len(tokens) < 10
+    assert "".join(e.msg for e in tokens) == "".join(f"t{i} " for i in range(1000))
+    assert {e.code for e in tokens} == {"ATHK"}
+
+
+def test_size_and_interval_limits_flush(events: queue.Queue[Event | None]) -> None:
+    emit_stream_start(M.ARSP, "[m] ")
+    with patch("trust5.core.message._STREAM_FLUSH_CHARS", 4):
+        emit_stream_token("ab")
+        assert _drain(events)[-1].kind == K_STREAM_START
+        emit_stream_token("cd")
+        assert [e.msg for e in _drain(events)] == ["abcd"]
+    with patch("trust5.core.message._STREAM_FLUSH_INTERVAL", 0):
+        emit_stream_token("e")
+        assert [e.msg for e in _drain(events)] == ["e"]
+
+
+def test_other_events_flush_pending_tokens_first(events: queue.Queue[Event | None]) -> None:
+    emit_stream_start(M.ARSP, "[m] ")
+    emit_stream_token("partial")
+    emit(M.SWRN, "aborted")
+    got = _drain(events)[1:]
+    assert [(e.kind, e.msg) for e in got] == [(K_STREAM_TOKEN, "partial"), (K_MSG, "aborted")]
+
+
+def test_paused_stream_is_flushed_by_the_deadline(events: queue.Queue[Event | None]) -> None:
+    emit_stream_start(M.ARSP, "[m] ")
+    emit_stream_token("before the pause")
+    assert events.get(timeout=1).kind == K_STREAM_START
+    event = events.get(timeout=1)  # no further token and no stream end: the timer publishes it
+    assert (event.kind, event.msg, event.code) == (K_STREAM_TOKEN, "before the pause", "ARSP")
+    emit_stream_end()
+    assert [e.kind for e in _drain(events)] == [K_STREAM_END]
+
+
+def test_pending_tokens_are_per_thread(events: queue.Queue[Event | None]) -> None:
+    emit_stream_start(M.ARSP, "[main] ")
+    with patch("trust5.core.message._STREAM_FLUSH_INTERVAL", 60):  # keep "main" pending
+        emit_stream_token("main")
+
+    def other() -> None:
+        emit_stream_start(M.ARSP, "[other] ")
+        emit_stream_token("other")
+        emit_stream_end()
+
+    t = threading.Thread(target=other)
+    t.start()
+    t.join()
+    emit_stream_end()
+
+    token_msgs = [e.msg for e in _drain(events) if e.kind == K_STREAM_TOKEN]
+    assert token_msgs == ["other", "main"]
@@ -172,7 +172,7 @@ def test_mutation_no_mutants(mock_gen, mock_find, mock_emit):
 @patch("trust5.tasks.mutation_task._find_source_files", return_value=["/tmp/calc.py"])
 @patch("trust5.tasks.mutation_task._restore_file")
 @patch("trust5.tasks.mutation_task._apply_mutant", return_value="original content")
-@patch("trust5.tasks.mutation_task.subprocess.run")
+@patch("trust5.tasks.mutation_task.run_capture")
 @patch("trust5.tasks.mutation_task.generate_mutants")
 def test_mutation_all_killed(mock_gen, mock_run, mock_apply, mock_restore, mock_find, mock_emit):
     """All mutants killed → score 1.0, success."""
@@ -203,7 +203,7 @@ def test_mutation_all_killed(mock_gen, mock_run, mock_apply, mock_restore, mock_
 @patch("trust5.tasks.mutation_task._find_source_files", return_value=["/tmp/calc.py"])
 @patch("trust5.tasks.mutation_task._restore_file")
 @patch("trust5.tasks.mutation_task._apply_mutant", return_value="original content")
-@patch("trust5.tasks.mutation_task.subprocess.run")
+@patch("trust5.tasks.mutation_task.run_capture")
 @patch("trust5.tasks.mutation_task.generate_mutants")
 def test_mutation_some_survived(mock_gen, mock_run, mock_apply, mock_restore, mock_find, mock_emit):
     """Some mutants survive → failed_continue with score < 1.0."""
@@ -235,7 +235,7 @@ def test_mutation_some_survived(mock_gen, mock_run, mock_apply, mock_restore, mo
 @patch("trust5.tasks.mutation_task._find_source_files", return_value=["/tmp/calc.py"])
 @patch("trust5.tasks.mutation_task._restore_file")
 @patch("trust5.tasks.mutation_task._apply_mutant", return_value="original content")
-@patch("trust5.tasks.mutation_task.subprocess.run")
+@patch("trust5.tasks.mutation_task.run_capture")
 @patch("trust5.tasks.mutation_task.generate_mutants")
 def test_mutation_timeout_counts_as_killed(mock_gen, mock_run, mock_apply, mock_restore, mock_find, mock_emit):
     """Timeout during test run counts as 'killed' (behaviour changed)."""
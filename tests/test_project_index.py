@@ -0,0 +1,112 @@
+"""Tests for the shared, incrementally refreshed project file index."""
+
+from __future__ import annotations
+
+import glob
+import os
+import sys
+from pathlib import Path
+
+from trust5.core import project_index
+from trust5.core.project_index import ProjectIndex, get_index
+from trust5.core.subprocess_capture import run_capture
+from trust5.core.tool_cache import note_file_changed
+
+
+def _settle(root: Path) -> None:
+    """Backdate every mtime so nothing is re-checked just for being recent."""
+    old = 1_600_000_000
+    for path in [root, *root.rglob("*")]:
+        os.utime(path, (old, old), follow_symlinks=False)
+
+
+def _tree(root: Path) -> None:
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "app.py").write_text("app\n")
+    (root / "src" / "pkg" / "core.py").write_text("core\n")
+    (root / "tests").mkdir()
+    (root / "tests" / "test_app.py").write_text("test\n")
+    (root / "README.md").write_text("readme\n")
+    (root / "node_modules" / "lib").mkdir(parents=True)
+    (root / "node_modules" / "lib" / "index.js").write_text("js\n")
+    (root / ".hidden").mkdir()
+    (root / ".hidden" / "x.py").write_text("x\n")
+
+
+def test_classifies_and_filters_in_walk_order(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    index = ProjectIndex(str(tmp_path))
+    assert [f.rel for f in index.files()] == ["README.md", "src/app.py", "src/pkg/core.py", "tests/test_app.py"]
+    assert index.paths((".py",), tests=True) == [os.path.join("tests", "test_app.py")]
+    assert index.paths((".py",), skip_dirs=("pkg",), tests=False) == [os.path.join("src", "app.py")]
+    (app,) = [f for f in index.files() if f.rel == "src/app.py"]
+    assert (app.language, app.size, app.is_test) == ("python", 4, False)
+
+
+def test_refresh_relists_only_changed_directories(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    _settle(tmp_path)
+    index = ProjectIndex(str(tmp_path))
+    index.refresh()
+    walked = index.rescans
+
+    index.refresh()
+    assert index.rescans == walked  # nothing changed: directories are only stat-ed
+
+    (tmp_path / "src" / "new.py").write_text("new\n")
+    (tmp_path / "tests" / "test_app.py").unlink()
+    index.refresh()
+    assert index.rescans == walked + 2
+    assert index.paths((".py",)) == [
+        os.path.join("src", "app.py"),
+        os.path.join("src", "new.py"),
+        os.path.join("src", "pkg", "core.py"),
+    ]
+    assert index.walks == 1
+
+
+def test_change_notes_refresh_sizes_without_a_walk(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    _settle(tmp_path)
+    index = get_index(str(tmp_path))
+    index.refresh()
+    app = tmp_path / "src" / "app.py"
+    app.write_text("grown content\n")
+    _settle(tmp_path)  # same-tick rewrite: the mtime alone would not show it
+    assert [f.size for f in index.files() if f.rel == "src/app.py"] == [4]
+
+    note_file_changed(str(app))
+    assert [f.size for f in index.files() if f.rel == "src/app.py"] == [14]
+
+    (tmp_path / "README.md").write_text("r\n")
+    _settle(tmp_path)
+    note_file_changed()  # e.g. after a Bash command
+    assert [f.size for f in index.files() if f.rel == "README.md"] == [2]
+
+
+def test_sizes_are_refreshed_after_subprocess_rewrites(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    _settle(tmp_path)
+    index = get_index(str(tmp_path))
+    index.refresh()
+    app = tmp_path / "src" / "app.py"
+    run_capture([sys.executable, "-c", f"open({str(app)!r}, 'w').write('x' * 500)"])  # e.g. ruff check --fix
+    _settle(tmp_path)
+    assert [f.size for f in index.files() if f.rel == "src/app.py"] == [500]
+
+
+def test_glob_matches_glob_module(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    (tmp_path / "src" / "app_test.py").write_text("t\n")
+    index = ProjectIndex(str(tmp_path))
+    for pattern in ("*.md", "**/*.py", "src/*", "src/**", "**/app*.py", "s?c/[a-b]*.py", "src/[!a]*", "src/**/*.py"):
+        expected = sorted(os.path.relpath(p, tmp_path) for p in glob.glob(str(tmp_path / pattern), recursive=True))
+        assert sorted(index.glob(pattern) or []) == expected, pattern
+    assert index.glob("node_modules/**/*.js") is None
+    assert index.glob(".hidden/*.py") is None
+    assert index.glob("../*") is None
+
+
+def test_get_index_is_shared_per_root(tmp_path: Path) -> None:
+    assert get_index(str(tmp_path)) is get_index(str(tmp_path / "."))
+    assert project_index._indexes[os.path.realpath(tmp_path)] is get_index(str(tmp_path))
@@ -0,0 +1,161 @@
+"""Tests for the shared header-driven rate limiter."""
+
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from trust5.core import rate_limiter as rl
+from trust5.core.llm import LLM, estimate_token_count
+
+
+@pytest.fixture(autouse=True)
+def _fresh_limiters():
+    rl.reset_limiters()
+    with patch("trust5.core.rate_limiter.emit"):
+        yield
+    rl.reset_limiters()
+
+
+def test_parse_reset_formats() -> None:
+    now = time.time()
+    assert rl._parse_reset("12", now) == 12.0
+    assert rl._parse_reset("6m0s", now) == 360.0
+    assert rl._parse_reset("250ms", now) == pytest.approx(0.25)
+    iso = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now + 30))
+    assert rl._parse_reset(iso, now) == pytest.approx(30, abs=1.5)
+    assert rl._parse_reset("soon", now) is None
+
+
+def test_get_limiter_shared_per_provider_and_model() -> None:
+    assert rl.get_limiter("claude", "m1") is rl.get_limiter("claude", "m1")
+    assert rl.get_limiter("claude", "m1") is not rl.get_limiter("claude", "m2")
+    assert rl.get_limiter("claude", "m1") is not rl.get_limiter("google", "m1")
+
+
+def test_update_reads_anthropic_headers() -> None:
+    limiter = rl.get_limiter("claude", "m")
+    limiter.update(
+        {
+            "anthropic-ratelimit-requests-remaining": "42",
+            "anthropic-ratelimit-requests-limit": "50",
+            "anthropic-ratelimit-requests-reset": "30",
+            "anthropic-ratelimit-input-tokens-remaining": "9000",
+            "anthropic-ratelimit-input-tokens-limit": "10000",
+        },
+        200,
+    )
+    assert limiter.requests.remaining == 42
+    assert limiter.requests.limit == 50
+    assert limiter.tokens.remaining == 9000
+    assert limiter.acquire(100) < 0.05
+    assert limiter.requests.remaining == 41
+    assert limiter.tokens.remaining == 8900
+
+
+def test_exhausted_budget_waits_for_reset() -> None:
+    limiter = rl.get_limiter("openai", "m")
+    limiter.update({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "300ms"}, 200)
+    waited = limiter.acquire()
+    assert 0.2 <= waited < 1.0
+    assert limiter.waits == 1
+    assert rl.limiter_stats()["openai/m"]["waits"] == 1
+
+
+def test_429_retry_after_blocks_all_callers() -> None:
+    limiter = rl.get_limiter("claude", "m")
+    limiter.update({"Retry-After": "0.3"}, 429)
+    start = time.monotonic()
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    assert time.monotonic() - start >= 0.25
+    assert limiter.waits == 3
+
+
+def test_low_budget_is_paced_across_window() -> None:
+    limiter = rl.get_limiter("claude", "m")
+    limiter.update(
+        {
+            "anthropic-ratelimit-requests-remaining": "2",
+            "anthropic-ratelimit-requests-limit": "100",
+            "anthropic-ratelimit-requests-reset": "0.6",
+        },
+        200,
+    )
+    assert limiter.acquire() < 0.05
+    # One request left over ~0.6s: the next admission is spaced out, not immediate
+    assert limiter.acquire() >= 0.2
+
+
+def test_acquire_admits_in_arrival_order() -> None:
+    limiter = rl.get_limiter("claude", "m")
+    limiter.update({"Retry-After": "0.2"}, 429)
+    order: list[int] = []
+
+    def worker(n: int) -> None:
+        limiter.acquire()
+        order.append(n)
+
+    threads = []
+    for n in range(4):
+        t = threading.Thread(target=worker, args=(n,))
+        t.start()
+        threads.append(t)
+        time.sleep(0.02)
+    for t in threads:
+        t.join(timeout=5)
+    assert order == [0, 1, 2, 3]
+
+
+def test_abort_ends_wait_without_spending_budget() -> None:
+    limiter = rl.get_limiter("claude", "m")
+    limiter.update(
+        {
+            "anthropic-ratelimit-requests-remaining": "0",
+            "anthropic-ratelimit-requests-reset": "60",
+            "anthropic-ratelimit-input-tokens-remaining": "9000",
+        },
+        200,
+    )
+    abort = threading.Event()
+    abort.set()
+    assert limiter.acquire(100, abort=abort) < 1.0
+    assert (limiter.requests.remaining, limiter.tokens.remaining) == (0, 9000)
+
+
+@patch("trust5.core.llm.emit")
+def test_post_feeds_limiter_from_response_headers(mock_emit: MagicMock) -> None:
+    llm = LLM(model="rl-model", backend="anthropic", base_url="http://localhost:9", provider_name=None)
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {"anthropic-ratelimit-requests-remaining": "7", "anthropic-ratelimit-requests-reset": "5"}
+    with patch.object(llm._session, "post", return_value=response):
+        llm._post("http://localhost:9/v1/messages", b"{}", "rl-model", 30)
+    assert rl.get_limiter("anthropic", "rl-model").requests.remaining == 7
+
+
+@patch("trust5.core.llm.emit")
+def test_chat_charges_the_message_token_estimate(mock_emit: MagicMock) -> None:
+    llm = LLM(model="rl-model", backend="anthropic", base_url="http://localhost:9", provider_name=None)
+    messages = [{"role": "user", "content": "count these words " * 50}]
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {}
+    response.iter_lines.return_value = iter(
+        ['data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "ok"}}', "event: message_stop"]
+    )
+    limiter = MagicMock()
+    with (
+        patch("trust5.core.llm.get_limiter", return_value=limiter),
+        patch("trust5.core.llm.LLM_RATE_LIMITER", True),
+        patch.object(llm._session, "post", return_value=response),
+    ):
+        llm.chat(messages)
+    (tokens, _abort), _ = limiter.acquire.call_args
+    assert tokens == estimate_token_count(messages, "rl-model") > 0
@@ -524,7 +524,7 @@ def test_repair_keeps_unknown_when_detection_fails(mock_detect, mock_emit):
 
 
 @patch("trust5.tasks.repair_task.emit")
-@patch("trust5.tasks.repair_task.subprocess.run")
+@patch("trust5.tasks.repair_task.run_capture")
 def test_repair_preflight_uses_plan_config_test_command(mock_run, mock_emit):
     """Pre-flight check should use plan_config.test_command when available,
     matching ValidateTask behavior. This prevents false positives when the
@@ -598,7 +598,7 @@ def test_repair_no_preflight_for_lint_failure(
         }
     )
 
-    with patch("trust5.tasks.repair_task.subprocess.run") as mock_subprocess:
+    with patch("trust5.tasks.repair_task.run_capture") as mock_subprocess:
         result = task.execute(stage)
 
         # subprocess should NOT be called (no pre-flight for lint failures)
@@ -638,7 +638,7 @@ def test_repair_no_preflight_for_syntax_failure(
         }
     )
 
-    with patch("trust5.tasks.repair_task.subprocess.run") as mock_subprocess:
+    with patch("trust5.tasks.repair_task.run_capture") as mock_subprocess:
         result = task.execute(stage)
 
         # subprocess should NOT be called (no pre-flight for syntax failures)
@@ -683,7 +683,7 @@ def test_repair_passes_plan_config_to_build_repair_prompt(
     )
 
     with patch("trust5.tasks.repair_task.build_repair_prompt", return_value="fix it") as mock_build:
-        with patch("trust5.tasks.repair_task.subprocess.run") as mock_sub:
+        with patch("trust5.tasks.repair_task.run_capture") as mock_sub:
             mock_sub.return_value = MagicMock(returncode=1)  # pre-flight fails
             result = task.execute(stage)
 
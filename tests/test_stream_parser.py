@@ -0,0 +1,76 @@
+"""Tests for the byte-level stream line splitter."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any
+from unittest.mock import patch
+
+import requests
+
+from trust5.core.llm import LLM
+from trust5.core.stream_parser import StreamReader, loads
+
+
+class _Raw:
+    """Socket stand-in that hands back one network chunk per read."""
+
+    def __init__(self, chunks: list[bytes]) -> None:
+        self._chunks = list(chunks)
+
+    def read(self, amt: int | None = None) -> bytes:
+        return self._chunks.pop(0) if self._chunks else b""
+
+    def close(self) -> None:
+        pass
+
+
+def _response(chunks: list[bytes]) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = _Raw(chunks)
+    return response
+
+
+def test_lines_split_across_chunks_and_crlf() -> None:
+    reader = StreamReader(_response([b'{"a":', b" 1}\r\n\r\n", b'{"b": 2}\n{"c"', b": 3}"]), threading.Event(), 60)
+    assert [loads(line) for line in reader] == [{"a": 1}, {"b": 2}, {"c": 3}]
+    assert reader.stopped == ""
+
+
+def test_abort_and_deadline_stop_iteration() -> None:
+    abort = threading.Event()
+    reader = StreamReader(_response([b"one\n", b"two\n", b"three\n"]), abort, 60)
+    seen = []
+    for line in reader:
+        seen.append(line)
+        abort.set()
+    assert seen == [b"one"]
+    assert reader.stopped == "abort"
+
+    expired = StreamReader(_response([b"one\n"]), threading.Event(), -1)
+    assert list(expired) == []
+    assert expired.stopped == "timeout"
+
+
+def test_iter_lines_fallback_for_response_doubles() -> None:
+    class Replay:
+        def iter_lines(self, decode_unicode: bool = False) -> Any:
+            return iter(["first", "", b"second"])
+
+    assert list(StreamReader(Replay(), threading.Event(), 60)) == [b"first", b"second"]
+
+
+@patch("trust5.core.llm_streams.emit")
+def test_anthropic_stream_parsed_from_raw_chunks(mock_emit: Any) -> None:
+    body = (
+        b'event: content_block_delta\r\ndata: {"type": "content_block_delta", '
+        b'"delta": {"type": "text_delta", "text": "Hel"}}\r\n\r\n'
+        b'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "lo \\u00e9"}}\n\n'
+        b'data: {"type": "message_delta", "usage": {"output_tokens": 3}}\n\nevent: message_stop\n\n'
+    )
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+    llm = LLM(model="claude-test", backend="anthropic", prompt_caching=False)
+    result = llm._consume_anthropic_stream(_response(chunks), "claude-test")
+    assert result["message"]["content"] == "Hello é"
+    assert result["usage"]["output_tokens"] == 3
@@ -0,0 +1,126 @@
+"""Tests for bounded subprocess output capture."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from trust5.core.subprocess_capture import OutputBuffer, collect_usage, record_command_usage, run_capture
+
+
+def test_buffer_keeps_head_and_tail_and_counts_dropped_bytes() -> None:
+    buf = OutputBuffer(limit=8)
+    for chunk in (b"abc", b"defgh", b"ijklmn"):
+        buf.feed(chunk)
+    assert (bytes(buf.head), bytes(buf.tail), buf.dropped) == (b"ab", b"ijklmn", 6)
+    assert buf.text() == "ab\n... [6 bytes of output omitted] ...\nijklmn"
+
+    small = OutputBuffer(limit=8)
+    small.feed(b"abcdefgh")
+    assert small.text() == "abcdefgh"
+
+
+def test_small_output_matches_subprocess_run(tmp_path: Path) -> None:
+    code = "import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"
+    result = run_capture([sys.executable, "-c", code], cwd=str(tmp_path))
+    assert (result.stdout, result.stderr, result.returncode) == ("out\n", "err\n", 3)
+    assert result.dropped_bytes == 0 and result.log_paths == []
+    assert run_capture("echo $PWD", shell=True, cwd=str(tmp_path)).stdout == f"{tmp_path}\n"
+
+
+def test_overflow_is_dropped_in_memory_and_spilled_to_logs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    code = "import sys\nfor i in range(20000): print(f'line {i:05d}')"
+    result = run_capture([sys.executable, "-c", code], limit=4096, log_name="tests/unit run")
+    assert result.stdout.startswith("line 00000\n")
+    assert result.stdout.endswith("line 19999\n")
+    assert result.dropped_bytes == 20000 * 11 - 4096
+    assert len(result.log_paths) == 1
+    log = Path(result.log_paths[0])
+    assert log.parent == tmp_path / ".trust5" / "logs" and log.name.startswith("tests-unit-run-")
+    assert log.read_text().splitlines() == [f"line {i:05d}" for i in range(20000)]
+    assert f"omitted; full output in {log}]" in result.stdout
+
+
+def test_timeout_kills_the_command_and_keeps_partial_output() -> None:
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired) as exc:
+        run_capture("echo started; sleep 30", shell=True, timeout=0.5)
+    assert time.monotonic() - started < 5
+    assert exc.value.output == "started\n"
+
+
+def test_missing_executable_raises_file_not_found() -> None:
+    with pytest.raises(FileNotFoundError):
+        run_capture(["definitely-not-a-real-binary-t5"])
+
+
+def test_spill_failure_still_returns_bounded_output(tmp_path: Path) -> None:
+    blocker = tmp_path / "logs"
+    blocker.write_text("not a directory")
+    with patch("trust5.core.subprocess_capture.logs_dir", return_value=str(blocker / "sub")):
+        result = run_capture([sys.executable, "-c", "print('x' * 10000)"], limit=100, log_name="bash")
+    assert result.log_paths == []
+    assert "omitted]" in result.stdout and len(result.stdout) < 200
+
+
+def _gone(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] == "Z"
+    except FileNotFoundError:
+        return True
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+def test_timeout_kills_the_whole_process_group(tmp_path: Path) -> None:
+    pidfile = tmp_path / "bg.pid"
+    with collect_usage() as usages, pytest.raises(subprocess.TimeoutExpired):
+        run_capture(f"sleep 30 > /dev/null 2>&1 & echo $! > {pidfile}; wait", shell=True, timeout=0.5)
+    pid = int(pidfile.read_text())
+    deadline = time.monotonic() + 3
+    while not _gone(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _gone(pid)
+    assert len(usages) == 1 and usages[0].killed
+
+
+def test_usage_is_recorded_and_attached_to_task_outputs() -> None:
+    code = "b = bytearray(64 * 1024 * 1024); sum(range(2_000_000))"
+
+    @record_command_usage
+    def execute() -> SimpleNamespace:
+        run_capture([sys.executable, "-c", code])
+        run_capture([sys.executable, "-c", "raise SystemExit(2)"])
+        return SimpleNamespace(outputs={"tests_passed": True})
+
+    with collect_usage() as outer:
+        result = execute()
+    usage = result.outputs["command_usage"]
+    assert [u["returncode"] for u in usage] == [0, 2]
+    assert usage[0]["max_rss_kb"] > 60 * 1024
+    assert usage[0]["user_s"] + usage[0]["sys_s"] > 0 and usage[0]["wall_s"] > 0
+    assert usage[0]["killed"] is False and usage[0]["command"].endswith(code)
+    assert len(outer) == 2  # enclosing collectors see the same commands
+
+
+def test_usage_is_collected_from_thread_pool_workers() -> None:
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor
+
+    @record_command_usage
+    def execute() -> SimpleNamespace:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for code in ("0", "3"):
+                args = [sys.executable, "-c", f"raise SystemExit({code})"]
+                pool.submit(contextvars.copy_context().run, run_capture, args).result()
+        return SimpleNamespace(outputs={})
+
+    assert [u["returncode"] for u in execute().outputs["command_usage"]] == [0, 3]
@@ -0,0 +1,101 @@
+"""Tests for pluggable token counting, per-message memoization and calibration."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from trust5.core import token_counter as tc
+from trust5.core.llm import LLM, _model_circuits, _trim_messages_to_context, estimate_token_count
+
+
+class _CountingCounter:
+    """Counts one token per character and records every call."""
+
+    name = "counting"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def count_text(self, text: str) -> int:
+        self.calls += 1
+        return len(text)
+
+
+@pytest.fixture(autouse=True)
+def _reset_counter_state():
+    yield
+    tc.set_token_counter(None)
+    tc.reset_calibration()
+
+
+def test_bpe_approx_counts_code_denser_than_prose() -> None:
+    counter = tc.BPEApproxCounter()
+    prose = "the quick brown fox jumps over the lazy dog " * 10
+    code = '{"a": [1, 2], "b": {"c": null}}' * 10
+    # Prose: ~1 token per word.  JSON: punctuation-heavy, well above chars/4.
+    assert counter.count_text(prose) == 90
+    assert counter.count_text(code) > len(code) // 4
+
+
+def test_bpe_approx_splits_long_identifiers_and_numbers() -> None:
+    counter = tc.BPEApproxCounter()
+    assert counter.count_text("configuration") == 2
+    assert counter.count_text("1234567") == 3
+    assert counter.count_text("a\n    b") == 3
+
+
+def test_message_tokens_memoized_per_message_object() -> None:
+    counter = _CountingCounter()
+    tc.set_token_counter(counter)
+    msg = {"role": "user", "content": "hello"}
+    assert tc.message_tokens(msg) == 5
+    assert tc.message_tokens(msg) == 5
+    assert counter.calls == 1
+    # An equal but distinct dict is counted separately.
+    assert tc.message_tokens(dict(msg)) == 5
+    assert counter.calls == 2
+
+
+def test_message_tokens_include_tool_call_arguments() -> None:
+    tc.set_token_counter(_CountingCounter())
+    msg = {"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "Read", "arguments": '{"a":1}'}}]}
+    assert tc.message_tokens(msg) == len("Read") + len('{"a":1}')
+
+
+def test_calibration_scales_estimates() -> None:
+    tc.set_token_counter(_CountingCounter())
+    messages = [{"role": "user", "content": "x" * 1000}]
+    assert estimate_token_count(messages, "m") == 1000
+    tc.calibrate("m", 1000, 1500)
+    assert estimate_token_count(messages, "m") == 1500
+    # Other models are unaffected; tiny samples are ignored.
+    assert estimate_token_count(messages, "other") == 1000
+    tc.calibrate("m", 10, 1000)
+    assert tc.calibration_factor("m") == 1.5
+
+
+def test_trim_single_pass_uses_each_count_once() -> None:
+    counter = _CountingCounter()
+    tc.set_token_counter(counter)
+    messages = [{"role": "system", "content": "s" * 10}] + [
+        {"role": "user", "content": f"{i:03d}" * 10} for i in range(50)
+    ]
+    result = _trim_messages_to_context(messages, 10 + 30 * 5)
+    assert [m["content"][:3] for m in result[1:]] == ["045", "046", "047", "048", "049"]
+    assert counter.calls == len(messages)
+
+
+@patch("trust5.core.llm.emit")
+def test_chat_calibrates_from_reported_usage(mock_emit: MagicMock) -> None:
+    tc.set_token_counter(_CountingCounter())
+    llm = LLM(model="calib-model")
+    _model_circuits.pop("calib-model", None)
+    reply = {"message": {"role": "assistant", "content": "ok"}, "usage": {"input_tokens": 600}}
+    try:
+        with patch.object(llm, "_do_chat", return_value=reply):
+            llm.chat([{"role": "user", "content": "y" * 300}])
+        assert tc.calibration_factor("calib-model") == pytest.approx(2.0)
+    finally:
+        _model_circuits.pop("calib-model", None)
@@ -0,0 +1,112 @@
+"""Tests for the session-scoped read-only tool result cache."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from trust5.core.agent import Agent
+from trust5.core.tool_cache import ToolResultCache, note_file_changed
+from trust5.core.tools import Tools
+
+
+def _counting(result: str = "content") -> tuple[list[int], Any]:
+    calls: list[int] = []
+
+    def run() -> str:
+        calls.append(1)
+        return result
+
+    return calls, run
+
+
+def test_repeated_read_hits_until_file_changes(tmp_path: Path) -> None:
+    f = tmp_path / "a.py"
+    f.write_text("x = 1\n")
+    cache = ToolResultCache()
+    calls, run = _counting()
+
+    cache.turn = 2
+    assert cache.files("Read", ("a",), [str(f)], run) == "content"
+    cache.turn = 5
+    hit = cache.files("Read", ("a",), [str(f)], run)
+    assert "unchanged since turn 2" in hit
+    assert len(calls) == 1 and cache.hits == 1
+
+    f.write_text("x = 22\n")  # size changes
+    assert cache.files("Read", ("a",), [str(f)], run) == "content"
+    note_file_changed(str(f))  # same stat, but an FCHG for the path
+    assert cache.files("Read", ("a",), [str(f)], run) == "content"
+    assert len(calls) == 3
+
+
+def test_tree_results_invalidated_by_any_change(tmp_path: Path) -> None:
+    cache = ToolResultCache()
+    calls, run = _counting("Stdout:\nmatch\n")
+    cache.tree("Grep", ("p",), str(tmp_path), run)
+    cache.tree("Grep", ("p",), str(tmp_path), run)
+    assert len(calls) == 1
+    note_file_changed()  # e.g. after a Bash command
+    cache.tree("Grep", ("p",), str(tmp_path), run)
+    assert len(calls) == 2
+
+
+def test_missing_files_errors_and_forgotten_turns_are_not_served(tmp_path: Path) -> None:
+    cache = ToolResultCache()
+    calls, run = _counting()
+    cache.files("Read", ("m",), [str(tmp_path / "missing")], run)
+    cache.files("Read", ("m",), [str(tmp_path / "missing")], run)
+    assert len(calls) == 2
+
+    err_calls, err = _counting("Error reading file")
+    (tmp_path / "f").write_text("x")
+    cache.files("Read", ("f",), [str(tmp_path / "f")], err)
+    cache.files("Read", ("f",), [str(tmp_path / "f")], err)
+    assert len(err_calls) == 2
+
+    cache.turn = 1
+    cache.files("Read", ("g",), [str(tmp_path / "f")], run)
+    cache.forget_before(2)
+    assert cache.files("Read", ("g",), [str(tmp_path / "f")], run) == "content"
+
+
+@patch("trust5.core.tools.emit_block")
+@patch("trust5.core.tools.emit")
+def test_write_file_invalidates_cached_read(_emit: MagicMock, _block: MagicMock, tmp_path: Path) -> None:
+    f = tmp_path / "m.py"
+    f.write_text("a")
+    tools = Tools()
+    cache = tools.result_cache
+
+    def read() -> str:
+        return Tools.read_file(str(f))
+
+    cache.files("Read", ("m",), [str(f)], read)
+    st = os.stat(f)
+    tools.write_file(str(f), "b")
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns))  # same size and mtime as before
+    assert cache.files("Read", ("m",), [str(f)], read) == "b"
+
+
+@patch("trust5.core.agent.emit_block")
+@patch("trust5.core.agent.emit")
+def test_agent_returns_short_note_for_repeated_read(_emit: MagicMock, _block: MagicMock, tmp_path: Path) -> None:
+    f = tmp_path / "big.py"
+    f.write_text("line\n" * 200)
+
+    def read_call(call_id: str) -> dict[str, Any]:
+        tc = {"id": call_id, "function": {"name": "Read", "arguments": json.dumps({"file_path": str(f)})}}
+        return {"message": {"role": "assistant", "content": "", "tool_calls": [tc]}}
+
+    llm = MagicMock()
+    llm.model = "m"
+    llm.chat.side_effect = [read_call("r1"), read_call("r2"), {"message": {"role": "assistant", "content": "ok"}}]
+    agent = Agent(name="a", prompt="sys", llm=llm, allowed_tools=["Read"])
+    agent.run("go")
+
+    tool_msgs = [m for m in llm.chat.call_args_list[-1][0][0] if m.get("role") == "tool"]
+    assert tool_msgs[0]["content"] == "line\n" * 200
+    assert tool_msgs[1]["content"].startswith("[Read result unchanged since turn 1")
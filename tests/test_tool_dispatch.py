@@ -0,0 +1,65 @@
+"""Tests for concurrent dispatch of read-only tool calls."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from trust5.core.agent import Agent
+from trust5.core.tool_dispatch import READ_ONLY_TOOLS, plan_batches, run_tool_calls
+
+
+def _call(name: str, tag: str) -> dict[str, Any]:
+    return {"id": tag, "function": {"name": name, "arguments": "{}"}}
+
+
+def _is_ro(name: str) -> bool:
+    return name in READ_ONLY_TOOLS
+
+
+def test_write_calls_split_batches() -> None:
+    calls = [_call(n, str(i)) for i, n in enumerate(["Read", "Grep", "Edit", "Glob", "Read", "Bash", "Bash"])]
+    assert plan_batches(calls, _is_ro) == [[0, 1], [2], [3, 4], [5], [6]]
+
+
+def test_reads_run_concurrently_and_results_keep_call_order() -> None:
+    barrier = threading.Barrier(3, timeout=5)
+    log: list[str] = []
+
+    def execute(tc: dict[str, Any]) -> str:
+        name = tc["function"]["name"]
+        if name == "Read" and tc["id"] != "4":
+            barrier.wait()  # all three reads must be in flight together
+            time.sleep(0.01 * (3 - int(tc["id"])))  # finish in reverse order
+        log.append(tc["id"])
+        return f"{name}:{tc['id']}"
+
+    calls = [_call("Read", "0"), _call("Read", "1"), _call("Read", "2"), _call("Write", "3"), _call("Read", "4")]
+    results = run_tool_calls(calls, execute, _is_ro, max_workers=4)
+
+    assert results == ["Read:0", "Read:1", "Read:2", "Write:3", "Read:4"]
+    assert log[3:] == ["3", "4"]  # the write waits for the reads, the later read for the write
+
+
+def test_single_worker_is_sequential() -> None:
+    seen: list[str] = []
+    calls = [_call("Read", str(i)) for i in range(4)]
+    run_tool_calls(calls, lambda tc: seen.append(tc["id"]) or "", _is_ro, max_workers=1)
+    assert seen == ["0", "1", "2", "3"]
+
+
+@patch("trust5.core.agent.emit_block")
+@patch("trust5.core.agent.emit")
+def test_agent_treats_read_only_mcp_tools_as_concurrent(_emit: MagicMock, _block: MagicMock) -> None:
+    client = MagicMock()
+    client.list_tools.return_value = [
+        {"name": "search_docs", "annotations": {"readOnlyHint": True}},
+        {"name": "deploy", "annotations": {"readOnlyHint": False}},
+    ]
+    agent = Agent(name="a", prompt="sys", llm=MagicMock(), mcp_clients=[client])
+    assert agent._is_read_only("search_docs")
+    assert agent._is_read_only("Grep")
+    assert not agent._is_read_only("deploy")
+    assert not agent._is_read_only("Bash")
@@ -6,13 +6,13 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from trust5.core.project_index import matches_test_pattern
 from trust5.core.tools import (
     _BLOCKED_COMMAND_PATTERNS,
     _VALID_PACKAGE_RE,
     Tools,
     _is_project_scoped_rm,
     _is_trust5_internal_path,
-    _matches_test_pattern,
 )
 
 # ---------------------------------------------------------------------------
@@ -91,7 +91,7 @@ def test_run_bash_blocks_wget_pipe_sh(tools: Tools):
 
 
 @patch("trust5.core.tools.os.path.isdir", return_value=False)
-@patch("trust5.core.tools.subprocess.run")
+@patch("trust5.core.tools.run_capture")
 def test_run_bash_allows_safe_commands(mock_run: MagicMock, mock_isdir: MagicMock, tools: Tools):
     """Normal commands such as ls, echo, pytest must NOT be blocked."""
     """Normal commands such as ls, echo, pytest must NOT be blocked."""
@@ -105,7 +105,7 @@ def test_run_bash_allows_safe_commands(mock_run: MagicMock, mock_isdir: MagicMoc
     assert mock_run.call_count == len(safe_commands)
 
 
-@patch("trust5.core.tools.subprocess.run")
+@patch("trust5.core.tools.run_capture")
 def test_run_bash_passes_shell_true(mock_run: MagicMock, tools: Tools):
     """run_bash uses shell=True so the full command string is interpreted by the shell."""
     mock_run.return_value = MagicMock(stdout="", stderr="", returncode=0)
@@ -115,7 +115,7 @@ def test_run_bash_passes_shell_true(mock_run: MagicMock, tools: Tools):
     assert kwargs["shell"] is True
 
 
-@patch("trust5.core.tools.subprocess.run")
+@patch("trust5.core.tools.run_capture")
 def test_run_bash_timeout_returns_error(mock_run: MagicMock, tools: Tools):
     """When subprocess times out, a friendly error is returned."""
     import subprocess as sp
@@ -126,31 +126,19 @@ def test_run_bash_timeout_returns_error(mock_run: MagicMock, tools: Tools):
 
 
 # ---------------------------------------------------------------------------
-# grep_files — safe argument passing (shell=False)
+# grep_files — in-process search, no subprocess or shell
 # ---------------------------------------------------------------------------
 
 
-@patch("trust5.core.tools.subprocess.run")
-def test_grep_files_no_shell_injection(mock_run: MagicMock):
-    """grep_files must call subprocess.run with a list (shell=False) to prevent injection."""
-    mock_run.return_value = MagicMock(stdout="match\n", stderr="", returncode=0)
+@patch("trust5.core.tools.run_capture")
+def test_grep_files_no_shell_injection(mock_run: MagicMock, tmp_path):
+    """grep_files searches in-process: shell metacharacters are just pattern text."""
+    (tmp_path / "a.py").write_text("x = 1; rm -rf /\n")
 
-    Tools.grep_files("some_pattern", path="/src", include="*.py")
+    result = Tools.grep_files("; rm -rf /", path=str(tmp_path), include="*.py")
 
-    mock_run.assert_called_once()
-    args, kwargs = mock_run.call_args
-
-    # First positional arg should be a list, not a string
-    cmd_arg = args[0]
-    assert isinstance(cmd_arg, list), "grep_files should pass a list to subprocess.run, not a string"
-    assert cmd_arg[0] == "grep"
-    assert "-r" in cmd_arg
-    assert "some_pattern" in cmd_arg
-    assert "/src" in cmd_arg
-    assert "--include=*.py" in cmd_arg
-
-    # shell should NOT be True (it defaults to False if not passed, but verify it is not True)
-    assert kwargs.get("shell") is not True
+    mock_run.assert_not_called()
+    assert f"{tmp_path / 'a.py'}:1:x = 1; rm -rf /" in result
 
 
 # ---------------------------------------------------------------------------
@@ -516,7 +504,7 @@ def test_project_scoped_rm_multiple_targets_one_outside(tmp_path):
     assert _is_project_scoped_rm("rm -rf a /etc/bad", str(tmp_path)) is False
 
 
-@patch("trust5.core.tools.subprocess.run")
+@patch("trust5.core.tools.run_capture")
 def test_run_bash_allows_project_scoped_rm(mock_run: MagicMock, tmp_path):
     """Integration: run_bash should allow rm -rf within the project directory."""
     mock_run.return_value = MagicMock(stdout="", stderr="", returncode=0)
@@ -712,7 +700,7 @@ def test_list_files_returns_matches(tmp_path):
 
 
 # ---------------------------------------------------------------------------
-# _matches_test_pattern — regex patterns for test file detection
+# matches_test_pattern — regex patterns for test file detection
 # ---------------------------------------------------------------------------
 
 
@@ -731,7 +719,7 @@ def test_list_files_returns_matches(tmp_path):
     ],
 )
 def test_matches_test_pattern_positive(path: str):
-    assert _matches_test_pattern(path), f"Expected {path!r} to match test pattern"
+    assert matches_test_pattern(path), f"Expected {path!r} to match test pattern"
 
 
 @pytest.mark.parametrize(
@@ -746,7 +734,7 @@ def test_matches_test_pattern_positive(path: str):
     ],
 )
 def test_matches_test_pattern_negative(path: str):
-    assert not _matches_test_pattern(path), f"Expected {path!r} to NOT match test pattern"
+    assert not matches_test_pattern(path), f"Expected {path!r} to NOT match test pattern"
 
 
 # ---------------------------------------------------------------------------
@@ -755,23 +743,23 @@ def test_matches_test_pattern_negative(path: str):
 
 
 def test_matches_conftest():
-    assert _matches_test_pattern("conftest.py")
-    assert _matches_test_pattern("tests/conftest.py")
-    assert _matches_test_pattern("src/conftest.py")
+    assert matches_test_pattern("conftest.py")
+    assert matches_test_pattern("tests/conftest.py")
+    assert matches_test_pattern("src/conftest.py")
 
 
 def test_matches_junit_pattern():
-    assert _matches_test_pattern("TestUserService.java")
-    assert _matches_test_pattern("src/test/TestFoo.java")
+    assert matches_test_pattern("TestUserService.java")
+    assert matches_test_pattern("src/test/TestFoo.java")
     # Not a JUnit test (lowercase)
-    assert not _matches_test_pattern("testutil.java")
+    assert not matches_test_pattern("testutil.java")
 
 
 def test_matches_jest_and_nested_test_dir():
-    assert _matches_test_pattern("src/__tests__/App.test.tsx")
-    assert _matches_test_pattern("utils.test.ts")
-    assert _matches_test_pattern("api.test.js")
-    assert _matches_test_pattern("test/integration/foo.go")
+    assert matches_test_pattern("src/__tests__/App.test.tsx")
+    assert matches_test_pattern("utils.test.ts")
+    assert matches_test_pattern("api.test.js")
+    assert matches_test_pattern("test/integration/foo.go")
 
 
 # ---------------------------------------------------------------------------
@@ -41,7 +41,7 @@ def make_stage(context: dict | None = None) -> MagicMock:
 
 
 def _subprocess_ok(*args, **kwargs):
-    """subprocess.run mock returning success for all commands."""
+    """run_capture mock returning success for all commands."""
     cmd = args[0] if args else kwargs.get("args", [])
     cmd_str = " ".join(cmd)
     result = MagicMock()
@@ -55,7 +55,7 @@ def _subprocess_ok(*args, **kwargs):
 
 
 def _subprocess_syntax_fail(*args, **kwargs):
-    """subprocess.run mock returning syntax failure on first call, then OK."""
+    """run_capture mock returning syntax failure on first call, then OK."""
     cmd = args[0] if args else kwargs.get("args", [])
     cmd_str = " ".join(cmd)
     if "compileall" in cmd_str:
@@ -73,7 +73,7 @@ def _subprocess_syntax_fail(*args, **kwargs):
 
 
 def _subprocess_test_fail(*args, **kwargs):
-    """subprocess.run mock: syntax OK, lint OK, tests fail."""
+    """run_capture mock: syntax OK, lint OK, tests fail."""
     cmd = args[0] if args else kwargs.get("args", [])
     cmd_str = " ".join(cmd)
     if "compileall" in cmd_str:
@@ -97,7 +97,7 @@ def _subprocess_test_fail(*args, **kwargs):
 
 
 def _subprocess_lint_fail(*args, **kwargs):
-    """subprocess.run mock: syntax OK, lint FAILS."""
+    """run_capture mock: syntax OK, lint FAILS."""
     cmd = args[0] if args else kwargs.get("args", [])
     cmd_str = " ".join(cmd)
     if "compileall" in cmd_str:
@@ -122,7 +122,7 @@ def _subprocess_lint_fail(*args, **kwargs):
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 def test_validate_all_pass(mock_run, mock_emit_block, mock_emit):
     """When syntax and tests both pass, return TaskResult.success with tests_passed=True."""
     task = ValidateTask()
@@ -137,7 +137,7 @@ def test_validate_all_pass(mock_run, mock_emit_block, mock_emit):
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_syntax_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_syntax_fail)
 def test_validate_syntax_failure_jumps_to_repair(mock_run, mock_emit_block, mock_emit):
     """When syntax check fails, jump_to('repair') with failure_type='syntax'."""
     task = ValidateTask()
@@ -153,7 +153,7 @@ def test_validate_syntax_failure_jumps_to_repair(mock_run, mock_emit_block, mock
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_validate_test_failure_jumps_to_repair(mock_run, mock_emit_block, mock_emit):
     """When tests fail, jump_to('repair') with failure_type='test'."""
     task = ValidateTask()
@@ -169,7 +169,7 @@ def test_validate_test_failure_jumps_to_repair(mock_run, mock_emit_block, mock_e
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_validate_max_attempts_reimplements(mock_run, mock_emit_block, mock_emit):
     """At max repair attempts, jump_to('implement') for reimplementation."""
     task = ValidateTask()
@@ -191,7 +191,7 @@ def test_validate_max_attempts_reimplements(mock_run, mock_emit_block, mock_emit
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_validate_all_reimplementations_exhausted(mock_run, mock_emit_block, mock_emit):
     """When all reimplementation attempts exhausted, return FAILED_CONTINUE (not TERMINAL).
 
@@ -220,7 +220,7 @@ def test_validate_all_reimplementations_exhausted(mock_run, mock_emit_block, moc
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_lint_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_lint_fail)
 def test_validate_lint_failure_jumps_to_repair(mock_run, mock_emit_block, mock_emit):
     """When lint check fails, jump_to('repair') with failure_type='lint'."""
     task = ValidateTask()
@@ -237,7 +237,7 @@ def test_validate_lint_failure_jumps_to_repair(mock_run, mock_emit_block, mock_e
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 def test_validate_lint_pass_proceeds_to_tests(mock_run, mock_emit_block, mock_emit):
     """When lint passes, proceed to test execution."""
     task = ValidateTask()
@@ -256,7 +256,7 @@ def test_check_lint_returns_none_when_no_commands():
     assert result is None
 
 
-@patch("trust5.tasks.validate_task.subprocess.run")
+@patch("trust5.tasks.validate_task.run_capture")
 def test_check_lint_returns_errors_on_failure(mock_run):
     """_check_lint returns combined error output when commands fail."""
     mock_run.return_value = MagicMock(
@@ -272,14 +272,14 @@ def test_check_lint_returns_errors_on_failure(mock_run):
     assert "Lint check failed" in result
 
 
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=FileNotFoundError)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=FileNotFoundError)
 def test_check_lint_skips_missing_tool(mock_run):
     """_check_lint silently skips commands whose tool is not installed."""
     result = ValidateTask._check_lint("/tmp/proj", [("ruff", "check", ".")])
     assert result is None
 
 
-@patch("trust5.tasks.validate_task.subprocess.run")
+@patch("trust5.tasks.validate_task.run_capture")
 def test_check_lint_returns_none_on_all_pass(mock_run):
     """_check_lint returns None when all lint commands pass."""
     mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
@@ -293,7 +293,7 @@ def test_check_lint_returns_none_on_all_pass(mock_run):
     assert mock_run.call_count == 2
 
 
-@patch("trust5.tasks.validate_task.subprocess.run")
+@patch("trust5.tasks.validate_task.run_capture")
 def test_check_lint_combines_multiple_failures(mock_run):
     """_check_lint combines errors from multiple failing commands."""
     mock_run.return_value = MagicMock(
@@ -312,7 +312,7 @@ def test_check_lint_combines_multiple_failures(mock_run):
     assert "mypy" in result
 
 
-@patch("trust5.tasks.validate_task.subprocess.run")
+@patch("trust5.tasks.validate_task.run_capture")
 def test_check_lint_skips_module_not_found(mock_run):
     """_check_lint treats 'No module named X' as tool-not-installed, not lint error.
 
@@ -332,7 +332,7 @@ def test_check_lint_skips_module_not_found(mock_run):
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 def test_validate_no_lint_commands_skips_lint(mock_run, mock_emit_block, mock_emit):
     """When profile has no lint_check_commands, lint step is skipped."""
     task = ValidateTask()
@@ -378,7 +378,7 @@ def test_count_tests_empty_output():
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 @patch("trust5.tasks.validate_task.propagate_context")
 def test_propagate_context_used(mock_propagate, mock_run, mock_emit_block, mock_emit):
     """Verify propagate_context is called during failure handling (not manual copy).
@@ -399,7 +399,7 @@ def test_propagate_context_used(mock_propagate, mock_run, mock_emit_block, mock_
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 def test_validate_uses_plan_test_command(mock_run, mock_emit_block, mock_emit):
     """When plan_config has a test_command, it is used instead of defaults."""
     task = ValidateTask()
@@ -412,7 +412,7 @@ def test_validate_uses_plan_test_command(mock_run, mock_emit_block, mock_emit):
 
     task.execute(stage)
 
-    # Check that subprocess.run was called with the plan test command
+    # Check that run_capture was called with the plan test command
     calls = mock_run.call_args_list
     found_plan_cmd = any("--cov" in " ".join(str(a) for a in call.args[0]) for call in calls if call.args)
     assert found_plan_cmd, f"Expected plan_config test_command in subprocess calls: {calls}"
@@ -420,7 +420,7 @@ def test_validate_uses_plan_test_command(mock_run, mock_emit_block, mock_emit):
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 def test_validate_uses_plan_lint_command(mock_run, mock_emit_block, mock_emit):
     """When plan_config has a lint_command, it is used instead of profile defaults.
 
@@ -437,7 +437,7 @@ def test_validate_uses_plan_lint_command(mock_run, mock_emit_block, mock_emit):
 
     task.execute(stage)
 
-    # Check that subprocess.run was called with the plan lint command (wrapped in sh -c)
+    # Check that run_capture was called with the plan lint command (wrapped in sh -c)
     calls = mock_run.call_args_list
     found_lint_cmd = any("ruff check" in str(call.args[0]) for call in calls if call.args)
     assert found_lint_cmd, f"Expected plan_config lint_command in subprocess calls: {calls}"
@@ -494,7 +494,7 @@ def test_discover_test_files_respects_extensions(tmp_path):
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 @patch("trust5.tasks.validate_task._discover_test_files", return_value=["test_foo.py", "test_bar.py"])
 def test_validate_auto_detects_test_files(mock_discover, mock_run, mock_emit_block, mock_emit):
     """In serial pipeline (no test_files in context), auto-detect and inject them."""
@@ -512,7 +512,7 @@ def test_validate_auto_detects_test_files(mock_discover, mock_run, mock_emit_blo
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 @patch("trust5.tasks.validate_task._discover_test_files")
 def test_validate_skips_detection_when_test_files_present(mock_discover, mock_run, mock_emit_block, mock_emit):
     """When test_files already in context (parallel pipeline), skip discovery."""
@@ -534,7 +534,7 @@ def test_validate_skips_detection_when_test_files_present(mock_discover, mock_ru
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_test_files_propagated_to_repair_jump(mock_run, mock_emit_block, mock_emit):
     """test_files from context are carried into the repair jump context."""
     task = ValidateTask()
@@ -556,7 +556,7 @@ def test_test_files_propagated_to_repair_jump(mock_run, mock_emit_block, mock_em
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_test_files_propagated_to_reimpl_jump(mock_run, mock_emit_block, mock_emit):
     """test_files are carried to the reimplementation jump context."""
     task = ValidateTask()
@@ -581,7 +581,7 @@ def test_test_files_propagated_to_reimpl_jump(mock_run, mock_emit_block, mock_em
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_vfal_includes_module_name(mock_run, mock_emit_block, mock_emit):
     """VFAL emission includes [module_name] when present in context."""
     task = ValidateTask()
@@ -660,16 +660,16 @@ def test_build_test_env_tries_roots_in_order(tmp_path):
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 @patch("trust5.tasks.validate_task._build_test_env", return_value={"PYTHONPATH": "/tmp/proj/src"})
 def test_validate_passes_env_to_subprocess(mock_build_env, mock_run, mock_emit_block, mock_emit):
-    """ValidateTask passes the env dict from _build_test_env to subprocess.run."""
+    """ValidateTask passes the env dict from _build_test_env to run_capture."""
     task = ValidateTask()
     stage = make_stage({"project_root": "/tmp/proj"})
 
     task.execute(stage)
 
-    # subprocess.run should have been called with env kwarg
+    # run_capture should have been called with env kwarg
     for call in mock_run.call_args_list:
         assert call.kwargs.get("env") == {"PYTHONPATH": "/tmp/proj/src"}
 
@@ -679,7 +679,7 @@ def test_validate_passes_env_to_subprocess(mock_build_env, mock_run, mock_emit_b
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_max_jumps_propagated_to_repair_jump(mock_run, mock_emit_block, mock_emit):
     """_max_jumps and _jump_count survive propagation into the repair jump context."""
     task = ValidateTask()
@@ -703,7 +703,7 @@ def test_max_jumps_propagated_to_repair_jump(mock_run, mock_emit_block, mock_emi
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_max_jumps_propagated_to_reimpl_jump(mock_run, mock_emit_block, mock_emit):
     """_max_jumps and _jump_count survive propagation into the reimplementation jump context."""
     task = ValidateTask()
@@ -728,7 +728,7 @@ def test_max_jumps_propagated_to_reimpl_jump(mock_run, mock_emit_block, mock_emi
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_repair_attempt_incremented_in_repair_jump(mock_run, mock_emit_block, mock_emit):
     """repair_attempt must be incremented (not overwritten by propagate_context).
 
@@ -755,7 +755,7 @@ def test_repair_attempt_incremented_in_repair_jump(mock_run, mock_emit_block, mo
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_test_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_test_fail)
 def test_reimpl_resets_repair_attempt_to_zero(mock_run, mock_emit_block, mock_emit):
     """When reimplementing, repair_attempt must be reset to 0, not stale value.
 
@@ -883,7 +883,7 @@ def test_derive_module_test_files_suffix_pattern():
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 @patch(
     "trust5.tasks.validate_task._discover_test_files",
     return_value=["tests/test_engine.py", "tests/test_distributions.py"],
@@ -998,7 +998,7 @@ def test_parse_command_env_var_prefix_multiple():
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 @patch("trust5.tasks.validate_task.detect_language", return_value="python")
 def test_validate_redetects_unknown_language(mock_detect, mock_run, mock_emit_block, mock_emit):
     """When language_profile says 'unknown' but detect_language finds python, update profile."""
@@ -1093,7 +1093,7 @@ def test_filter_test_file_lint_owned_files_all_unowned():
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run")
+@patch("trust5.tasks.validate_task.run_capture")
 @patch("trust5.tasks.validate_task.detect_language", return_value="python")
 def test_check_lint_filters_test_file_errors(mock_detect, mock_run, mock_emit_block, mock_emit):
     """_check_lint returns None when all lint errors are in test files."""
@@ -1224,7 +1224,7 @@ def test_filter_lint_file_not_found_owned():
 
 
 def _subprocess_scoped_lint(*args, **kwargs):
-    """subprocess.run mock that checks the lint command was scoped."""
+    """run_capture mock that checks the lint command was scoped."""
     cmd = args[0] if args else kwargs.get("args", [])
     cmd_str = " ".join(cmd)
     result = MagicMock()
@@ -1240,7 +1240,7 @@ def _subprocess_scoped_lint(*args, **kwargs):
 @patch("trust5.tasks.validate_task.detect_language", return_value="python")
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_scoped_lint)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_scoped_lint)
 def test_validate_scopes_lint_command_in_parallel_pipeline(mock_run, mock_emit_block, mock_emit, mock_detect):
     """When plan lint command uses syntax-only tool (py_compile), fall back to profile lint (ruff)."""
     task = ValidateTask()
@@ -1276,7 +1276,7 @@ def test_validate_scopes_lint_command_in_parallel_pipeline(mock_run, mock_emit_b
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 def test_validate_scopes_real_lint_command_in_parallel_pipeline(mock_run, mock_emit_block, mock_emit):
     """Non-syntax-only plan lint commands (ruff, flake8) are still scoped to owned_files."""
     task = ValidateTask()
@@ -1449,7 +1449,7 @@ def test_filter_lint_cant_open_file_serial():
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_ok)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_ok)
 def test_validate_strips_nonexistent_files_in_serial_pipeline(
     mock_run,
     mock_emit_block,
@@ -1581,7 +1581,7 @@ def test_validate_scopes_test_command_in_parallel_pipeline(tmp_path):
     }
     stage.outputs = {}
 
-    with patch("trust5.tasks.validate_task.subprocess.run") as mock_run:
+    with patch("trust5.tasks.validate_task.run_capture") as mock_run:
         mock_run.return_value = MagicMock(returncode=0, stdout="1 passed", stderr="")
         task = ValidateTask()
         task.execute(stage)
@@ -1632,7 +1632,7 @@ def test_validate_auto_derives_test_files_when_planned_missing(tmp_path):
     }
     stage.outputs = {}
 
-    with patch("trust5.tasks.validate_task.subprocess.run") as mock_run:
+    with patch("trust5.tasks.validate_task.run_capture") as mock_run:
         mock_run.return_value = MagicMock(returncode=0, stdout="1 passed", stderr="")
         task = ValidateTask()
         task.execute(stage)
@@ -1706,7 +1706,7 @@ def test_detect_cross_module_failure_attributeerror_without_has_no():
 
 
 def _subprocess_cross_module_fail(*args, **kwargs):
-    """subprocess.run mock: syntax/lint OK, tests fail with cross-module TypeError."""
+    """run_capture mock: syntax/lint OK, tests fail with cross-module TypeError."""
     cmd = args[0] if args else kwargs.get("args", [])
     cmd_str = " ".join(cmd)
     if "compileall" in cmd_str:
@@ -1735,7 +1735,7 @@ def _subprocess_cross_module_fail(*args, **kwargs):
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_cross_module_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_cross_module_fail)
 def test_cross_module_failure_bails_early(mock_run, mock_emit_block, mock_emit):
     """When cross-module interface mismatch detected in parallel pipeline with stagnant
     pass count, bail early with FAILED_CONTINUE + cross_module_stagnation=True."""
@@ -1759,7 +1759,7 @@ def test_cross_module_failure_bails_early(mock_run, mock_emit_block, mock_emit):
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_cross_module_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_cross_module_fail)
 def test_cross_module_failure_no_bail_on_first_attempts(mock_run, mock_emit_block, mock_emit):
     """Cross-module patterns on attempt 0 or 1 should NOT bail early — give repair a chance."""
     task = ValidateTask()
@@ -1781,7 +1781,7 @@ def test_cross_module_failure_no_bail_on_first_attempts(mock_run, mock_emit_bloc
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_cross_module_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_cross_module_fail)
 def test_cross_module_failure_no_bail_without_owned_files(mock_run, mock_emit_block, mock_emit):
     """Cross-module patterns in serial pipeline (no owned_files) should NOT bail early."""
     task = ValidateTask()
@@ -1803,7 +1803,7 @@ def test_cross_module_failure_no_bail_without_owned_files(mock_run, mock_emit_bl
 
 @patch("trust5.tasks.validate_task.emit")
 @patch("trust5.tasks.validate_task.emit_block")
-@patch("trust5.tasks.validate_task.subprocess.run", side_effect=_subprocess_cross_module_fail)
+@patch("trust5.tasks.validate_task.run_capture", side_effect=_subprocess_cross_module_fail)
 def test_cross_module_failure_no_bail_when_improving(mock_run, mock_emit_block, mock_emit):
     """Cross-module patterns with improving pass count should NOT bail — still making progress."""
     task = ValidateTask()
@@ -0,0 +1,85 @@
+"""Tests for Write/Edit durability modes and on-demand diff blocks."""
+
+from __future__ import annotations
+
+import difflib
+import os
+import stat
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from trust5.core import file_durability, line_diff
+from trust5.core.file_durability import sync_pending, write_text
+from trust5.core.tools import Tools
+
+
+@pytest.fixture(autouse=True)
+def _quiet():
+    with patch("trust5.core.tools.emit"), patch("trust5.core.tools.emit_block") as block:
+        yield block
+
+
+def test_fsync_mode_syncs_each_write(tmp_path: Path) -> None:
+    with patch.object(file_durability.os, "fsync") as fsync:
+        write_text(str(tmp_path / "a.txt"), "a")
+    assert fsync.call_count == 1
+    assert (tmp_path / "a.txt").read_text() == "a"
+
+
+def test_atomic_rename_keeps_mode_and_batches_fsync(tmp_path: Path) -> None:
+    target = tmp_path / "run.sh"
+    target.write_text("old")
+    target.chmod(0o755)
+    with (
+        patch.object(file_durability, "AGENT_WRITE_DURABILITY", "atomic-rename"),
+        patch.object(file_durability.os, "fsync") as fsync,
+    ):
+        write_text(str(target), "new")
+        write_text(str(tmp_path / "fresh.txt"), "x")
+        assert fsync.call_count == 0
+        assert sync_pending() == 2
+    assert fsync.call_count == 3  # two files and their directory
+    assert target.read_text() == "new"
+    assert stat.S_IMODE(target.stat().st_mode) == 0o755
+    assert sorted(os.listdir(tmp_path)) == ["fresh.txt", "run.sh"]  # no temp files left behind
+    assert sync_pending() == 0
+
+
+def test_none_mode_and_unknown_modes(tmp_path: Path) -> None:
+    with patch.object(file_durability.os, "fsync") as fsync:
+        with patch.object(file_durability, "AGENT_WRITE_DURABILITY", "none"):
+            write_text(str(tmp_path / "a.txt"), "a")
+        assert fsync.call_count == 0
+        with patch.object(file_durability, "AGENT_WRITE_DURABILITY", "paranoid"):
+            write_text(str(tmp_path / "a.txt"), "b")
+        assert fsync.call_count == 1  # falls back to fsync
+
+
+def test_diffs_are_skipped_without_consumers(tmp_path: Path, _quiet) -> None:
+    f = tmp_path / "m.py"
+    f.write_text("x = 1\n")
+    with (
+        patch("trust5.core.tools.has_block_consumers", return_value=False),
+        patch("trust5.core.tools.unified_diff") as diff,
+    ):
+        assert "Successfully" in Tools().write_file(str(f), "x = 2\n")
+        assert "Successfully" in Tools().edit_file(str(f), "x = 2", "x = 3")
+    diff.assert_not_called()
+    _quiet.assert_not_called()
+    assert f.read_text() == "x = 3\n"
+
+    Tools().edit_file(str(f), "x = 3", "x = 4")
+    assert _quiet.call_args[0][1] == f"EDIT {f}"
+
+
+def test_linear_diff_matches_difflib_for_one_change() -> None:
+    old = "\n".join(f"line {i}" for i in range(2000))
+    new = old.replace("line 1000\n", "changed\nadded\n")
+    expected = "\n".join(difflib.unified_diff(old.splitlines(), new.splitlines(), "a/f", "b/f", lineterm=""))
+    with patch.object(line_diff, "DIFF_LINEAR_THRESHOLD", 0):
+        assert line_diff.unified_diff(old, new, "a/f", "b/f") == expected
+        assert line_diff.unified_diff(old, old, "a/f", "b/f") == ""
+        capped = line_diff.unified_diff(old, "", "a/f", "b/f", max_lines=10)
+    assert capped.splitlines()[-1] == "... [1993 more lines]"
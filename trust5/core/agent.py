@@ -3,25 +3,43 @@ import logging
 import subprocess
 import threading
 import time
+from collections import deque
+from collections.abc import Callable
 from typing import Any
 
+from .agent_checkpoint import AgentCheckpoint
+from .bash_session import BashSession
 from .constants import (
+    AGENT_COMPACT_HISTORY,
     AGENT_IDLE_MAX_TURNS,
     AGENT_IDLE_WARN_TURNS,
     AGENT_MAX_EMPTY_RETRIES,
     AGENT_MAX_HISTORY_MESSAGES,
+    AGENT_MAX_HISTORY_TOKENS,
     AGENT_PER_TURN_TIMEOUT,
+    AGENT_PERSISTENT_SHELL,
+    AGENT_TOOL_CONCURRENCY,
+    AGENT_TOOL_RESULT_CACHE,
     AGENT_TOOL_RESULT_LIMIT,
 )
+from .conversation import ConversationBuffer
+from .file_durability import sync_pending
+from .history_compactor import HistoryCompactor
 from .llm import LLM, LLMError
+from .llm_encoder import ConversationEncoder
 from .mcp import MCPClient, MCPSSEClient
 from .message import M, emit, emit_block
+from .token_counter import calibration_factor
+from .tool_args import safe_int as _safe_int
+from .tool_args import summarize_args
+from .tool_dispatch import READ_ONLY_TOOLS, run_tool_calls
 from .tools import Tools
 
 logger = logging.getLogger(__name__)
 
 MAX_TOOL_RESULT_LENGTH = AGENT_TOOL_RESULT_LIMIT
 MAX_HISTORY_MESSAGES = AGENT_MAX_HISTORY_MESSAGES
+MAX_HISTORY_TOKENS = AGENT_MAX_HISTORY_TOKENS
 
 # Tools that modify the workspace — used by idle detection.
 _WRITE_TOOLS = frozenset({"Write", "Edit", "Bash"})
@@ -43,30 +61,6 @@ _TOOL_EMIT_CODE: dict[str, M] = {
 _MAX_EMPTY_RESPONSE_RETRIES = AGENT_MAX_EMPTY_RETRIES
 
 
-def _safe_int(value: object, default: int | None = None) -> int | None:
-    """Coerce an LLM tool argument to int, tolerating str/float/None.
-
-    LLMs frequently send ``"10"`` (string), ``10.0`` (float), or omit
-    optional parameters entirely.  This helper handles all cases without
-    crashing on unexpected types.
-    """
-    if value is None:
-        return default
-    if isinstance(value, int):
-        return value
-    if isinstance(value, float):
-        return int(value)
-    if isinstance(value, str):
-        try:
-            return int(value)
-        except ValueError:
-            try:
-                return int(float(value))
-            except (ValueError, OverflowError):
-                return default
-    return default
-
-
 def _truncate(text: str, max_len: int = MAX_TOOL_RESULT_LENGTH) -> str:
     if len(text) <= max_len:
         return text
@@ -97,13 +91,25 @@ class Agent:
         owned_files: list[str] | None = None,
         denied_files: list[str] | None = None,
         deny_test_patterns: bool = False,
+        checkpoint: AgentCheckpoint | None = None,
     ):
         self.name = name
         self.system_prompt = prompt
         self.llm = llm
         self.mcp_clients = mcp_clients or []
         self.non_interactive = non_interactive
-        self.history: list[dict[str, str]] = []
+        self.history = ConversationBuffer(MAX_HISTORY_MESSAGES, MAX_HISTORY_TOKENS)
+        self.compactor = HistoryCompactor(name, stage=llm.labels.get("stage", "")) if AGENT_COMPACT_HISTORY else None
+        # Session turn counter, and the turns whose tool results are still in history
+        self._turn = 0
+        self._tool_turns: deque[int] = deque()
+        # Per-turn persistence for resuming a re-run stage (None: disabled)
+        self.checkpoint = checkpoint
+        self._resumed_turns = 0
+        # Memoizes provider-format encoding of history across turns
+        self.encoder = ConversationEncoder()
+        # Long-lived shell for the Bash tool, started on first use (None: a subprocess per call)
+        self.shell = BashSession() if AGENT_PERSISTENT_SHELL else None
         self.tools = Tools(
             owned_files=owned_files,
             denied_files=denied_files,
@@ -113,11 +119,15 @@ class Agent:
             non_interactive=self.non_interactive,
             allowed_tools=allowed_tools,
         )
+        # MCP tools annotated readOnlyHint may run concurrently with built-in reads
+        self._mcp_read_only: set[str] = set()
 
         for client in self.mcp_clients:
             try:
                 mcp_tools = client.list_tools()
                 for tool in mcp_tools:
+                    if (tool.get("annotations") or {}).get("readOnlyHint"):
+                        self._mcp_read_only.add(tool["name"])
                     self.tool_definitions.append(
                         {
                             "type": "function",
@@ -142,9 +152,21 @@ class Agent:
         Returns:
             The LLM's final text response after all tool calls are resolved.
         """
+        if self.checkpoint is None or not self.checkpoint.resume(self, user_input):
+            self.history.append({"role": "user", "content": user_input})
+        try:
+            result = self._run_turns(user_input, max_turns, timeout_seconds)
+        finally:
+            sync_pending()  # batched fsync of "atomic-rename" writes at the end of the run
+            if self.shell is not None:
+                self.shell.close()  # restarted on the next run's first Bash call
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+        return result
+
+    def _run_turns(self, user_input: str, max_turns: int, timeout_seconds: float | None) -> str:
         deadline = (time.monotonic() + timeout_seconds) if timeout_seconds else None
-        self.history.append({"role": "user", "content": user_input})
-        messages = [{"role": "system", "content": self.system_prompt}] + self.history
+        system_msg = {"role": "system", "content": self.system_prompt}
 
         emit_block(
             M.CSYS,
@@ -172,7 +194,10 @@ class Agent:
         last_content = ""
         empty_response_retries = 0
         prev_msg_count = 0
-        for i in range(max_turns):
+        start_turn, self._resumed_turns = self._resumed_turns, 0
+        for i in range(start_turn, max_turns):
+            self._turn += 1
+            self.tools.result_cache.turn = self._turn
             if deadline is not None and time.monotonic() > deadline:
                 emit(
                     M.SWRN,
@@ -185,6 +210,7 @@ class Agent:
                 M.ATRN,
                 f"[{self.name}] Turn {i + 1}/{max_turns} (history={len(self.history)} msgs)",
             )
+            messages = self.history.messages(system_msg)
             # Only emit full context on first turn
             if i == 0:
                 self._emit_context(messages, prev_msg_count)
@@ -201,7 +227,7 @@ class Agent:
             watchdog.daemon = True
             watchdog.start()
             try:
-                response = self.llm.chat(messages, tools=self.tool_definitions)
+                response = self.llm.chat(messages, tools=self.tool_definitions, encoder=self.encoder)
             except LLMError as e:
                 emit(M.AERR, f"[{self.name}] LLM failed on turn {i + 1}: {e}")
                 if last_content:
@@ -218,7 +244,6 @@ class Agent:
                 last_content = content
 
             self.history.append(message)
-            messages.append(message)
 
             if not tool_calls:
                 if not content and empty_response_retries < _MAX_EMPTY_RESPONSE_RETRIES:
@@ -231,7 +256,6 @@ class Agent:
                     # Remove the empty assistant message so the LLM sees a
                     # clean conversation on the next attempt.
                     self.history.pop()
-                    messages.pop()
                     continue
                 if not content and last_content:
                     emit(
@@ -243,8 +267,8 @@ class Agent:
                 emit(M.ASUM, f"[{self.name}] Final response ({len(content)} chars)")
                 return content
 
-            for tc in tool_calls:
-                result = self._handle_tool_call(tc)
+            results = run_tool_calls(tool_calls, self._handle_tool_call, self._is_read_only, AGENT_TOOL_CONCURRENCY)
+            for tc, result in zip(tool_calls, results):
                 truncated = _truncate(str(result))
                 tool_name = tc.get("function", {}).get("name", "unknown")
                 tool_msg: dict[str, Any] = {
@@ -256,7 +280,7 @@ class Agent:
                     tool_msg["tool_call_id"] = tc["id"]
                 emit(M.CTLR, f"[{self.name}] {tool_name} result ({len(truncated)} chars)")
                 self.history.append(tool_msg)
-                messages.append(tool_msg)
+            self._tool_turns.append(self._turn)
 
             # Idle detection: did this turn make any write-tool calls?
             if has_write_tools and tool_calls:
@@ -277,12 +301,17 @@ class Agent:
                         )
                         break
 
-            self._trim_history_if_needed(messages)
+            self._trim_history_if_needed()
+            if self.checkpoint is not None:
+                self.checkpoint.save(self, i + 1)
 
         if last_content:
             return last_content
         return "Agent completed all turns without final response."
 
+    def _is_read_only(self, name: str) -> bool:
+        return name in READ_ONLY_TOOLS or name in self._mcp_read_only
+
     def _handle_tool_call(self, tool_call: dict[str, Any]) -> str:
         function = tool_call.get("function", {})
         name = function.get("name", "")
@@ -318,39 +347,7 @@ class Agent:
         emit(M.AERR, f"[{self.name}] Unknown tool: {name}")
         return f"Unknown tool: {name}"
 
-    @staticmethod
-    def _summarize_args(name: str, args: dict[str, Any]) -> str:
-        if name == "Bash":
-            cmd = str(args.get("command", ""))
-            return cmd[:200] if len(cmd) > 200 else cmd
-        if name == "Read":
-            path = str(args.get("file_path", ""))
-            offset = _safe_int(args.get("offset"))
-            limit = _safe_int(args.get("limit"))
-            if offset or limit:
-                o = offset or 1
-                lim = limit or 0
-                return f"{path} (lines {o}-{o + lim})"
-            return path
-        if name == "Write":
-            return str(args.get("file_path", ""))
-        if name == "ReadFiles":
-            paths = args.get("file_paths", [])
-            if len(paths) <= 3:
-                return ", ".join(str(p) for p in paths)
-            return f"{len(paths)} files"
-        if name == "Edit":
-            return str(args.get("file_path", ""))
-        if name == "Glob":
-            return str(args.get("pattern", ""))
-        if name == "Grep":
-            p = str(args.get("pattern", ""))
-            path = str(args.get("path", "."))
-            return f"{p!r} in {path}" if path and path != "." else repr(p)
-        if name == "InstallPackage":
-            return str(args.get("package_name", ""))
-        keys = list(args.keys())[:3]
-        return ", ".join(f"{k}=..." for k in keys) if keys else ""
+    _summarize_args = staticmethod(summarize_args)
 
     def _execute_tool(self, name: str, args: dict[str, Any]) -> str:
         dispatch = {
@@ -367,13 +364,16 @@ class Agent:
                 str(args.get("old_string", "")),
                 str(args.get("new_string", "")),
             ),
-            "Bash": lambda: self.tools.run_bash(str(args.get("command", "")), str(args.get("workdir", "."))),
+            "Bash": lambda: self.tools.run_bash(
+                str(args.get("command", "")), str(args.get("workdir", ".")), session=self.shell
+            ),
             "Glob": lambda: str(self.tools.list_files(str(args.get("pattern", "")), str(args.get("workdir", ".")))),
             "InstallPackage": lambda: self.tools.install_package(str(args.get("package_name", ""))),
             "Grep": lambda: self.tools.grep_files(
                 str(args.get("pattern", "")),
                 str(args.get("path", ".")),
                 str(args.get("include", "*")),
+                context=_safe_int(args.get("context"), 0) or 0,
             ),
             "AskUserQuestion": lambda: self._handle_ask_user(args),
         }
@@ -381,11 +381,24 @@ class Agent:
         if handler is None:
             raise ValueError(f"Unknown tool: {name}")
         try:
+            if AGENT_TOOL_RESULT_CACHE and name in READ_ONLY_TOOLS:
+                return self._cached_call(name, args, handler)
             return handler()
         except (OSError, subprocess.SubprocessError, ValueError, TypeError, json.JSONDecodeError) as e:
             emit(M.SERR, f"[{self.name}] Tool {name} error: {e}")
             return f"Tool {name} error: {e}"
 
+    def _cached_call(self, name: str, args: dict[str, Any], run: Callable[[], str]) -> str:
+        """Serve a repeated Read/ReadFiles/Glob/Grep from the session result cache."""
+        cache = self.tools.result_cache
+        key = tuple(sorted((k, str(v)) for k, v in args.items()))
+        if name == "Read":
+            return cache.files(name, key, [str(args.get("file_path", ""))], run)
+        if name == "ReadFiles":
+            return cache.files(name, key, [str(p) for p in args.get("file_paths", [])], run)
+        root = str(args.get("path" if name == "Grep" else "workdir", "."))
+        return cache.tree(name, key, root, run)
+
     def _handle_ask_user(self, args: dict[str, Any]) -> str:
         options = args.get("options", [])
         if isinstance(options, str):
@@ -435,16 +448,20 @@ class Agent:
                         max_lines=10,
                     )
 
-    def _trim_history_if_needed(self, messages: list[dict[str, Any]]) -> None:
-        if len(self.history) <= MAX_HISTORY_MESSAGES:
+    def _trim_history_if_needed(self) -> None:
+        before = len(self.history)
+        dropped = self.history.trim(calibration_factor(self.llm.model))
+        if not dropped:
             return
-        trim_count = len(self.history) - MAX_HISTORY_MESSAGES
+        # Cached "unchanged since turn N" replies must point at a turn still in history
+        for _ in range(sum(1 for m in dropped if m.get("tool_calls"))):
+            if self._tool_turns:
+                self._tool_turns.popleft()
+        self.tools.result_cache.forget_before(self._tool_turns[0] if self._tool_turns else self._turn + 1)
         emit(
             M.CTRM,
-            f"[{self.name}] Trimming {trim_count} messages (was {len(self.history)}, keeping {MAX_HISTORY_MESSAGES})",
+            f"[{self.name}] Trimmed {len(dropped)} messages (was {before}, "
+            f"now {len(self.history)}, ~{self.history.total_tokens} tokens)",
         )
-        self.history = self.history[trim_count:]
-        system_msg = messages[0]
-        messages.clear()
-        messages.append(system_msg)
-        messages.extend(self.history)
+        if self.compactor is not None:
+            self.history.set_memory(self.compactor.compact(dropped))
@@ -0,0 +1,178 @@
+"""Per-turn agent checkpoints in the ``.trust5`` SQLite database.
+
+When an implementer or repairer stage fails with a ``TransientError`` (or
+the process dies) Stabilize re-runs the task, and without a checkpoint the
+new ``Agent.run`` would repeat every LLM turn from scratch.  After each
+completed turn ``AgentCheckpoint.save`` stores the conversation buffer, the
+turn counters and a hash of every file the agent has written, keyed by
+stage id and task name.  A re-run with the same task input resumes from
+there; a run that finishes normally deletes its checkpoint.
+
+On resume, files whose content no longer matches the recorded hash are
+listed in the agent's working memory so it re-reads them instead of trusting
+what the restored history says about them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+from .constants import AGENT_CHECKPOINT_TURNS
+from .message import M, emit
+
+if TYPE_CHECKING:
+    from .agent import Agent
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_checkpoints (
+    stage_id TEXT NOT NULL,
+    task TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    turns INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (stage_id, task)
+)
+"""
+
+_WRITE_TOOLS = ("Write", "Edit")
+
+
+def _default_db_path() -> str:
+    return os.path.join(os.path.abspath(os.getcwd()), ".trust5", "trust5.db")
+
+
+def _fingerprint(agent_name: str, user_input: str) -> str:
+    return hashlib.sha256(f"{agent_name}\0{user_input}".encode()).hexdigest()
+
+
+def _file_hash(path: str) -> str | None:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _written_paths(messages: list[dict[str, Any]]) -> set[str]:
+    paths: set[str] = set()
+    for msg in messages:
+        for tc in msg.get("tool_calls") or []:
+            function = tc.get("function", {})
+            if function.get("name") not in _WRITE_TOOLS:
+                continue
+            args = function.get("arguments", {})
+            try:
+                parsed = json.loads(args) if isinstance(args, str) else args
+            except (json.JSONDecodeError, TypeError):
+                continue
+            if isinstance(parsed, dict) and parsed.get("file_path"):
+                paths.add(os.path.abspath(str(parsed["file_path"])))
+    return paths
+
+
+class AgentCheckpoint:
+    """Save and restore one agent conversation for a (stage id, task) pair."""
+
+    def __init__(self, stage_id: str, task: str, db_path: str | None = None):
+        self.stage_id = stage_id
+        self.task = task
+        self.db_path = db_path or _default_db_path()
+        self._files: dict[str, str | None] = {}
+        self._fingerprint = ""
+
+    @classmethod
+    def for_stage(cls, stage: Any, task: str) -> AgentCheckpoint | None:
+        """Checkpoint for a Stabilize stage, or None when disabled or the stage has no id."""
+        stage_id = getattr(stage, "id", None)
+        if not AGENT_CHECKPOINT_TURNS or not isinstance(stage_id, str) or not stage_id:
+            return None
+        return cls(stage_id, task)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:  # commits on success
+                conn.execute(_SCHEMA)
+                yield conn
+        finally:
+            conn.close()
+
+    def resume(self, agent: Agent, user_input: str) -> bool:
+        """Restore *agent* from a checkpoint of the same task input; False if there is none."""
+        self._fingerprint = _fingerprint(agent.name, user_input)
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT fingerprint, turns, state FROM agent_checkpoints WHERE stage_id = ? AND task = ?",
+                    (self.stage_id, self.task),
+                ).fetchone()
+        except (sqlite3.Error, OSError) as e:  # checkpointing is best effort
+            logger.warning("Failed to read agent checkpoint for %s/%s: %s", self.stage_id, self.task, e)
+            return False
+        if row is None or row[0] != self._fingerprint:
+            return False
+        try:
+            state: dict[str, Any] = json.loads(row[2])
+        except json.JSONDecodeError:
+            return False
+
+        agent.history.restore(state["history"])
+        agent._turn = int(state.get("turn", row[1]))
+        agent._tool_turns.extend(int(t) for t in state.get("tool_turns", []))
+        agent._resumed_turns = int(row[1])
+        self._files = dict(state.get("files", {}))
+        changed = sorted(p for p, digest in self._files.items() if _file_hash(p) != digest)
+        if changed:
+            note = "Files changed on disk since this point (re-read before editing): " + ", ".join(changed)
+            agent.history.set_memory(f"{agent.history.memory}\n\n{note}".strip())
+        emit(
+            M.SINF,
+            f"[{agent.name}] Resuming from checkpoint after turn {row[1]} "
+            f"({len(agent.history)} msgs, {len(changed)} changed file(s))",
+        )
+        return True
+
+    def save(self, agent: Agent, turns_done: int) -> None:
+        """Record *agent*'s state after its ``turns_done``-th turn of this run."""
+        for path in _written_paths(agent.history.as_list()):
+            self._files[path] = None
+        self._files = {p: _file_hash(p) for p in self._files}
+        state = {
+            "history": agent.history.snapshot(),
+            "turn": agent._turn,
+            "tool_turns": list(agent._tool_turns),
+            "files": self._files,
+        }
+        try:
+            payload = json.dumps(state, default=str)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO agent_checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.stage_id, self.task, self._fingerprint, turns_done, payload, time.time()),
+                )
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:  # checkpointing is best effort
+            logger.warning("Failed to save agent checkpoint for %s/%s: %s", self.stage_id, self.task, e)
+
+    def clear(self) -> None:
+        """Delete the checkpoint (the agent run completed)."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM agent_checkpoints WHERE stage_id = ? AND task = ?",
+                    (self.stage_id, self.task),
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Failed to clear agent checkpoint for %s/%s: %s", self.stage_id, self.task, e)
@@ -377,7 +377,7 @@ class AgentTask(Task):
 
         allowed_tools = _resolve_allowed_tools(agent_name)
 
-        llm = LLM.for_tier(model_tier, stage_name=agent_name)
+        llm = LLM.for_tier(model_tier, stage_name=agent_name, stage=module_name or stage.name)
 
         with mcp_clients() as mcp:
             agent = Agent(
@@ -0,0 +1,91 @@
+"""In-memory cache of provider access tokens.
+
+``LLM._post`` checks token freshness before every request.  Opening a
+``TokenStore`` reads the key file, initializes Fernet and decrypts the whole
+token file, so this cache keeps each provider's ``TokenData`` in memory and
+only goes back to the store when the token file's mtime changes (another
+process logged in or refreshed) or when the cached token is inside the
+refresh margin.
+
+``refresh_lock()`` hands out one lock per provider, shared by every ``LLM``
+instance, so parallel modules hitting the margin together trigger a single
+refresh call.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from .provider import TokenData
+from .token_store import token_file_path
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# provider -> (token, token-file mtime_ns when loaded)
+_entries: dict[str, tuple[TokenData, int | None]] = {}
+_refresh_locks: dict[str, threading.Lock] = {}
+
+
+def _file_mtime() -> int | None:
+    try:
+        return token_file_path().stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def near_expiry(token: TokenData, margin: float) -> bool:
+    """True when *token* expires within *margin* seconds (tokens without expiry never do)."""
+    if token.expires_at <= 0:
+        return False
+    return token.expires_at - time.time() <= margin
+
+
+def refresh_lock(provider_name: str) -> threading.Lock:
+    """Process-wide lock that single-flights refreshes for *provider_name*."""
+    with _lock:
+        lock = _refresh_locks.get(provider_name)
+        if lock is None:
+            lock = _refresh_locks[provider_name] = threading.Lock()
+        return lock
+
+
+def get_token(provider_name: str, margin: float) -> TokenData | None:
+    """Return the cached token, reloading from the store only when needed."""
+    mtime = _file_mtime()
+    with _lock:
+        entry = _entries.get(provider_name)
+    if entry is not None and entry[1] == mtime and not near_expiry(entry[0], margin):
+        return entry[0]
+    return _load(provider_name, mtime)
+
+
+def _load(provider_name: str, mtime: int | None) -> TokenData | None:
+    from .token_store import TokenStore
+
+    token = TokenStore().load(provider_name)
+    with _lock:
+        if token is None:
+            _entries.pop(provider_name, None)
+        else:
+            _entries[provider_name] = (token, mtime)
+    logger.debug("Token cache reloaded for %s", provider_name)
+    return token
+
+
+def put_token(provider_name: str, token: TokenData) -> None:
+    """Record a token that was just refreshed and saved to the store."""
+    mtime = _file_mtime()
+    with _lock:
+        _entries[provider_name] = (token, mtime)
+
+
+def invalidate(provider_name: str | None = None) -> None:
+    """Drop cached tokens for *provider_name* (or all providers)."""
+    with _lock:
+        if provider_name is None:
+            _entries.clear()
+        else:
+            _entries.pop(provider_name, None)
@@ -17,6 +17,11 @@ _KEY_FILE = "auth.key"
 _TOKEN_FILE = "tokens.enc"
 
 
+def token_file_path(base_dir: str | None = None) -> Path:
+    """Location of the encrypted token file, without opening the store."""
+    return (Path(base_dir) if base_dir else Path.home() / _TRUST5_DIR) / _TOKEN_FILE
+
+
 class TokenStore:
     """Encrypted credential store using Fernet symmetric encryption."""
 
@@ -106,7 +111,7 @@ class TokenStore:
         return meta.get("active_provider")
 
     def _token_path(self) -> Path:
-        return self._dir / _TOKEN_FILE
+        return token_file_path(str(self._dir))
 
     def _meta_path(self) -> Path:
         return self._dir / "auth_meta.json"
@@ -0,0 +1,285 @@
+"""Long-lived bash process backing an agent's ``Bash`` tool.
+
+Without a session every ``Bash`` call forks a fresh ``sh -c`` with a copy of
+``os.environ`` and re-detects the project virtualenv, and ``cd`` / ``export``
+are lost between calls.  With ``agent.persistent_shell`` enabled each agent
+gets one ``BashSession``: a ``bash --noprofile --norc`` started once (with
+the venv activated once, via ``bash_env``) that runs every command in turn.
+
+Framing: each command is sent as a quoted string and run with ``eval`` in
+the shell itself (so ``cd`` and ``export`` persist, and syntax errors only
+fail that command), with stdin from ``/dev/null``.  Afterwards the shell
+prints a per-session random sentinel and the exit status on stdout and the
+sentinel on stderr; reader threads collect both streams up to the sentinel.
+Each command's output goes through the same head + tail ``OutputBuffer`` as
+``run_capture`` (capped at ``SUBPROCESS_OUTPUT_LIMIT`` per stream); only a
+sentinel-sized window is held back unbuffered while looking for the end.
+
+A command that exceeds its timeout is killed without the shell: every
+process in the shell's process group except bash itself gets ``SIGKILL``
+(found through ``/proc``).  If the shell still does not answer (a builtin
+loop, or no ``/proc``) the session is killed and restarted on the next
+command, and the caller is told the shell state was lost.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import secrets
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from typing import IO
+
+from .constants import SUBPROCESS_OUTPUT_LIMIT
+from .subprocess_capture import OutputBuffer
+
+logger = logging.getLogger(__name__)
+
+_KILL_GRACE = 2.0
+
+
+class BashSessionError(RuntimeError):
+    """The shell could not start or died while running a command."""
+
+
+def bash_env(workdir: str) -> dict[str, str]:
+    """``os.environ`` with the project virtualenv under *workdir* activated, if there is one."""
+    env = os.environ.copy()
+    for venv_dir in (".venv", "venv"):
+        venv_bin = os.path.join(workdir, venv_dir, "bin")
+        if os.path.isdir(venv_bin):
+            env["PATH"] = f"{venv_bin}:{env.get('PATH', '')}"
+            env["VIRTUAL_ENV"] = os.path.join(os.path.abspath(workdir), venv_dir)
+            env.pop("PYTHONHOME", None)
+            logger.debug("Activated venv at %s for bash command", venv_bin)
+            break
+    return env
+
+
+def _group_members(pgid: int) -> list[int]:
+    """Pids in process group *pgid* (Linux ``/proc``; empty elsewhere)."""
+    pids: list[int] = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return pids
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="ascii", errors="replace") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if len(fields) > 2 and fields[2] == str(pgid):
+            pids.append(int(entry))
+    return pids
+
+
+class _StreamReader:
+    """Splits one pipe of the shell into per-command output at each sentinel line."""
+
+    def __init__(self, pipe: IO[bytes], name: str, marker: bytes):
+        self._fd = pipe.fileno()
+        self._marker = b"\n" + marker  # the shell prints a newline before the sentinel
+        self._limit = SUBPROCESS_OUTPUT_LIMIT
+        self._out = OutputBuffer(self._limit)
+        self._window = bytearray()  # bytes that may still be the start of the sentinel line
+        self._done: list[tuple[OutputBuffer, bytes]] = []
+        self._cond = threading.Condition()
+        self.eof = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except (OSError, ValueError):
+                chunk = b""
+            with self._cond:
+                if not chunk:
+                    self.eof = True
+                    self._cond.notify_all()
+                    return
+                self._feed(chunk)
+
+    def _feed(self, chunk: bytes) -> None:
+        window = self._window
+        window += chunk
+        while True:
+            pos = window.find(self._marker)
+            if pos < 0:
+                cut = len(window) - (len(self._marker) - 1)
+                if cut > 0:
+                    self._out.feed(bytes(window[:cut]))
+                    del window[:cut]
+                return
+            self._out.feed(bytes(window[:pos]))
+            del window[:pos]
+            end = window.find(b"\n", len(self._marker))
+            if end < 0:
+                return  # status line not complete yet
+            self._done.append((self._out, bytes(window[len(self._marker) : end])))
+            del window[: end + 1]
+            self._out = OutputBuffer(self._limit)
+            self._cond.notify_all()
+
+    def wait_for(self, deadline: float) -> tuple[str, bytes] | None:
+        """Next command's ``(output, status after the sentinel)``; None on timeout or EOF."""
+        with self._cond:
+            while not self._done:
+                remaining = deadline - time.monotonic()
+                if self.eof or remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            out, status = self._done.pop(0)
+            return out.text(), status
+
+    def drain(self) -> str:
+        """Whatever was read since the last sentinel."""
+        with self._cond:
+            self._out.feed(bytes(self._window))
+            self._window.clear()
+            text = self._out.text()
+            self._out = OutputBuffer(self._limit)
+            return text
+
+
+class BashSession:
+    """One bash process that runs commands in sequence, keeping cwd and exported variables."""
+
+    def __init__(self, workdir: str = "."):
+        self.workdir = os.path.abspath(workdir)
+        self.commands = 0
+        self.restarts = 0
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._stdout: _StreamReader | None = None
+        self._stderr: _StreamReader | None = None
+        self.cwd = self.workdir  # the shell's cwd after the last command
+        self._requested = self.workdir
+        self._sentinel = ""
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _start(self) -> None:
+        self._proc = subprocess.Popen(
+            ["bash", "--noprofile", "--norc"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.workdir,
+            env=bash_env(self.workdir),
+            start_new_session=True,  # own process group, so timeouts can kill the command's children
+        )
+        assert self._proc.stdout is not None and self._proc.stderr is not None
+        self._sentinel = f"__TRUST5_DONE_{secrets.token_hex(8)}__"
+        self._stdout = _StreamReader(self._proc.stdout, "bash-stdout", self._sentinel.encode())
+        self._stderr = _StreamReader(self._proc.stderr, "bash-stderr", self._sentinel.encode())
+        self.cwd = self._requested = self.workdir
+        logger.debug("Started bash session pid=%d in %s", self._proc.pid, self.workdir)
+
+    def command_cwd(self, workdir: str | None = None) -> str:
+        """Directory the next ``run(command, workdir)`` will execute in."""
+        requested, cwd = (self._requested, self.cwd) if self.alive else (self.workdir, self.workdir)
+        target = os.path.abspath(workdir) if workdir else requested
+        return target if target != requested else cwd
+
+    def run(self, command: str, workdir: str | None = None, timeout: float = 120) -> tuple[str, str, int]:
+        """Run *command*; returns ``(stdout, stderr, exit code)``.
+
+        A *workdir* different from the previous call's is ``cd``-ed into
+        first.  Raises ``subprocess.TimeoutExpired`` when the command is
+        killed for exceeding *timeout*, ``BashSessionError`` if the shell dies.
+        """
+        with self._lock:
+            if not self.alive:
+                if self._proc is not None:
+                    self.restarts += 1
+                self._start()
+            assert self._proc is not None and self._proc.stdin is not None
+            assert self._stdout is not None and self._stderr is not None
+            self.commands += 1
+
+            # cd only when the caller asks for a different workdir than last time,
+            # so a "cd" inside an earlier command sticks for "." requests
+            target = os.path.abspath(workdir) if workdir else self._requested
+            prefix = f"cd -- {shlex.quote(target)} && " if target != self._requested else ""
+            self._requested = target
+            sent = self._sentinel
+            script = (
+                f"__t5_cmd={shlex.quote(command)}\n"
+                f'{prefix}{{ eval "$__t5_cmd"; }} </dev/null\n'
+                f"__t5_rc=$?; __t5_pwd=$PWD\n"
+                f"printf '\\n{sent} %d %s\\n' \"$__t5_rc\" \"$__t5_pwd\"; printf '\\n{sent}\\n' >&2\n"
+            )
+            try:
+                self._proc.stdin.write(script.encode("utf-8"))
+                self._proc.stdin.flush()
+            except OSError as e:
+                self._kill()
+                raise BashSessionError(f"bash session is not accepting commands: {e}") from e
+
+            deadline = time.monotonic() + timeout
+            out = self._stdout.wait_for(deadline)
+            timed_out = out is None and not self._stdout.eof
+            if timed_out:
+                self._kill_command()
+                out = self._stdout.wait_for(time.monotonic() + _KILL_GRACE)
+            err = self._stderr.wait_for(time.monotonic() + (_KILL_GRACE if timed_out else timeout))
+
+            if out is None or err is None:
+                partial = out[0] if out is not None else self._stdout.drain()
+                self._kill()
+                if timed_out:
+                    raise subprocess.TimeoutExpired(command, timeout, output=partial)
+                raise BashSessionError("bash session exited (the command may have called 'exit')")
+
+            stdout, status = out
+            rc_text, _, cwd = status.decode("utf-8", errors="replace").strip().partition(" ")
+            self.cwd = cwd or self.cwd
+            if timed_out:
+                raise subprocess.TimeoutExpired(command, timeout, output=stdout, stderr=err[0])
+            return stdout, err[0], int(rc_text) if rc_text.lstrip("-").isdigit() else -1
+
+    def _kill_command(self) -> None:
+        """SIGKILL everything in the shell's process group except the shell."""
+        if self._proc is None:
+            return
+        for pid in _group_members(self._proc.pid):
+            if pid != self._proc.pid:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+
+    def _kill(self) -> None:
+        if self._proc is None:
+            return
+        try:
+            os.killpg(self._proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            logger.warning("bash session pid=%d did not exit after SIGKILL", self._proc.pid)
+        for pipe in (self._proc.stdin, self._proc.stdout, self._proc.stderr):
+            if pipe is not None:
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        """Stop the shell and anything it left running."""
+        with self._lock:
+            self._kill()
+            self._proc = None
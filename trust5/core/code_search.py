@@ -0,0 +1,225 @@
+"""In-process parallel content search backing the ``Grep`` tool.
+
+Replaces ``grep -r``: the walk prunes every language profile's
+``skip_dirs`` (``node_modules``, ``.venv``, ``target``, ...) and hidden
+directories, skips binary files (a NUL byte in the first 8 KiB), and
+searches files on a thread pool.  Each file is scanned as one buffer with
+a compiled bytes regex (``mmap`` for files of 1 MiB and up) instead of line
+by line, so only matching lines are ever decoded.  Matches still follow
+grep's line semantics: a candidate that runs past the end of its line is
+re-checked against that line alone, so ``\\s+`` or ``^$`` never span a
+newline or report lines past EOF.  Patterns are Python ``re`` syntax, not
+grep BRE (``a|b`` is alternation, ``a\\|b`` a literal bar).
+
+Results are capped per file and overall and come back grouped by file in
+walk order, one ``path:line:text`` row per match (context rows use
+``path-line-text``, as grep does).  The walk feeds the pool through a
+bounded window, so hitting the overall cap or the time budget stops the
+search early and the output is still deterministic.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import mmap
+import os
+import re
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .lang_profiles import _SKIP_DIRS_DETECT, PROFILES
+
+# Every profile's skip_dirs: the Grep tool does not know the project language.
+DEFAULT_SKIP_DIRS = frozenset(_SKIP_DIRS_DETECT).union(*(p.skip_dirs for p in PROFILES.values()))
+
+_BINARY_PROBE = 8192
+_MMAP_MIN_SIZE = 1 << 20
+_MAX_LINE_CHARS = 300
+_MAX_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+
+@dataclass
+class FileMatches:
+    path: str
+    # (line number, is_match, text); context rows have is_match False
+    rows: list[tuple[int, bool, str]] = field(default_factory=list)
+    matches: int = 0
+    truncated: bool = False
+
+
+def compile_pattern(pattern: str) -> tuple[re.Pattern[bytes], bool]:
+    """Compile *pattern* as a multiline bytes regex; invalid regexes match literally."""
+    flags = re.MULTILINE
+    try:
+        return re.compile(pattern.encode("utf-8"), flags), False
+    except re.error:
+        return re.compile(re.escape(pattern.encode("utf-8")), flags), True
+
+
+def iter_files(root: str, include: str = "*", skip_dirs: frozenset[str] = DEFAULT_SKIP_DIRS) -> Iterator[str]:
+    """Files under *root* whose basename matches *include*, in sorted walk order."""
+    if os.path.isfile(root):
+        yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in skip_dirs and not d.startswith("."))
+        for name in sorted(filenames):
+            if include == "*" or fnmatch.fnmatch(name, include):
+                yield os.path.normpath(os.path.join(dirpath, name))
+
+
+def _line_text(data: bytes | mmap.mmap, start: int, end: int) -> str:
+    text = bytes(data[start:end]).decode("utf-8", errors="replace").rstrip("\r")
+    return text if len(text) <= _MAX_LINE_CHARS else text[:_MAX_LINE_CHARS] + "…"
+
+
+def _scan(
+    data: bytes | mmap.mmap, regex: re.Pattern[bytes], result: FileMatches, max_matches: int, context: int
+) -> None:
+    size = len(data)
+    pos = 0
+    line_no = 1
+    counted_to = 0
+    last_row = 0  # highest line number already emitted (avoids duplicate context rows)
+    while pos < size:
+        m = regex.search(data, pos)
+        if m is None:
+            break
+        start = data.rfind(b"\n", 0, m.start()) + 1
+        if start >= size:
+            break  # empty match after the final newline: there is no such line
+        end = data.find(b"\n", m.start())
+        end = size if end < 0 else end
+        if m.end() > end and regex.search(data, start, end) is None:
+            pos = end + 1  # the candidate only matched by crossing the newline
+            continue
+        if result.matches >= max_matches:
+            result.truncated = True
+            break
+        # mmap has no count(); slicing it copies only the gap since the last match
+        gap = data.count(b"\n", counted_to, start) if isinstance(data, bytes) else data[counted_to:start].count(b"\n")
+        line_no += gap
+        counted_to = start
+
+        before: list[tuple[int, bool, str]] = []
+        cursor = start
+        for n in range(line_no - 1, max(line_no - context, 1) - 1, -1):
+            if n <= last_row:
+                break
+            prev_start = data.rfind(b"\n", 0, cursor - 1) + 1
+            before.append((n, False, _line_text(data, prev_start, cursor - 1)))
+            cursor = prev_start
+        result.rows.extend(reversed(before))
+        result.rows.append((line_no, True, _line_text(data, start, end)))
+        result.matches += 1
+        last_row = line_no
+
+        cursor = end
+        for n in range(line_no + 1, line_no + context + 1):
+            if cursor + 1 >= size:
+                break
+            nxt = data.find(b"\n", cursor + 1)
+            nxt = size if nxt < 0 else nxt
+            if regex.search(data[cursor + 1 : nxt]):
+                break  # the next match emits this line itself
+            result.rows.append((n, False, _line_text(data, cursor + 1, nxt)))
+            last_row = n
+            cursor = nxt
+        pos = end + 1
+
+
+def search_file(path: str, regex: re.Pattern[bytes], max_matches: int, context: int = 0) -> FileMatches | None:
+    """Matches of *regex* in *path*; None for unreadable, empty or binary files."""
+    result = FileMatches(path)
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_BINARY_PROBE)
+            if not head or b"\0" in head:
+                return None
+            size = os.fstat(f.fileno()).st_size
+            if size >= _MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    _scan(mm, regex, result, max_matches, context)
+            else:
+                _scan(head + f.read(), regex, result, max_matches, context)
+    except (OSError, ValueError):  # unreadable file, or it shrank while mapping
+        return None
+    return result if result.matches else None
+
+
+def search(
+    pattern: str,
+    root: str = ".",
+    include: str = "*",
+    *,
+    context: int = 0,
+    max_per_file: int = 50,
+    max_total: int = 500,
+    timeout: float = 60.0,
+    skip_dirs: frozenset[str] = DEFAULT_SKIP_DIRS,
+) -> str:
+    """Search files under *root* for *pattern*; returns grep-style rows grouped by file."""
+    if not os.path.exists(root):
+        return f"Error: path not found: {root}"
+    regex, literal = compile_pattern(pattern)
+    deadline = time.monotonic() + timeout
+    found: list[FileMatches] = []
+    total = 0
+    files_searched = 0
+    stopped = ""
+
+    window: deque[Future[FileMatches | None]] = deque()
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix="grep") as pool:
+
+        def collect() -> None:
+            nonlocal total, files_searched
+            res = window.popleft().result()
+            files_searched += 1
+            if res is not None and total < max_total:
+                if total + res.matches > max_total:
+                    res.rows = [r for r in res.rows if r[1]][: max_total - total]
+                    res.matches = len(res.rows)
+                    res.truncated = True
+                found.append(res)
+                total += res.matches
+
+        for path in iter_files(root, include, skip_dirs):
+            window.append(pool.submit(search_file, path, regex, max_per_file, context))
+            if len(window) >= _MAX_WORKERS * 4:
+                collect()
+            if total >= max_total:
+                break
+            if time.monotonic() > deadline:
+                stopped = f"stopped after {timeout:.0f}s"
+                break
+        while window and total < max_total:
+            collect()
+        for future in window:
+            future.cancel()
+    if total >= max_total:
+        stopped = f"stopped at {max_total} matches"
+
+    return _format(found, total, files_searched, stopped, literal)
+
+
+def _format(found: list[FileMatches], total: int, files_searched: int, stopped: str, literal: bool) -> str:
+    if not found:
+        note = " (pattern is not a valid regex; searched literally)" if literal else ""
+        return f"No matches found in {files_searched} files{note}."
+    blocks = []
+    for res in found:
+        rows = []
+        for n, is_match, text in res.rows:
+            sep = ":" if is_match else "-"
+            rows.append(f"{res.path}{sep}{n}{sep}{text}")
+        if res.truncated:
+            rows.append(f"{res.path}: ... more matches not shown")
+        blocks.append("\n".join(rows))
+    summary = f"{total} matches in {len(found)} files ({files_searched} files searched"
+    summary += f"; {stopped})" if stopped else ")"
+    if literal:
+        summary += "; pattern is not a valid regex, searched literally"
+    return "\n\n".join(blocks) + "\n\n" + summary
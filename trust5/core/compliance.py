@@ -16,6 +16,8 @@ import re
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
+from .project_index import get_index
+
 if TYPE_CHECKING:
     from .llm import LLM
 
@@ -307,24 +309,16 @@ def _read_source_files(
 ) -> str:
     """Read and concatenate all non-test source files."""
     effective_skip = _DEFAULT_SKIP_DIRS | set(skip_dirs)
-    ext_set = set(extensions)
     chunks: list[str] = []
 
-    for dirpath, dirnames, filenames in os.walk(project_root):
-        dirnames[:] = [d for d in dirnames if d not in effective_skip]
-        for fname in filenames:
-            _, ext = os.path.splitext(fname)
-            if ext not in ext_set:
-                continue
-            rel_path = os.path.relpath(os.path.join(dirpath, fname), project_root)
-            if _is_test_file(rel_path):
-                continue
-            full_path = os.path.join(dirpath, fname)
-            try:
-                with open(full_path, encoding="utf-8", errors="replace") as f:
-                    chunks.append(f"# --- {rel_path} ---\n{f.read()}")
-            except OSError:
-                continue
+    for rel_path in get_index(project_root).paths(extensions, effective_skip):
+        if _is_test_file(rel_path):
+            continue
+        try:
+            with open(os.path.join(project_root, rel_path), encoding="utf-8", errors="replace") as f:
+                chunks.append(f"# --- {rel_path} ---\n{f.read()}")
+        except OSError:
+            continue
 
     return "\n\n".join(chunks)
 
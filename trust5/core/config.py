@@ -274,6 +274,13 @@ class AgentConfig(BaseModel):
     max_turns: int = 20
     simple_max_turns: int = 8  # Reduced turns for trivial projects (≤3 source files)
     max_history_messages: int = 60
+    max_history_tokens: int = 120_000  # Token budget for agent history (pinned task + recent turns)
+    compact_history: bool = False  # Summarize trimmed turns with the fast tier instead of dropping them
+    tool_concurrency: int = 4  # Worker threads for read-only tool calls within one turn (1 = sequential)
+    tool_result_cache: bool = True  # Answer repeated unchanged Read/Grep/Glob calls with a short note
+    checkpoint_turns: bool = True  # Persist each turn so a re-run stage resumes mid-conversation
+    persistent_shell: bool = False  # One long-lived bash per agent for the Bash tool (keeps cwd and exports)
+    write_durability: str = "fsync"  # Write/Edit: "fsync", "atomic-rename" (batched fsync at run end) or "none"
     tool_result_limit: int = 8000
     default_timeout: int = 7200  # 2 hr wall-clock per agent run
     per_turn_timeout: int = 1800  # 30 min per LLM call
@@ -329,6 +336,10 @@ class MCPConfig(BaseModel):
 
     start_timeout: float = 30.0
     process_stop_timeout: int = 5
+    request_timeout: float = 30.0  # per JSON-RPC request; callers may pass their own
+    pool: bool = True  # keep servers running and lease them to agents
+    pool_max_per_server: int = 4
+    health_check_interval: float = 30.0  # idle seconds before a pooled server must answer a ping
 
 
 class EventBusConfig(BaseModel):
@@ -423,6 +434,13 @@ class LLMConfig(BaseModel):
     retry_budget_server: int = 1800
     retry_budget_rate: int = 3600
     max_backoff_delay: float = 300.0
+    prompt_caching: bool = True  # Anthropic cache breakpoints on system/tools/history
+    http_pool_size: int = 10  # Pooled connections per API host (raised to fit parallel modules)
+    http_keepalive_idle: int = 60  # Seconds idle before TCP keep-alive probes
+    rate_limiter: bool = True  # Pace calls from provider rate-limit headers (shared across stages)
+    hedge_requests: bool = False  # fast/watchdog tiers: race the next fallback model on a slow first token
+    hedge_min_delay: float = 2.0  # Lower bound on the first-token wait before hedging
+    hedge_max_delay: float = 20.0  # Upper bound (also used until latency samples exist)
 
 
 class GlobalConfig(BaseModel):
@@ -35,6 +35,7 @@ AGENT_MAX_EMPTY_RETRIES = 3
 DEFAULT_SUBPROCESS_TIMEOUT = 120
 SUBPROCESS_TIMEOUT = DEFAULT_SUBPROCESS_TIMEOUT
 DEFAULT_SETUP_TIMEOUT = 300
+SUBPROCESS_OUTPUT_LIMIT = 1_048_576  # bytes kept per stream (head + tail); the middle is dropped
 
 # Context builder limits
 MAX_FILE_CONTENT = 6000
@@ -60,6 +61,10 @@ MAX_READ_FILE_SIZE = 1_048_576   # 1 MB
 MAX_GLOB_RESULTS = 1_000
 MAX_READFILES_COUNT = 100
 MAX_READFILES_FILE_SIZE = 1_048_576  # 1 MB per file in ReadFiles
+MAX_GREP_MATCHES = 500
+MAX_GREP_MATCHES_PER_FILE = 50
+GREP_TIMEOUT = 60
+DIFF_LINEAR_THRESHOLD = 200_000  # chars (old + new); larger Write/Edit diffs use the linear line-hash diff
 # Mutation testing
 DEFAULT_MAX_MUTANTS = 10
 
@@ -70,7 +75,14 @@ _ATTR_MAP: dict[str, tuple[str, str]] = {
     # Agent execution
     "AGENT_MAX_TURNS": ("agent", "max_turns"),
     "AGENT_MAX_HISTORY_MESSAGES": ("agent", "max_history_messages"),
+    "AGENT_MAX_HISTORY_TOKENS": ("agent", "max_history_tokens"),
+    "AGENT_COMPACT_HISTORY": ("agent", "compact_history"),
     "AGENT_TOOL_RESULT_LIMIT": ("agent", "tool_result_limit"),
+    "AGENT_TOOL_CONCURRENCY": ("agent", "tool_concurrency"),
+    "AGENT_TOOL_RESULT_CACHE": ("agent", "tool_result_cache"),
+    "AGENT_CHECKPOINT_TURNS": ("agent", "checkpoint_turns"),
+    "AGENT_WRITE_DURABILITY": ("agent", "write_durability"),
+    "AGENT_PERSISTENT_SHELL": ("agent", "persistent_shell"),
     "AGENT_DEFAULT_TIMEOUT": ("agent", "default_timeout"),
     "AGENT_PER_TURN_TIMEOUT": ("agent", "per_turn_timeout"),
     "AGENT_IDLE_WARN_TURNS": ("agent", "idle_warn_turns"),
@@ -104,6 +116,10 @@ _ATTR_MAP: dict[str, tuple[str, str]] = {
     # MCP server
     "MCP_START_TIMEOUT": ("mcp", "start_timeout"),
     "MCP_PROCESS_STOP_TIMEOUT": ("mcp", "process_stop_timeout"),
+    "MCP_REQUEST_TIMEOUT": ("mcp", "request_timeout"),
+    "MCP_POOL": ("mcp", "pool"),
+    "MCP_POOL_MAX_PER_SERVER": ("mcp", "pool_max_per_server"),
+    "MCP_HEALTH_CHECK_INTERVAL": ("mcp", "health_check_interval"),
     # Event bus
     "EVENT_BUS_SOCKET_TIMEOUT": ("event_bus", "socket_timeout"),
     "EVENT_QUEUE_BATCH_SIZE": ("event_bus", "queue_batch_size"),
@@ -129,6 +145,13 @@ _ATTR_MAP: dict[str, tuple[str, str]] = {
     "LLM_RETRY_BUDGET_SERVER": ("llm", "retry_budget_server"),
     "LLM_RETRY_BUDGET_RATE": ("llm", "retry_budget_rate"),
     "LLM_MAX_BACKOFF_DELAY": ("llm", "max_backoff_delay"),
+    "LLM_PROMPT_CACHING": ("llm", "prompt_caching"),
+    "LLM_HTTP_POOL_SIZE": ("llm", "http_pool_size"),
+    "LLM_HTTP_KEEPALIVE_IDLE": ("llm", "http_keepalive_idle"),
+    "LLM_RATE_LIMITER": ("llm", "rate_limiter"),
+    "LLM_HEDGE_REQUESTS": ("llm", "hedge_requests"),
+    "LLM_HEDGE_MIN_DELAY": ("llm", "hedge_min_delay"),
+    "LLM_HEDGE_MAX_DELAY": ("llm", "hedge_max_delay"),
 }
 
 
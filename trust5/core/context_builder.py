@@ -5,6 +5,7 @@ from typing import Any
 
 from .constants import MAX_FILE_CONTENT
 from .constants import MAX_TOTAL_CONTEXT as MAX_TOTAL_CONTEXT
+from .project_index import get_index
 
 logger = logging.getLogger(__name__)
 
@@ -39,11 +40,7 @@ def _find_source_files(
     project_root: str,
     extensions: tuple[str, ...] = _FALLBACK_EXTENSIONS,
 ) -> list[str]:
-    found = []
-    for ext in extensions:
-        pattern = f"**/*{ext}"
-        found.extend(glob.glob(os.path.join(project_root, pattern), recursive=True))
-    return sorted(set(found))
+    return sorted(os.path.join(project_root, rel) for rel in get_index(project_root).paths(extensions))
 
 
 def build_spec_context(spec_id: str, project_root: str) -> str:
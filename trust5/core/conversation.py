@@ -0,0 +1,161 @@
+"""Token-budgeted conversation history for ``Agent``.
+
+``ConversationBuffer`` holds the non-system messages of one agent
+conversation.  It keeps the raw token count of every message (counted once,
+on append) and a running total, pins the first user message (the task), and
+trims the oldest messages to fit both a message-count and a token budget.
+
+Trimming drops whole *units*: an assistant message together with the
+``tool`` results that answer its ``tool_calls``.  A tool result is never kept
+without its tool call, which providers reject with a 400.  Dropping only
+advances a head index; the backing list is compacted once the dead prefix is
+at least half of it, so trimming is O(1) amortized per message.
+
+An optional *working memory* (a summary of evicted turns, see
+``history_compactor``) is appended to the pinned task message when the
+request list is built.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any
+
+from .token_counter import message_tokens
+
+# Compact the backing list once this many dropped slots have accumulated
+# (and they make up at least half the list).
+_COMPACT_MIN = 32
+
+_MEMORY_HEADER = "\n\n## Working memory (summary of earlier turns, which are no longer shown)\n"
+
+
+class ConversationBuffer:
+    """Pair-aware, token-budgeted message history with a pinned task message."""
+
+    def __init__(self, max_messages: int, max_tokens: int) -> None:
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self._pinned: dict[str, Any] | None = None
+        self._pinned_tokens = 0
+        self._memory = ""
+        self._memory_tokens = 0
+        # Pinned task with the working memory appended; rebuilt only when either changes
+        # so the message keeps its identity for the encoder and prompt-cache prefix.
+        self._pinned_view: dict[str, Any] | None = None
+        self._items: list[dict[str, Any]] = []
+        self._tokens: list[int] = []
+        self._head = 0
+        self._total = 0
+
+    # ── list-like access ──────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return (self._pinned is not None) + len(self._items) - self._head
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if self._pinned is not None:
+            yield self._pinned
+        for idx in range(self._head, len(self._items)):
+            yield self._items[idx]
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        return self.as_list()[index]
+
+    def as_list(self) -> list[dict[str, Any]]:
+        live = self._items[self._head :]
+        return [self._pinned, *live] if self._pinned is not None else live
+
+    def messages(self, system: dict[str, Any]) -> list[dict[str, Any]]:
+        """The request message list: *system*, the pinned task (with memory), then live history."""
+        live = self._items[self._head :]
+        if self._pinned is None:
+            return [system, *live]
+        if self._pinned_view is None:
+            self._pinned_view = self._pinned
+            if self._memory:
+                content = f"{self._pinned.get('content', '')}{_MEMORY_HEADER}{self._memory}"
+                self._pinned_view = {**self._pinned, "content": content}
+        return [system, self._pinned_view, *live]
+
+    @property
+    def total_tokens(self) -> int:
+        """Raw (uncalibrated) token count of every message in the buffer."""
+        return self._total + self._pinned_tokens + self._memory_tokens
+
+    @property
+    def memory(self) -> str:
+        return self._memory
+
+    def set_memory(self, text: str) -> None:
+        """Replace the working-memory summary shown after the pinned task."""
+        self._memory = text
+        self._memory_tokens = message_tokens({"content": text}) if text else 0
+        self._pinned_view = None
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-serializable state (pinned task, live messages, memory) for checkpoints."""
+        return {"pinned": self._pinned, "items": self._items[self._head :], "memory": self._memory}
+
+    def restore(self, state: dict[str, Any]) -> None:
+        """Replace the contents with a ``snapshot()``; token counts are recomputed."""
+        self._pinned = state.get("pinned")
+        self._pinned_tokens = message_tokens(self._pinned) if self._pinned is not None else 0
+        self._items = list(state.get("items", []))
+        self._tokens = [message_tokens(m) for m in self._items]
+        self._head = 0
+        self._total = sum(self._tokens)
+        self.set_memory(str(state.get("memory", "")))
+
+    # ── mutation ──────────────────────────────────────────────────────
+
+    def append(self, message: dict[str, Any]) -> None:
+        count = message_tokens(message)
+        if self._pinned is None and not self._items and message.get("role") == "user":
+            self._pinned = message
+            self._pinned_tokens = count
+            self._pinned_view = None
+            return
+        self._items.append(message)
+        self._tokens.append(count)
+        self._total += count
+
+    def pop(self) -> dict[str, Any]:
+        """Remove and return the newest message."""
+        if len(self._items) > self._head:
+            self._total -= self._tokens.pop()
+            return self._items.pop()
+        if self._pinned is None:
+            raise IndexError("pop from empty conversation")
+        message, self._pinned, self._pinned_tokens = self._pinned, None, 0
+        self._pinned_view = None
+        return message
+
+    def trim(self, factor: float = 1.0) -> list[dict[str, Any]]:
+        """Drop the oldest units until both budgets fit; returns the dropped messages.
+
+        *factor* scales raw token counts to the provider's (see
+        ``token_counter.calibration_factor``).  The newest unit is always
+        kept, so a single oversized tool result is left to the LLM-side
+        context trimming.
+        """
+        start = self._head
+        while len(self) > self.max_messages or int(self.total_tokens * factor) > self.max_tokens:
+            end = self._unit_end(self._head)
+            if end >= len(self._items):
+                break
+            self._total -= sum(self._tokens[self._head : end])
+            self._head = end
+        dropped = self._items[start : self._head]
+        if self._head >= _COMPACT_MIN and self._head * 2 >= len(self._items):
+            del self._items[: self._head]
+            del self._tokens[: self._head]
+            self._head = 0
+        return dropped
+
+    def _unit_end(self, start: int) -> int:
+        """Index just past the unit starting at *start* (a message plus its tool results)."""
+        end = start + 1
+        while end < len(self._items) and self._items[end].get("role") == "tool":
+            end += 1
+        return end
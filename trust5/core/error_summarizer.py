@@ -42,6 +42,7 @@ def summarize_errors(
     raw_output: str,
     failure_type: str = "test",
     timeout: int = 30,
+    stage: str = "",
 ) -> str:
     # Modern LLMs have large context. Don't summarize if output is reasonable size.
     # 32k chars is ~8k tokens, trivial for Claude/Gemini.
@@ -52,7 +53,7 @@ def summarize_errors(
     user_msg = f"FAILURE TYPE: {failure_type}\n\nRAW OUTPUT:\n{truncated}"
 
     try:
-        llm = LLM.for_tier("fast", thinking_level=None)
+        llm = LLM.for_tier("fast", thinking_level=None, stage=stage)
         response = llm.chat(
             messages=[
                 {"role": "system", "content": _SUMMARIZER_PROMPT},
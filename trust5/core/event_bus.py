@@ -214,6 +214,11 @@ class EventBus:
             self._listeners.append(q)
         return q
 
+    def has_subscribers(self) -> bool:
+        """True when an in-process listener or a UDS client would receive events."""
+        with self._listeners_lock, self._clients_lock:
+            return bool(self._listeners or self._clients)
+
     def unsubscribe(self, q: queue.Queue[Event | None]) -> None:
         """Remove a listener queue to prevent memory leaks."""
         with self._listeners_lock:
@@ -0,0 +1,98 @@
+"""Durability modes for files written by the ``Write`` and ``Edit`` tools.
+
+``agent.write_durability`` (``AGENT_WRITE_DURABILITY``) selects one of:
+
+* ``fsync`` (default) -- write in place and ``fsync`` before returning, as
+  the tools always did.
+* ``atomic-rename`` -- write a temporary file next to the target and
+  ``os.replace`` it, so readers (other agents, test runners) never see a
+  half-written file.  Nothing is synced per write; the paths are queued and
+  ``sync_pending`` flushes them in one batch when the agent run ends.
+* ``none`` -- write in place with no syncing, for tmpfs or throwaway CI
+  workspaces where fsync only costs latency.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+
+from .constants import AGENT_WRITE_DURABILITY
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("fsync", "atomic-rename", "none")
+
+# Read once at import: os.umask can only be queried by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_pending: set[str] = set()
+_pending_lock = threading.Lock()
+
+
+def _mode() -> str:
+    mode = str(AGENT_WRITE_DURABILITY)
+    if mode not in DURABILITY_MODES:
+        logger.warning("Unknown write durability %r, using 'fsync'", mode)
+        return "fsync"
+    return mode
+
+
+def write_text(path: str, content: str) -> None:
+    """Write *content* to *path* (UTF-8) with the configured durability."""
+    mode = _mode()
+    if mode != "atomic-rename":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+            if mode == "fsync":
+                f.flush()
+                os.fsync(f.fileno())
+        return
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp, 0o666 & ~_UMASK)  # mkstemp creates 0600; match a plain open()
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    with _pending_lock:
+        _pending.add(path)
+
+
+def sync_pending() -> int:
+    """fsync every file (and its directory) written since the last call; returns the file count."""
+    with _pending_lock:
+        paths = sorted(_pending)
+        _pending.clear()
+    dirs: set[str] = set()
+    for path in paths:
+        dirs.add(os.path.dirname(path))
+        _fsync_path(path, os.O_RDONLY)
+    for d in sorted(dirs):
+        _fsync_path(d, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    return len(paths)
+
+
+def _fsync_path(path: str, flags: int) -> None:
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        return  # deleted or renamed since it was written
+    try:
+        os.fsync(fd)
+    except OSError as e:
+        logger.warning("fsync failed for %s: %s", path, e)
+    finally:
+        os.close(fd)
@@ -0,0 +1,118 @@
+"""Summarize evicted agent turns into a working-memory note.
+
+When ``agent.compact_history`` is enabled, turns that the history budget
+pushes out of an agent's ``ConversationBuffer`` are not simply lost: a fast,
+non-thinking model folds them into a short running summary (files touched,
+decisions made, commands and test status), which the buffer shows after the
+pinned task message.  Each compaction sends only the previous summary and
+the newly evicted turns, so the cost stays proportional to new material.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any
+
+from .llm import LLM, LLMError
+from .message import M, emit
+
+logger = logging.getLogger(__name__)
+
+_MAX_INPUT_CHARS = 40_000
+_MAX_SUMMARY_CHARS = 4_000
+_MAX_FIELD_CHARS = 600
+
+_COMPACTOR_PROMPT = """You maintain the working memory of a coding agent whose oldest
+conversation turns are being removed. Merge the PREVIOUS MEMORY with the
+REMOVED TURNS into one updated memory the agent can rely on instead of
+re-reading files or re-running commands.
+
+Output format (plain text, omit empty sections):
+
+FILES:
+- <path>: <what was read, created or changed, and why>
+DECISIONS:
+- <design decision or constraint discovered>
+COMMANDS:
+- <command> -> <outcome, e.g. 12 passed / ImportError in x.py>
+TEST STATUS: <latest known state>
+OPEN ISSUES:
+- <anything still failing or pending>
+
+Rules:
+- Keep facts from the previous memory unless the removed turns supersede them
+- Be specific: paths, function names, error messages
+- Keep total output under 3000 characters"""
+
+
+def _clip(text: str, limit: int = _MAX_FIELD_CHARS) -> str:
+    return text if len(text) <= limit else text[:limit] + f"... [{len(text) - limit} chars]"
+
+
+def render_turns(messages: list[dict[str, Any]]) -> str:
+    """Compact plain-text rendering of evicted messages for the summarizer."""
+    lines: list[str] = []
+    for msg in messages:
+        role = msg.get("role", "")
+        content = str(msg.get("content", "") or "")
+        if role == "tool":
+            lines.append(f"[result {msg.get('name', '')}] {_clip(content)}")
+            continue
+        if content:
+            lines.append(f"[{role}] {_clip(content)}")
+        for tc in msg.get("tool_calls", None) or []:
+            fn = tc.get("function", {})
+            args = fn.get("arguments", "")
+            lines.append(f"[call {fn.get('name', '')}] {_clip(args if isinstance(args, str) else json.dumps(args))}")
+    text = "\n".join(lines)
+    return text[-_MAX_INPUT_CHARS:]
+
+
+class HistoryCompactor:
+    """Keeps one agent's running summary of evicted turns."""
+
+    def __init__(self, agent_name: str, llm: LLM | None = None, timeout: int = 60, stage: str = "") -> None:
+        self.agent_name = agent_name
+        self.stage = stage
+        self.summary = ""
+        self._llm = llm
+        self._timeout = timeout
+
+    def compact(self, evicted: list[dict[str, Any]]) -> str:
+        """Fold *evicted* into the summary and return it (unchanged on failure)."""
+        turns = render_turns(evicted)
+        if not turns:
+            return self.summary
+        user_msg = f"PREVIOUS MEMORY:\n{self.summary or '(none)'}\n\nREMOVED TURNS:\n{turns}"
+        try:
+            if self._llm is None:
+                # no stage_name: that would pick the agent's own (often "high") thinking level
+                labels = {"tier": "fast", "agent": f"{self.agent_name}-compactor", "stage": self.stage}
+                self._llm = LLM.for_tier("fast", thinking_level=None, labels=labels)
+            response = self._llm.chat(
+                messages=[
+                    {"role": "system", "content": _COMPACTOR_PROMPT},
+                    {"role": "user", "content": user_msg},
+                ],
+                timeout=self._timeout,
+            )
+        except LLMError as e:
+            logger.warning("History compaction LLM failed (non-fatal): %s", e)
+            return self.summary
+        except (OSError, ValueError, RuntimeError, KeyError) as e:  # compaction: non-LLM failures
+            logger.warning("History compaction unexpected failure (non-fatal): %s", e)
+            return self.summary
+
+        content = response.get("message", {}).get("content", "")
+        if isinstance(content, list):
+            content = "\n".join(block.get("text", "") for block in content if isinstance(block, dict))
+        summary = str(content).strip()
+        if summary:
+            self.summary = summary[:_MAX_SUMMARY_CHARS]
+            emit(
+                M.CTRM,
+                f"[{self.agent_name}] Compacted {len(evicted)} messages into working memory "
+                f"({len(self.summary)} chars)",
+            )
+        return self.summary
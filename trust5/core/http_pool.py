@@ -0,0 +1,171 @@
+"""Process-wide pooled HTTP sessions for LLM providers.
+
+``LLM.for_tier`` is called per stage, for the error summarizer, compliance
+checks and every watchdog narrative.  Giving each instance its own
+``requests.Session`` means a fresh TCP + TLS handshake to the same API host
+every time.  This module hands out one shared ``Session`` per
+``(base_url, backend, auth identity)`` whose connection pool is sized for the
+number of parallel module stages and whose sockets use TCP keep-alive, so
+idle connections survive between agent turns.
+
+``pool_stats()`` reports how many requests reused a pooled connection
+versus opening a new one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import socket
+import threading
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .constants import LLM_HTTP_KEEPALIVE_IDLE, LLM_HTTP_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Connections beyond one-per-module: watchdog, error summarizer, compliance, review.
+_POOL_HEADROOM = 4
+_KEEPALIVE_INTERVAL = 15
+_KEEPALIVE_PROBES = 4
+
+
+def _keepalive_socket_options(idle: int) -> list[tuple[int, int, int]]:
+    options: list[tuple[int, int, int]] = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Per-socket tuning knobs are platform-specific (Linux: TCP_KEEPIDLE, macOS: TCP_KEEPALIVE).
+    idle_opt = getattr(socket, "TCP_KEEPIDLE", None) or getattr(socket, "TCP_KEEPALIVE", None)
+    if idle_opt is not None:
+        options.append((socket.IPPROTO_TCP, idle_opt, idle))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, _KEEPALIVE_INTERVAL))
+    if hasattr(socket, "TCP_KEEPCNT"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, _KEEPALIVE_PROBES))
+    return options
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets enable TCP keep-alive."""
+
+    def __init__(self, pool_maxsize: int, keepalive_idle: int) -> None:
+        self._socket_options = _keepalive_socket_options(keepalive_idle)
+        super().__init__(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+
+    def init_poolmanager(self, connections: int, maxsize: int, block: bool = False, **pool_kwargs: Any) -> None:
+        from urllib3.connection import HTTPConnection
+
+        pool_kwargs["socket_options"] = HTTPConnection.default_socket_options + self._socket_options
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+    def connection_counts(self) -> tuple[int, int]:
+        """Return (new connections opened, requests sent) across this adapter's pools."""
+        opened = 0
+        requests_sent = 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += int(getattr(pool, "num_connections", 0))
+            requests_sent += int(getattr(pool, "num_requests", 0))
+        return opened, requests_sent
+
+
+_sessions: dict[tuple[str, str, str], requests.Session] = {}
+_adapters: list[KeepAliveAdapter] = []
+_pool_lock = threading.Lock()
+_min_pool_size = 0
+# Counts from adapters replaced by ensure_pool_size(): [new connections, requests]
+_retired_counts = [0, 0]
+
+
+def auth_identity(auth_header: str | None, auth_token: str | None, provider_name: str | None) -> str:
+    """Stable key for *who* is calling — never the raw secret."""
+    if not auth_header or not auth_token:
+        return ""
+    if provider_name:
+        return f"{provider_name}:{auth_header}"
+    digest = hashlib.sha256(auth_token.encode("utf-8")).hexdigest()[:16]
+    return f"{auth_header}:{digest}"
+
+
+def _effective_pool_size() -> int:
+    return max(int(LLM_HTTP_POOL_SIZE), _min_pool_size)
+
+
+def _mount(session: requests.Session) -> None:
+    adapter = KeepAliveAdapter(_effective_pool_size(), int(LLM_HTTP_KEEPALIVE_IDLE))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    _adapters.append(adapter)
+
+
+def get_session(base_url: str, backend: str, identity: str) -> requests.Session:
+    """Return the shared session for this endpoint + credentials, creating it once."""
+    key = (base_url, backend, identity)
+    with _pool_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"Content-Type": "application/json"})
+            _mount(session)
+            _sessions[key] = session
+            logger.debug("HTTP pool: new session for %s (%s)", base_url, backend)
+        return session
+
+
+def ensure_pool_size(parallel_stages: int) -> None:
+    """Grow every pool to fit *parallel_stages* concurrent LLM streams.
+
+    Called by the parallel pipeline once the module count is known.
+    Existing sessions are re-mounted only when they need to grow.
+    """
+    global _min_pool_size
+    wanted = parallel_stages + _POOL_HEADROOM
+    with _pool_lock:
+        if wanted <= _effective_pool_size():
+            return
+        _min_pool_size = wanted
+        old = list(_adapters)
+        _adapters.clear()
+        for session in _sessions.values():
+            _mount(session)
+        for adapter in old:
+            opened, sent = adapter.connection_counts()
+            _retired_counts[0] += opened
+            _retired_counts[1] += sent
+            adapter.close()
+    logger.debug("HTTP pool size raised to %d", wanted)
+
+
+def pool_stats() -> dict[str, int]:
+    """Connection reuse counters across all pooled sessions."""
+    with _pool_lock:
+        adapters = list(_adapters)
+        sessions = len(_sessions)
+        opened, sent = _retired_counts
+    for adapter in adapters:
+        o, s = adapter.connection_counts()
+        opened += o
+        sent += s
+    return {
+        "sessions": sessions,
+        "pool_size": _effective_pool_size(),
+        "requests": sent,
+        "new_connections": opened,
+        "reused_connections": max(sent - opened, 0),
+    }
+
+
+def close_all() -> None:
+    """Close every pooled session (used on shutdown and between test runs)."""
+    global _min_pool_size
+    with _pool_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _adapters.clear()
+        _min_pool_size = 0
+        _retired_counts[:] = [0, 0]
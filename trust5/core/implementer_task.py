@@ -8,6 +8,7 @@ from stabilize import StageExecution, Task, TaskResult
 from stabilize.errors import TransientError
 
 from .agent import Agent
+from .agent_checkpoint import AgentCheckpoint
 from .context_builder import build_implementation_prompt, discover_latest_spec
 from .llm import LLM, LLMError
 from .mcp_manager import mcp_clients
@@ -117,7 +118,7 @@ class ImplementerTask(Task):
         else:
             user_prompt = base_prompt
 
-        llm = LLM.for_tier("best", stage_name="implementer")
+        llm = LLM.for_tier("best", stage_name="implementer", stage=stage.context.get("module_name") or stage.name)
 
         with mcp_clients() as mcp:
             agent = Agent(
@@ -126,6 +127,7 @@ class ImplementerTask(Task):
                 llm=llm,
                 non_interactive=True,
                 mcp_clients=mcp,
+                checkpoint=AgentCheckpoint.for_stage(stage, "implementer"),
             )
 
             try:
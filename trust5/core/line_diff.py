@@ -0,0 +1,65 @@
+"""Unified diffs for the ``KDIF`` blocks emitted by ``Write`` and ``Edit``.
+
+The block only shows the first 60 lines, but ``difflib.unified_diff`` is
+quadratic in the worst case and dominates tool latency on large files.
+Small inputs still go through ``difflib``; above ``DIFF_LINEAR_THRESHOLD``
+characters the diff is computed in linear time from line hashes: the
+common prefix and suffix are trimmed and the changed middle is reported as
+one hunk.  That is exact for a single contiguous change (the common case
+for ``Edit``) and a coarser but still correct patch otherwise.
+
+Callers only build diffs when ``message.has_block_consumers()`` says the
+block will be seen by someone.
+"""
+
+from __future__ import annotations
+
+import difflib
+
+from .constants import DIFF_LINEAR_THRESHOLD
+
+_CONTEXT = 3
+
+
+def unified_diff(old: str, new: str, fromfile: str, tofile: str, max_lines: int = 0) -> str:
+    """Unified diff of *old* and *new*; with *max_lines*, later lines are summarized in a trailer."""
+    a, b = old.splitlines(), new.splitlines()
+    if len(old) + len(new) <= DIFF_LINEAR_THRESHOLD:
+        rows = list(difflib.unified_diff(a, b, fromfile=fromfile, tofile=tofile, lineterm=""))
+    else:
+        rows = _linear_diff(a, b, fromfile, tofile)
+    if max_lines > 0 and len(rows) > max_lines:
+        rows = rows[:max_lines] + [f"... [{len(rows) - max_lines} more lines]"]
+    return "\n".join(rows)
+
+
+def _linear_diff(a: list[str], b: list[str], fromfile: str, tofile: str) -> list[str]:
+    ha, hb = [hash(line) for line in a], [hash(line) for line in b]
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and ha[prefix] == hb[prefix] and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and ha[-1 - suffix] == hb[-1 - suffix] and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    if prefix == len(a) == len(b):
+        return []
+
+    start = max(prefix - _CONTEXT, 0)
+    a_end = min(len(a) - suffix + _CONTEXT, len(a))
+    b_end = min(len(b) - suffix + _CONTEXT, len(b))
+    rows = [f"--- {fromfile}", f"+++ {tofile}", f"@@ -{_span(start, a_end)} +{_span(start, b_end)} @@"]
+    rows += [f" {line}" for line in a[start:prefix]]
+    rows += [f"-{line}" for line in a[prefix : len(a) - suffix]]
+    rows += [f"+{line}" for line in b[prefix : len(b) - suffix]]
+    rows += [f" {line}" for line in a[len(a) - suffix : a_end]]
+    return rows
+
+
+def _span(start: int, end: int) -> str:
+    """Hunk range in unified-diff notation (1-based start, line count)."""
+    count = end - start
+    if count == 1:
+        return str(start + 1)
+    return f"{start + 1 if count else start},{count}"
@@ -0,0 +1,106 @@
+"""Cached line-offset index for ranged ``Read`` calls.
+
+Agents page through large generated files and logs 100-200 lines at a
+time.  ``Tools.read_file`` with ``offset``/``limit`` used to ``readlines()``
+the whole file for every page; now the first ranged read of a file builds
+the byte offset of every line start (one pass over an ``mmap``) and each
+page seeks straight to its byte range and decodes only those lines.
+
+Indexes are keyed by real path and revalidated against ``file_key`` --
+``(real path, mtime_ns, size)`` -- on every use, so a rewritten file is
+re-indexed.  ``tool_cache`` stamps ``Read``/``ReadFiles`` results with the
+same key, and ``ReadFiles`` uses the index to report the line count of
+files too large to return whole.
+
+Lines end at ``\\n`` (a ``\\r\\n`` ending is returned as ``\\n``, as text
+mode does).
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+
+_MAX_CACHED = 32
+_NEWLINE = re.compile(b"\n")
+
+
+def file_key(path: str) -> tuple[str, int, int] | None:
+    """``(real path, mtime_ns, size)`` of *path*, or None if it cannot be stat-ed."""
+    real = os.path.realpath(path)
+    try:
+        st = os.stat(real)
+    except OSError:
+        return None
+    return real, st.st_mtime_ns, st.st_size
+
+
+@dataclass(frozen=True)
+class LineIndex:
+    key: tuple[str, int, int]
+    # byte offset where each line starts, plus the file size as a final sentinel
+    starts: array[int]
+
+    @property
+    def lines(self) -> int:
+        return len(self.starts) - 1
+
+    def byte_range(self, start: int, end: int) -> tuple[int, int]:
+        """Byte span of 0-indexed lines ``[start, end)``, clamped to the file."""
+        start = min(max(start, 0), self.lines)
+        end = min(max(end, start), self.lines)
+        return self.starts[start], self.starts[end]
+
+
+def _build(key: tuple[str, int, int]) -> LineIndex:
+    real, _, size = key
+    starts = array("Q", [0])
+    if size:
+        with open(real, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            starts.extend(m.end() for m in _NEWLINE.finditer(mm))
+            if starts[-1] != len(mm):
+                starts.append(len(mm))  # last line has no trailing newline
+            size = len(mm)
+    return LineIndex((real, key[1], size), starts)
+
+
+_cache: OrderedDict[str, LineIndex] = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_line_index(path: str) -> LineIndex:
+    """The line index of *path*, rebuilt if the file changed since it was cached."""
+    key = file_key(path)
+    if key is None:
+        raise FileNotFoundError(f"No such file or directory: '{path}'")
+    with _lock:
+        index = _cache.get(key[0])
+        if index is not None and index.key == key:
+            _cache.move_to_end(key[0])
+            return index
+    index = _build(key)
+    with _lock:
+        _cache[key[0]] = index
+        _cache.move_to_end(key[0])
+        while len(_cache) > _MAX_CACHED:
+            _cache.popitem(last=False)
+    return index
+
+
+def read_lines(path: str, offset: int | None = None, limit: int | None = None) -> str:
+    """Lines ``offset`` (1-indexed) through ``offset + limit - 1`` with a ``[Lines a-b of n]`` header."""
+    index = get_line_index(path)
+    total = index.lines
+    start = max(0, (offset or 1) - 1)
+    end = start + limit if limit else total
+    lo, hi = index.byte_range(start, end)
+    with open(index.key[0], "rb") as f:
+        f.seek(lo)
+        data = f.read(hi - lo)
+    text = data.decode("utf-8").replace("\r\n", "\n")
+    return f"[Lines {start + 1}-{min(end, total)} of {total}]\n" + text
@@ -9,9 +9,13 @@ import requests
 from resilient_circuit import CircuitProtectorPolicy, ExponentialDelay
 from resilient_circuit.exceptions import ProtectedCallError
 
+from .auth import token_cache
 from .constants import (
     LLM_CONNECT_TIMEOUT,
     LLM_MAX_BACKOFF_DELAY,
+    LLM_HEDGE_REQUESTS,
+    LLM_PROMPT_CACHING,
+    LLM_RATE_LIMITER,
     LLM_RETRY_BUDGET_CONNECT,
     LLM_RETRY_BUDGET_RATE,
     LLM_RETRY_BUDGET_SERVER,
@@ -22,7 +26,9 @@ from .constants import (
     STREAM_READ_TIMEOUT_STANDARD,
     STREAM_READ_TIMEOUT_THINKING,
 )
+from .http_pool import auth_identity, get_session
 from .llm_backends import LLMBackendsMixin
+from .llm_cassette import active_cassette
 from .llm_constants import (
     MODEL_CONTEXT_WINDOW,
     _ANTHROPIC_THINKING_BUDGET,  # noqa: F401 — re-export
@@ -30,9 +36,14 @@ from .llm_constants import (
 )
 from .llm_constants import RETRY_DELAY_CONNECT as _LLC_RETRY_DELAY_CONNECT
 from .llm_constants import RETRY_DELAY_SERVER as _LLC_RETRY_DELAY_SERVER
+from .llm_encoder import ConversationEncoder
 from .llm_errors import LLMError as LLMError  # noqa: F401 — re-export for backward compat
+from .llm_hedge import HEDGE_TIERS, LLMHedgeMixin
+from .llm_metrics import LLMMetricsMixin
 from .llm_streams import LLMStreamsMixin
 from .message import M, emit
+from .rate_limiter import get_limiter
+from .token_counter import calibrate, calibration_factor, message_tokens, scaled, tools_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -54,24 +65,39 @@ MAX_BACKOFF_DELAY = LLM_MAX_BACKOFF_DELAY
 # ── C5: Context window pre-validation ─────────────────────────────────
 
 
-def estimate_token_count(messages: list[dict[str, str]]) -> int:
-    """Estimate token count from messages using ~4 chars per token heuristic."""
-    total_chars = sum(len(m.get("content", "")) for m in messages)
-    return total_chars // 4
+def estimate_token_count(messages: list[dict[str, Any]], model: str | None = None) -> int:
+    """Estimate prompt tokens for *messages* with the active token counter.
+
+    Per-message counts are memoized (see ``token_counter``), and *model*
+    applies the ratio learned from that provider's reported ``input_tokens``.
+    """
+    return scaled(sum(message_tokens(m) for m in messages), model)
 
 
-def _trim_messages_to_context(messages: list[dict[str, str]], max_tokens: int) -> list[dict[str, str]]:
+def _trim_messages_to_context(
+    messages: list[dict[str, Any]],
+    max_tokens: int,
+    model: str | None = None,
+) -> list[dict[str, Any]]:
     """Trim oldest non-system messages until estimated tokens fit within max_tokens.
 
     System messages are always preserved. At least one non-system message is kept.
+    Single pass: per-message counts are computed once and subtracted as the
+    oldest messages are dropped.
     """
     system = [m for m in messages if m.get("role") == "system"]
     non_system = [m for m in messages if m.get("role") != "system"]
 
-    while estimate_token_count(system + non_system) > max_tokens and len(non_system) > 1:
-        non_system.pop(0)
+    factor = calibration_factor(model)
+    counts = [message_tokens(m) for m in non_system]
+    total = sum(message_tokens(m) for m in system) + sum(counts)
+    drop = 0
+    while int(total * factor) > max_tokens and len(non_system) - drop > 1:
+        total -= counts[drop]
+        drop += 1
+
+    return system + non_system[drop:]
 
-    return system + non_system
 
 # Backoff strategies per error class (using resilient-circuit)
 _BACKOFF_CONNECT = ExponentialDelay(
@@ -152,7 +178,7 @@ def _resolve_thinking_level(
     return "low" if tier in thinking_tiers else None
 
 
-class LLM(LLMBackendsMixin, LLMStreamsMixin):
+class LLM(LLMBackendsMixin, LLMStreamsMixin, LLMHedgeMixin, LLMMetricsMixin):
     """Multi-provider LLM client with streaming, retry, and circuit breaker.
 
     Supports Anthropic (Claude), Google (Gemini), and Ollama backends.
@@ -171,6 +197,9 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
         auth_header: str | None = None,
         auth_token: str | None = None,
         provider_name: str | None = None,
+        prompt_caching: bool | None = None,
+        hedge: bool = False,
+        labels: dict[str, str] | None = None,
     ):
         self.model = model
         self.base_url = base_url
@@ -178,15 +207,23 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
         self.fallback_models = fallback_models or []
         self.thinking_level = thinking_level
         self.backend = backend
+        self.prompt_caching = LLM_PROMPT_CACHING if prompt_caching is None else prompt_caching
+        self.hedge = hedge
+        self.labels = dict(labels or {})  # telemetry labels: tier, agent, stage
         emit(M.MMDL, f"model={model} backend={backend} thinking={thinking_level or 'off'}")
         if provider_name:
             emit(M.MPRF, f"provider={provider_name}")
         self._auth_header = auth_header
         self._provider_name = provider_name
         self._abort = threading.Event()
-        self._token_lock = threading.Lock()
-        self._session = requests.Session()
-        self._session.headers.update({"Content-Type": "application/json"})
+        # Per-call state (encoder bound by chat()); thread-local so concurrent
+        # calls on one instance never see each other's encoder.
+        self._call_local = threading.local()
+        # Shared per provider so parallel modules single-flight token refreshes
+        self._token_lock = token_cache.refresh_lock(provider_name) if provider_name else threading.Lock()
+        # Shared per endpoint + credentials: keeps TCP/TLS connections warm across instances
+        identity = auth_identity(auth_header, auth_token, provider_name)
+        self._session = get_session(base_url, backend, identity)
         if auth_header and auth_token:
             if auth_header == "Authorization":
                 self._session.headers[auth_header] = f"Bearer {auth_token}"
@@ -223,16 +260,22 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
         tier: str = "default",
         stage_name: str | None = None,
         thinking_level: str | None = None,
+        stage: str = "",
         **kwargs: Any,
     ) -> "LLM":
         """Create an LLM instance for the given tier, reading models from global config.
 
         Model resolution: always ``~/.trust5/config.yaml`` → ``models.<provider>.<tier>``.
         Pydantic defaults in config.py serve as built-in fallback when YAML omits a section.
+        *stage* (the pipeline stage or module making the calls) is recorded in the
+        telemetry labels next to the tier and the agent (*stage_name*).
         """
         from .auth.registry import get_active_token
         from .config import load_global_config
 
+        kwargs.setdefault("hedge", bool(LLM_HEDGE_REQUESTS) and tier in HEDGE_TIERS)
+        kwargs.setdefault("labels", {"tier": tier, "agent": stage_name or "", "stage": stage})
+
         gcfg = load_global_config()
         active = get_active_token()
         if active is not None:
@@ -277,13 +320,40 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
         tools: list[dict[str, Any]] | None = None,
         model: str | None = None,
         timeout: int | None = None,
+        encoder: ConversationEncoder | None = None,
+    ) -> dict[str, Any]:
+        """Send *messages* and return the assembled response, with retry and fallback.
+
+        Pass the same *encoder* on every turn of a conversation so history
+        converted on earlier turns is reused instead of re-encoded.
+        """
+        previous = getattr(self._call_local, "encoder", None), getattr(self._call_local, "metrics", None)
+        self._call_local.encoder = encoder
+        metrics = self._call_local.metrics = self._begin_metrics(model or self.model)
+        try:
+            result = self._chat_models(messages, tools, model, timeout)
+        except LLMError as e:
+            metrics.finish(None, e.error_class)
+            raise
+        finally:
+            self._call_local.encoder, self._call_local.metrics = previous
+        metrics.finish(result)
+        return result
+
+    def _chat_models(
+        self,
+        messages: list[dict[str, str]],
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        timeout: int | None,
     ) -> dict[str, Any]:
         effective_model = model or self.model
         effective_timeout = timeout or self.timeout
         models_to_try = [effective_model] + [m for m in self.fallback_models if m != effective_model]
 
         last_error = None
-        for try_model in models_to_try:
+        for idx, try_model in enumerate(models_to_try):
+            self._note_attempt(try_model, idx)
             circuit = _get_model_circuit(try_model)
             try:
                 circuit._status.validate_execution()
@@ -291,8 +361,12 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
                 emit(M.AFBK, f"Circuit open for {try_model}, skipping to fallback.")
                 continue
 
+            hedge_with = models_to_try[idx + 1] if self.hedge and idx + 1 < len(models_to_try) else None
             try:
-                result = self._chat_with_retry(messages, tools, try_model, effective_timeout)
+                if hedge_with is not None:
+                    result = self._chat_hedged(messages, tools, try_model, hedge_with, effective_timeout)
+                else:
+                    result = self._chat_with_retry(messages, tools, try_model, effective_timeout)
                 circuit._status.mark_success()
                 circuit._save_state()
                 return result
@@ -328,26 +402,35 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
         Sleep is interruptible via ``self._abort`` so watchdog can cancel.
         """
         # C5: Pre-validate context window and trim if oversized
+        tool_tokens = tools_tokens(tools)
+        input_tokens = estimate_token_count(messages, model)
         context_limit = MODEL_CONTEXT_WINDOW.get(model)
         if context_limit is not None:
-            estimated = estimate_token_count(messages)
+            estimated = input_tokens + scaled(tool_tokens, model)
             threshold = int(context_limit * 0.9)
             if estimated > threshold:
                 emit(
                     M.ARTY,
-                    f"Estimated {estimated} tokens exceeds 90% of {model} context window ({context_limit}), trimming messages",
+                    f"Estimated {estimated} tokens exceeds 90% of {model} context window "
+                    f"({context_limit}), trimming messages",
                 )
-                messages = _trim_messages_to_context(messages, threshold)
+                budget = threshold - scaled(tool_tokens, model)
+                messages = _trim_messages_to_context(messages, budget, model)
+                input_tokens = estimate_token_count(messages, model)
+        self._call_local.input_tokens = input_tokens  # charged to the rate limiter in _post
 
         start = time.monotonic()
         attempt = 0
         while True:
             try:
-                return self._do_chat(messages, tools, model, timeout)
+                result = self._do_chat(messages, tools, model, timeout)
+                self._calibrate_from_usage(model, messages, tool_tokens, result)
+                return result
             except LLMError as e:
                 if not e.retryable:
                     raise
                 attempt += 1
+                self._note_retry()
                 elapsed = time.monotonic() - start
                 delay: float
                 if e.error_class == "connection":
@@ -370,6 +453,22 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
                 if self._abort.wait(timeout=delay):
                     raise  # aborted during retry sleep
 
+    @staticmethod
+    def _calibrate_from_usage(
+        model: str,
+        messages: list[dict[str, Any]],
+        tool_tokens: int,
+        result: dict[str, Any],
+    ) -> None:
+        """Teach the token counter from the provider-reported prompt size."""
+        usage = result.get("usage")
+        if not isinstance(usage, dict):
+            return
+        reported = usage.get("input_tokens", 0)
+        if isinstance(reported, int) and reported > 0:
+            raw = sum(message_tokens(m) for m in messages) + tool_tokens
+            calibrate(model, raw, reported)
+
     def _do_chat(
         self,
         messages: list[dict[str, str]],
@@ -399,16 +498,26 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
             f"timeout={timeout}s",
         )
 
-    def _post(self, url: str, payload: dict[str, Any], model: str, timeout: int) -> requests.Response:
+    def _send(self, url: str, payload: dict[str, Any] | bytes, read_timeout: int) -> requests.Response:
+        """POST a JSON body — either a dict or pre-serialized bytes from the encoder."""
+        if isinstance(payload, bytes):
+            return self._session.post(url, data=payload, timeout=(CONNECT_TIMEOUT, read_timeout), stream=True)
+        return self._session.post(url, json=payload, timeout=(CONNECT_TIMEOUT, read_timeout), stream=True)
+
+    def _post(self, url: str, payload: dict[str, Any] | bytes, model: str, timeout: int) -> requests.Response:
+        cassette = active_cassette()
+        if cassette is not None and cassette.replaying:
+            return cassette.replay(url, payload, model)  # type: ignore[return-value]
         self._ensure_token_fresh()
         read_timeout = self._stream_read_timeout
+        limiter = get_limiter(self._provider_name or self.backend, model) if LLM_RATE_LIMITER else None
+        if limiter is not None:
+            # Token-counter estimate of the messages, against the tokens-per-minute budget
+            limiter.acquire(getattr(self._call_local, "input_tokens", 0), self._abort)
+        self._call_local.sent_at = time.monotonic()  # first-token latency (see LLMHedgeMixin)
+        sent_auth = self._session.headers.get(self._auth_header) if self._auth_header else None
         try:
-            response = self._session.post(
-                url,
-                json=payload,
-                timeout=(CONNECT_TIMEOUT, read_timeout),
-                stream=True,
-            )
+            response = self._send(url, payload, read_timeout)
         except requests.exceptions.ConnectTimeout:
             raise LLMError(
                 f"Connection timeout ({CONNECT_TIMEOUT}s) for {model}",
@@ -444,6 +553,9 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
                 error_class="permanent",
             )
 
+        if limiter is not None:
+            limiter.update(response.headers, response.status_code)
+
         if response.status_code == 429:
             retry_after = float(response.headers.get("Retry-After", "60"))
             raise LLMError(
@@ -462,19 +574,14 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
             )
 
         if response.status_code == 401 and self._auth_header and self._provider_name:
-            refreshed = self._try_refresh_token()
+            refreshed = self._try_refresh_token(sent_auth)
             if refreshed:
                 emit(
                     M.ARTY,
                     f"Token refreshed for {self._provider_name}, retrying request",
                 )
                 try:
-                    response = self._session.post(
-                        url,
-                        json=payload,
-                        timeout=(CONNECT_TIMEOUT, read_timeout),
-                        stream=True,
-                    )
+                    response = self._send(url, payload, read_timeout)
                 except requests.exceptions.RequestException as e:
                     raise LLMError(
                         f"Retry after refresh failed for {model}: {e}",
@@ -529,29 +636,60 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
                 error_class="permanent",
             )
 
+        if cassette is not None:
+            return cassette.record(url, payload, model, response)  # type: ignore[no-any-return]
         return response
 
     def _ensure_token_fresh(self) -> None:
         if not self._provider_name or not self._auth_header:
             return
-        with self._token_lock:
-            try:
-                from .auth.token_store import TokenStore
-
-                store = TokenStore()
-                token_data = store.load(self._provider_name)
-                if token_data is None or token_data.expires_at is None:
+        try:
+            # Fast path: in-memory token, no store decryption unless the file changed
+            token_data = token_cache.get_token(self._provider_name, TOKEN_REFRESH_MARGIN)
+            if token_data is None:
+                return
+            if not token_cache.near_expiry(token_data, TOKEN_REFRESH_MARGIN):
+                self._apply_token(token_data.access_token)
+                return
+            with self._token_lock:
+                # Single-flight: another LLM may have refreshed while we waited
+                token_data = token_cache.get_token(self._provider_name, TOKEN_REFRESH_MARGIN)
+                if token_data is None:
                     return
-                remaining = token_data.expires_at - time.time()
-                if remaining > TOKEN_REFRESH_MARGIN:
+                if not token_cache.near_expiry(token_data, TOKEN_REFRESH_MARGIN):
+                    self._apply_token(token_data.access_token)
                     return
+                remaining = token_data.expires_at - time.time()
                 emit(M.ARTY, f"Token expires in {remaining:.0f}s, refreshing proactively")
                 self._try_refresh_token_locked()
-            except (OSError, ValueError, RuntimeError):  # token check: auth/store errors
-                logger.debug("Proactive token refresh check failed", exc_info=True)
+        except (OSError, ValueError, RuntimeError):  # token check: auth/store errors
+            logger.debug("Proactive token refresh check failed", exc_info=True)
+
+    def _auth_value(self, access_token: str) -> str:
+        return f"Bearer {access_token}" if self._auth_header == "Authorization" else access_token
+
+    def _apply_token(self, access_token: str) -> None:
+        if not self._auth_header:
+            return
+        value = self._auth_value(access_token)
+        if self._session.headers.get(self._auth_header) != value:
+            self._session.headers[self._auth_header] = value
 
-    def _try_refresh_token(self) -> bool:
+    def _try_refresh_token(self, failed_auth: str | bytes | None = None) -> bool:
+        """Refresh after a 401 on a request sent with header value *failed_auth*.
+
+        Single-flight: if another request refreshed the token while this one
+        waited for the lock, the new token is applied without refreshing again.
+        """
         with self._token_lock:
+            if failed_auth is not None and self._provider_name:
+                try:
+                    current = token_cache.get_token(self._provider_name, 0)
+                except (OSError, ValueError, RuntimeError):  # token check: auth/store errors
+                    current = None
+                if current is not None and self._auth_value(current.access_token) != failed_auth:
+                    self._apply_token(current.access_token)
+                    return True
             return self._try_refresh_token_locked()
 
     def _try_refresh_token_locked(self) -> bool:
@@ -580,10 +718,8 @@ class LLM(LLMBackendsMixin, LLMStreamsMixin):
             try:
                 new_token = provider.refresh(token_data)
                 store.save(self._provider_name, new_token)
-                if self._auth_header == "Authorization":
-                    self._session.headers[self._auth_header] = f"Bearer {new_token.access_token}"
-                else:
-                    self._session.headers[self._auth_header] = new_token.access_token
+                token_cache.put_token(self._provider_name, new_token)
+                self._apply_token(new_token.access_token)
                 logger.info("Token refreshed mid-pipeline for %s (attempt %d)", self._provider_name, attempt)
                 return True
             except requests.exceptions.ConnectionError as e:
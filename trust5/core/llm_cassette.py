@@ -0,0 +1,235 @@
+"""Record/replay cassette for LLM traffic.
+
+``trust5 develop --record DIR`` saves every streamed LLM response to *DIR*,
+keyed by a hash of the normalized request.  ``--replay DIR`` serves those
+responses back from disk with no network: ``LLM._post`` returns a
+``ReplayResponse`` that yields the recorded lines, so the normal
+``_consume_stream`` / ``_consume_anthropic_stream`` /
+``_consume_google_stream`` paths run unchanged.  This gives a fixed LLM
+workload for profiling the rest of the pipeline (validate, quality,
+mutation, TUI) and for re-running regressions in seconds.
+
+Each response is one JSON file named ``<sequence>-<key prefix>.json``.
+Only complete streams are saved: the consumer must reach the terminal
+event (``message_stop``, ``[DONE]``, Ollama's ``"done": true``) or the end
+of ``iter_lines``.  Aborted reads (a hedge loser, a stream timeout) are
+discarded so replay never serves a truncated response.
+Replay matches on the exact request key first.  When nothing matches (a
+tool result that embeds a timing or a temp path changes the hash), it
+falls back to the next unplayed recording for the same model in
+recording order.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import deque
+from collections.abc import Iterator
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+
+from .llm_errors import LLMError
+from .message import M, emit
+
+logger = logging.getLogger(__name__)
+
+# Request fields that never change what the model says.
+_VOLATILE_FIELDS = ("stream",)
+
+
+def request_key(url: str, payload: dict[str, Any] | bytes, model: str) -> str:
+    """Stable hash of a request: endpoint path, model and body with sorted keys."""
+    body: Any = payload
+    if isinstance(payload, bytes):
+        try:
+            body = json.loads(payload)
+        except (json.JSONDecodeError, ValueError):
+            body = payload.decode("utf-8", errors="replace")
+    if isinstance(body, dict):
+        body = {k: v for k, v in body.items() if k not in _VOLATILE_FIELDS}
+    path = urlsplit(url).path
+    normalized = json.dumps([path, model, body], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ReplayResponse:
+    """Stands in for a streamed ``requests.Response`` during replay."""
+
+    status_code = 200
+
+    def __init__(self, lines: list[str]) -> None:
+        self._lines = lines
+        self.headers: dict[str, str] = {}
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self._lines)
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator[Any]:
+        for line in self._lines:
+            yield line if decode_unicode else line.encode("utf-8")
+
+    def close(self) -> None:
+        pass
+
+
+def _is_terminal(line: str) -> bool:
+    """True for the line that ends a streamed response."""
+    text = line.strip()
+    if text in ("event: message_stop", "data: [DONE]"):
+        return True
+    if text.startswith("{") and '"done"' in text:  # Ollama NDJSON
+        try:
+            return bool(json.loads(text).get("done"))
+        except (ValueError, AttributeError):
+            return False
+    return False
+
+
+class RecordingResponse:
+    """Wraps a live response and saves the lines the stream consumer read, once it read them all."""
+
+    def __init__(self, response: requests.Response, on_close: Any) -> None:
+        self._response = response
+        self._lines: list[str] = []
+        self._on_close = on_close
+        self._closed = False
+        self.complete = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator[Any]:
+        source: Iterator[Any] = (
+            self._response.iter_lines(decode_unicode=True) if decode_unicode else self._response.iter_lines()
+        )
+        for line in source:
+            text = line.decode("utf-8", errors="replace") if isinstance(line, bytes) else line
+            self._lines.append(text)
+            if _is_terminal(text):
+                self.complete = True
+            yield line
+        self.complete = True
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            if self.complete:
+                self._on_close(self._lines)
+            else:
+                logger.debug("Not recording an incomplete stream (%d lines read)", len(self._lines))
+        self._response.close()
+
+
+class Cassette:
+    """A directory of recorded LLM responses, in record or replay mode."""
+
+    def __init__(self, directory: str, mode: str) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        self.directory = directory
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._by_key: dict[str, deque[dict[str, Any]]] = {}
+        self._by_model: dict[str, deque[dict[str, Any]]] = {}
+        os.makedirs(directory, exist_ok=True)
+        if mode == "replay":
+            self._load()
+        else:
+            self._seq = len(self._entry_files())
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _entry_files(self) -> list[str]:
+        return sorted(f for f in os.listdir(self.directory) if f.endswith(".json"))
+
+    def _load(self) -> None:
+        for name in self._entry_files():
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    entry: dict[str, Any] = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Skipping unreadable cassette entry %s: %s", name, e)
+                continue
+            entry["played"] = False
+            self._by_key.setdefault(entry["key"], deque()).append(entry)
+            self._by_model.setdefault(entry.get("model", ""), deque()).append(entry)
+        logger.info("Cassette loaded: %d responses from %s", sum(map(len, self._by_key.values())), self.directory)
+
+    # ── record ────────────────────────────────────────────────────────
+
+    def record(self, url: str, payload: dict[str, Any] | bytes, model: str, response: requests.Response) -> Any:
+        key = request_key(url, payload, model)
+        path = urlsplit(url).path
+
+        def save(lines: list[str]) -> None:
+            with self._lock:
+                seq = self._seq
+                self._seq += 1
+            entry = {"key": key, "model": model, "path": path, "lines": lines}
+            target = os.path.join(self.directory, f"{seq:06d}-{key[:16]}.json")
+            try:
+                with open(target, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+            except OSError as e:
+                logger.warning("Failed to write cassette entry %s: %s", target, e)
+
+        return RecordingResponse(response, save)
+
+    # ── replay ────────────────────────────────────────────────────────
+
+    def replay(self, url: str, payload: dict[str, Any] | bytes, model: str) -> ReplayResponse:
+        key = request_key(url, payload, model)
+        with self._lock:
+            entry = self._next(self._by_key.get(key), reuse_last=True)
+            exact = entry is not None
+            if entry is None:
+                entry = self._next(self._by_model.get(model), reuse_last=False)
+            if entry is not None:
+                entry["played"] = True
+        if entry is None:
+            raise LLMError(
+                f"Cassette has no recorded response for {model} (request {key[:12]})",
+                retryable=False,
+                error_class="permanent",
+            )
+        if not exact:
+            emit(M.SWRN, f"Cassette: no exact match for {model} request {key[:12]}, replaying in recorded order")
+        return ReplayResponse(list(entry["lines"]))
+
+    @staticmethod
+    def _next(entries: deque[dict[str, Any]] | None, reuse_last: bool) -> dict[str, Any] | None:
+        """First unplayed entry; with *reuse_last*, an exhausted list replays its last response."""
+        if not entries:
+            return None
+        for entry in entries:
+            if not entry["played"]:
+                return entry
+        return entries[-1] if reuse_last else None
+
+
+_active: Cassette | None = None
+
+
+def configure_cassette(directory: str | None, mode: str = "record") -> None:
+    """Enable record/replay for all LLM calls in this process (``None`` disables)."""
+    global _active
+    _active = Cassette(directory, mode) if directory else None
+    if _active is not None:
+        emit(M.SINF, f"LLM cassette: {mode} {os.path.abspath(directory or '')}")
+
+
+def active_cassette() -> Cassette | None:
+    return _active
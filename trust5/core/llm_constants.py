@@ -25,3 +25,9 @@ RETRY_DELAY_SERVER = 10  # lower initial base — Full Jitter handles growth
 
 _ANTHROPIC_THINKING_BUDGET: dict[str, int] = {"low": 5000, "high": 10000}
 _GEMINI_25_THINKING_BUDGET: dict[str, int] = {"low": 5000, "high": 10000}
+
+# ── Prompt caching ───────────────────────────────────────────────────────────
+
+# Anthropic allows 4 cache breakpoints per request: tools + system use two,
+# the rest roll forward over the most recent user-role history messages.
+_ANTHROPIC_CACHE_HISTORY_BREAKPOINTS = 2
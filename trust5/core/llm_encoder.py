@@ -0,0 +1,294 @@
+"""Incremental request-body encoder for multi-turn LLM conversations.
+
+An Agent sends the same (growing) history on every turn.  Converting that
+history to a provider's wire format — re-parsing tool-call arguments,
+rebuilding content blocks, JSON-encoding every message — is pure repeated
+work.  ``ConversationEncoder`` memoizes the converted *and serialized* form
+of each message (keyed by object identity), so each turn only encodes the
+messages appended since the previous turn.  Tool schemas are memoized the
+same way.  The result is a ready-to-send ``bytes`` body for ``LLM._post``.
+
+One encoder belongs to one conversation (one Agent).  It is thread-safe so
+a hedged request can encode the same history from a second thread.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from .llm_constants import _ANTHROPIC_CACHE_HISTORY_BREAKPOINTS
+
+_CACHE_CONTROL: dict[str, str] = {"type": "ephemeral"}
+
+# Prune memo entries once the cache holds this many times more entries
+# than the current conversation (messages dropped by history trimming).
+_PRUNE_FACTOR = 2
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def build_body(payload: dict[str, Any], fragments: dict[str, str] | None = None) -> bytes:
+    """Serialize *payload*, splicing in pre-serialized JSON *fragments* by key."""
+    head = _dumps(payload)
+    if not fragments:
+        return head.encode("utf-8")
+    extra = ", ".join(f"{_dumps(key)}: {value}" for key, value in fragments.items())
+    sep = ", " if head != "{}" else ""
+    return (head[:-1] + sep + extra + "}").encode("utf-8")
+
+
+@dataclass
+class _Entry:
+    """Memoized encoding of one source message."""
+
+    source: dict[str, Any]
+    seed: int  # position-dependent input (Anthropic fallback tool-id counter)
+    encoded: dict[str, Any] | None  # None for system messages
+    serialized: str
+    text: str = ""  # system text
+    tool_calls: int = 0
+
+
+@dataclass
+class AnthropicEncoding:
+    system: str
+    messages_json: str
+    tools_json: str | None
+
+
+@dataclass
+class GoogleEncoding:
+    system: str
+    contents_json: str
+    tools_json: str | None
+
+
+def _parse_args(raw: Any) -> Any:
+    try:
+        return json.loads(raw if isinstance(raw, str) else "{}")
+    except (json.JSONDecodeError, ValueError):
+        return {}
+
+
+def _anthropic_message(msg: dict[str, Any], counter: int) -> tuple[dict[str, Any] | None, str, int]:
+    """Convert one message; returns (api_message, system_text, tool_calls_consumed)."""
+    role = msg.get("role", "")
+    if role == "system":
+        return None, msg.get("content", "") + "\n", 0
+    if role == "assistant":
+        content_blocks: list[dict[str, Any]] = []
+        text = msg.get("content", "")
+        if text:
+            content_blocks.append({"type": "text", "text": text})
+        calls = msg.get("tool_calls", [])
+        for n, tc in enumerate(calls, start=1):
+            fn = tc.get("function", {})
+            content_blocks.append(
+                {
+                    "type": "tool_use",
+                    "id": tc.get("id", f"toolu_{counter + n:04d}"),
+                    "name": fn.get("name", ""),
+                    "input": _parse_args(fn.get("arguments", "{}")),
+                }
+            )
+        return {"role": "assistant", "content": content_blocks if content_blocks else text}, "", len(calls)
+    if role == "tool":
+        tc_id = msg.get("tool_call_id", f"toolu_{counter:04d}")
+        block = {"type": "tool_result", "tool_use_id": tc_id, "content": msg.get("content", "")}
+        return {"role": "user", "content": [block]}, "", 0
+    return msg, "", 0
+
+
+def _google_message(msg: dict[str, Any]) -> tuple[dict[str, Any] | None, str]:
+    """Convert one message; returns (content_entry, system_text)."""
+    role = msg.get("role", "")
+    if role == "system":
+        return None, msg.get("content", "") + "\n"
+    if role == "assistant":
+        parts: list[dict[str, Any]] = []
+        text = msg.get("content", "")
+        if text:
+            parts.append({"text": text})
+        for tc in msg.get("tool_calls", []):
+            fn = tc.get("function", {})
+            fc_part: dict[str, Any] = {
+                "functionCall": {"name": fn.get("name", ""), "args": _parse_args(fn.get("arguments", "{}"))}
+            }
+            if tc.get("thought_signature"):
+                fc_part["thoughtSignature"] = tc["thought_signature"]
+            parts.append(fc_part)
+        return ({"role": "model", "parts": parts} if parts else None), ""
+    if role == "tool":
+        raw_content = msg.get("content", "")
+        try:
+            response_data = json.loads(raw_content)
+            # Gemini requires response to be a dict (Struct), not a list
+            if not isinstance(response_data, dict):
+                response_data = {"result": response_data}
+        except (json.JSONDecodeError, ValueError, TypeError):
+            response_data = {"result": raw_content}
+        fr = {"functionResponse": {"name": msg.get("name", "unknown"), "response": response_data}}
+        return {"role": "user", "parts": [fr]}, ""
+    return {"role": "user", "parts": [{"text": msg.get("content", "")}]}, ""
+
+
+def _convert_tool(tool: dict[str, Any], schema_key: str) -> dict[str, Any]:
+    fn = tool.get("function", tool)
+    return {
+        "name": fn.get("name", ""),
+        "description": fn.get("description", ""),
+        schema_key: fn.get("parameters", {}),
+    }
+
+
+class ConversationEncoder:
+    """Memoizing per-conversation encoder for Anthropic, Google and Ollama bodies."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._memo: dict[str, dict[int, _Entry]] = {"anthropic": {}, "google": {}, "ollama": {}}
+        self._tools_memo: dict[tuple[str, bool], tuple[list[dict[str, Any]], int, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ── public API ────────────────────────────────────────────────────
+
+    def encode_anthropic(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        cache_control: bool = False,
+    ) -> AnthropicEncoding:
+        """Encode history + tools; with *cache_control*, mark rolling cache breakpoints."""
+        with self._lock:
+            memo = self._memo["anthropic"]
+            entries: list[_Entry] = []
+            counter = 0
+            for msg in messages:
+                entry = memo.get(id(msg))
+                if entry is None or entry.source is not msg or entry.seed != counter:
+                    self.misses += 1
+                    encoded, text, used = _anthropic_message(msg, counter)
+                    serialized = _dumps(encoded) if encoded is not None else ""
+                    entry = _Entry(msg, counter, encoded, serialized, text, used)
+                    memo[id(msg)] = entry
+                else:
+                    self.hits += 1
+                counter += entry.tool_calls
+                entries.append(entry)
+            self._prune(memo, entries)
+
+            system = "".join(e.text for e in entries).strip()
+            api_entries = [e for e in entries if e.encoded is not None]
+            pieces = [e.serialized for e in api_entries]
+            if cache_control:
+                self._mark_history(api_entries, pieces)
+            tools_json = self._tools_json("anthropic", tools, "input_schema", cache_control)
+            return AnthropicEncoding(system, "[" + ", ".join(pieces) + "]", tools_json)
+
+    def encode_google(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+    ) -> GoogleEncoding:
+        with self._lock:
+            memo = self._memo["google"]
+            entries: list[_Entry] = []
+            for msg in messages:
+                entry = memo.get(id(msg))
+                if entry is None or entry.source is not msg:
+                    self.misses += 1
+                    encoded, text = _google_message(msg)
+                    serialized = _dumps(encoded) if encoded is not None else ""
+                    entry = _Entry(msg, 0, encoded, serialized, text)
+                    memo[id(msg)] = entry
+                else:
+                    self.hits += 1
+                entries.append(entry)
+            self._prune(memo, entries)
+
+            system = "".join(e.text for e in entries).strip()
+            pieces = [e.serialized for e in entries if e.encoded is not None]
+            tools_json = self._tools_json("google", tools, "parameters", False)
+            return GoogleEncoding(system, "[" + ", ".join(pieces) + "]", tools_json)
+
+    def encode_ollama(self, messages: list[dict[str, Any]]) -> str:
+        """Ollama takes messages verbatim — only the serialization is memoized."""
+        with self._lock:
+            memo = self._memo["ollama"]
+            entries: list[_Entry] = []
+            for msg in messages:
+                entry = memo.get(id(msg))
+                if entry is None or entry.source is not msg:
+                    self.misses += 1
+                    entry = _Entry(msg, 0, msg, _dumps(msg))
+                    memo[id(msg)] = entry
+                else:
+                    self.hits += 1
+                entries.append(entry)
+            self._prune(memo, entries)
+            return "[" + ", ".join(e.serialized for e in entries) + "]"
+
+    # ── internals ─────────────────────────────────────────────────────
+
+    @staticmethod
+    def _prune(memo: dict[int, _Entry], live: list[_Entry]) -> None:
+        if len(memo) <= _PRUNE_FACTOR * max(len(live), 1):
+            return
+        keep = {id(e.source) for e in live}
+        for key in [k for k in memo if k not in keep]:
+            del memo[key]
+
+    @staticmethod
+    def _mark_history(api_entries: list[_Entry], pieces: list[str]) -> None:
+        """Re-serialize the most recent user-role messages with a cache breakpoint.
+
+        Marked copies are never stored, so the breakpoint rolls forward
+        each turn while the memoized (unmarked) encodings stay reusable.
+        """
+        marked = 0
+        for idx in range(len(api_entries) - 1, -1, -1):
+            if marked >= _ANTHROPIC_CACHE_HISTORY_BREAKPOINTS:
+                break
+            encoded = api_entries[idx].encoded
+            if encoded is None or encoded.get("role") != "user":
+                continue
+            content = encoded.get("content")
+            if isinstance(content, str):
+                if not content:
+                    continue
+                blocks: list[dict[str, Any]] = [{"type": "text", "text": content}]
+            elif isinstance(content, list) and content:
+                blocks = list(content)
+            else:
+                continue
+            blocks[-1] = {**blocks[-1], "cache_control": _CACHE_CONTROL}
+            pieces[idx] = _dumps({**encoded, "content": blocks})
+            marked += 1
+
+    def _tools_json(
+        self,
+        fmt: str,
+        tools: list[dict[str, Any]] | None,
+        schema_key: str,
+        cache_control: bool,
+    ) -> str | None:
+        if not tools:
+            return None
+        key = (fmt, cache_control)
+        cached = self._tools_memo.get(key)
+        if cached is not None and cached[0] is tools and cached[1] == len(tools):
+            return cached[2]
+        converted = [_convert_tool(t, schema_key) for t in tools]
+        if cache_control:
+            converted[-1] = {**converted[-1], "cache_control": _CACHE_CONTROL}
+        serialized = _dumps(converted)
+        if fmt == "google":
+            serialized = '[{"functionDeclarations": ' + serialized + "}]"
+        self._tools_memo[key] = (tools, len(tools), serialized)
+        return serialized
@@ -0,0 +1,177 @@
+"""Hedged LLM requests: race the next fallback model when the primary is slow.
+
+Tail latency on short "fast"/"watchdog" calls is dominated by a slow first
+token.  When hedging is on, ``_chat_hedged`` sends the request to the
+primary model and, if no first token has arrived within a per-model delay
+(derived from recently observed time-to-first-token), sends the same
+request to the next model in the fallback chain.  Whichever streams first
+is kept; the other is cancelled through its own abort event.
+
+Each racer runs on a shallow copy of the ``LLM`` with its own abort event
+and thread-local state, so cancelling the loser never aborts the winner.
+The caller's abort (watchdog) is forwarded to both.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from .constants import LLM_HEDGE_MAX_DELAY, LLM_HEDGE_MIN_DELAY
+from .llm_errors import LLMError
+from .message import M, emit
+
+# Tiers that hedge when ``llm.hedge_requests`` is enabled.
+HEDGE_TIERS = frozenset({"fast", "watchdog"})
+
+_SAMPLE_WINDOW = 50
+_MIN_SAMPLES = 5
+_HEDGE_PERCENTILE = 0.9
+_HEDGE_FACTOR = 1.5
+_POLL_INTERVAL = 0.1
+
+_ttft: dict[str, deque[float]] = {}
+_ttft_lock = threading.Lock()
+
+
+def record_first_token(model: str, seconds: float) -> None:
+    with _ttft_lock:
+        samples = _ttft.get(model)
+        if samples is None:
+            samples = _ttft[model] = deque(maxlen=_SAMPLE_WINDOW)
+        samples.append(seconds)
+
+
+def hedge_delay(model: str) -> float:
+    """Seconds to wait for *model*'s first token before hedging.
+
+    1.5x the observed p90 time-to-first-token, clamped to the configured
+    bounds.  Until enough samples exist the maximum delay is used.
+    """
+    lo, hi = float(LLM_HEDGE_MIN_DELAY), float(LLM_HEDGE_MAX_DELAY)
+    with _ttft_lock:
+        samples = sorted(_ttft.get(model, ()))
+    if len(samples) < _MIN_SAMPLES:
+        return hi
+    p90 = samples[min(int(len(samples) * _HEDGE_PERCENTILE), len(samples) - 1)]
+    return min(max(p90 * _HEDGE_FACTOR, lo), hi)
+
+
+def reset_latency_samples() -> None:
+    with _ttft_lock:
+        _ttft.clear()
+
+
+@dataclass
+class _Racer:
+    model: str
+    llm: Any
+    first_token: threading.Event = field(default_factory=threading.Event)
+    done: threading.Event = field(default_factory=threading.Event)
+    result: dict[str, Any] | None = None
+    error: Exception | None = None
+
+    @property
+    def started_streaming(self) -> bool:
+        return self.first_token.is_set()
+
+
+class LLMHedgeMixin:
+    """Mixin providing hedged chat for ``LLM``.
+
+    First tokens are signalled through ``_call_local.first_token`` by
+    ``LLMMetricsMixin._note_first_chunk``.
+    """
+
+    def _start_racer(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        timeout: int,
+    ) -> _Racer:
+        clone: Any = copy.copy(self)
+        clone._abort = threading.Event()
+        clone._call_local = threading.local()
+        racer = _Racer(model, clone)
+        encoder = getattr(self._call_local, "encoder", None)  # type: ignore[attr-defined]
+        metrics = getattr(self._call_local, "metrics", None)  # type: ignore[attr-defined]
+
+        def run() -> None:
+            clone._call_local.encoder = encoder
+            clone._call_local.metrics = metrics
+            clone._call_local.first_token = racer.first_token
+            try:
+                racer.result = clone._chat_with_retry(messages, tools, model, timeout)
+            except Exception as e:  # re-raised in the calling thread
+                racer.error = e
+            finally:
+                racer.done.set()
+
+        threading.Thread(target=run, name=f"hedge-{model}", daemon=True).start()
+        return racer
+
+    def _await(self, racers: list[_Racer], until: float | None) -> None:
+        """Wait until a racer streams or finishes, the caller aborts, or *until* passes."""
+        while until is None or time.monotonic() < until:
+            if any(r.started_streaming or r.done.is_set() for r in racers):
+                return
+            if self._abort.wait(timeout=_POLL_INTERVAL):  # type: ignore[attr-defined]
+                for r in racers:
+                    r.llm.abort()
+                return
+
+    def _chat_hedged(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str,
+        backup_model: str,
+        timeout: int,
+    ) -> dict[str, Any]:
+        primary = self._start_racer(model, messages, tools, timeout)
+        delay = hedge_delay(model)
+        self._await([primary], time.monotonic() + delay)
+        racers = [primary]
+        if not (primary.started_streaming or primary.done.is_set() or self._abort.is_set()):  # type: ignore[attr-defined]
+            emit(M.AFBK, f"No first token from {model} after {delay:.1f}s, hedging with {backup_model}")
+            racers.append(self._start_racer(backup_model, messages, tools, timeout))
+
+        winner = self._pick_winner(racers)
+        for r in racers:
+            if r is not winner:
+                r.llm.abort()
+        self._forward_abort(winner)
+        if winner is not primary:
+            emit(M.AFBK, f"Hedged request: {winner.model} streamed first, cancelled {model}")
+        if winner.error is not None:
+            raise winner.error
+        if winner.result is None:
+            raise LLMError(f"Hedged request to {winner.model} returned no result", retryable=True, error_class="server")
+        return winner.result
+
+    def _pick_winner(self, racers: list[_Racer]) -> _Racer:
+        """First racer to stream wins; a racer that fails before streaming yields to the others."""
+        pending = list(racers)
+        while True:
+            self._await(pending, None)
+            streaming = [r for r in pending if r.started_streaming]
+            if streaming:
+                return streaming[0]
+            finished = [r for r in pending if r.done.is_set()]
+            for r in finished:
+                if r.error is None or len(pending) == 1:
+                    return r
+                pending.remove(r)
+            if self._abort.is_set():  # type: ignore[attr-defined]
+                return pending[0]
+
+    def _forward_abort(self, racer: _Racer) -> None:
+        """Block until *racer* finishes, passing on a watchdog abort."""
+        while not racer.done.wait(timeout=_POLL_INTERVAL):
+            if self._abort.is_set():  # type: ignore[attr-defined]
+                racer.llm.abort()
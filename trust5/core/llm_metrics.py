@@ -0,0 +1,225 @@
+"""Per-call LLM latency and throughput telemetry.
+
+Every ``LLM.chat`` call produces one ``CallMetrics`` record: time to first
+token, time to first tool call, streaming tokens/sec, total duration,
+retry count and fallback hops, labeled by stage, agent, tier, model and
+provider.  Records live in a bounded in-process registry; ``dump_metrics``
+writes them to ``.trust5/metrics/`` as JSON lines and ``summarize`` /
+``trust5 metrics`` aggregate them afterward (e.g. to choose tiers or tune
+``AGENT_PER_TURN_TIMEOUT`` from observed p90 durations).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from .llm_hedge import record_first_token
+
+logger = logging.getLogger(__name__)
+
+_MAX_RECORDS = 10_000
+METRICS_DIR = os.path.join(".trust5", "metrics")
+
+
+@dataclass
+class CallMetrics:
+    """Telemetry for one ``LLM.chat`` call (all durations in seconds)."""
+
+    model: str
+    provider: str
+    tier: str = ""
+    agent: str = ""
+    stage: str = ""
+    started_at: float = field(default_factory=time.time)
+    first_token_s: float | None = None  # request sent -> first content chunk
+    first_tool_call_s: float | None = None  # request sent -> first tool call block
+    duration_s: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    tokens_per_sec: float | None = None
+    retries: int = 0
+    fallback_hops: int = 0
+    outcome: str = "ok"
+    error_class: str = ""
+    _t0: float = field(default_factory=time.monotonic, repr=False)
+    _first_token_at: float | None = field(default=None, repr=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if not k.startswith("_")}
+
+    def finish(self, result: dict[str, Any] | None, error_class: str = "") -> None:
+        end = time.monotonic()
+        self.duration_s = round(end - self._t0, 3)
+        if error_class:
+            self.outcome = "error"
+            self.error_class = error_class
+        if result is not None:
+            raw_usage = result.get("usage")
+            usage: dict[str, Any] = raw_usage if isinstance(raw_usage, dict) else {}
+            self.input_tokens = int(usage.get("input_tokens") or result.get("prompt_eval_count") or 0)
+            self.output_tokens = int(usage.get("output_tokens") or result.get("eval_count") or 0)
+            if self._first_token_at is not None and self.output_tokens:
+                streaming = end - self._first_token_at
+                if streaming > 0:
+                    self.tokens_per_sec = round(self.output_tokens / streaming, 1)
+        _registry.record(self)
+
+
+class MetricsRegistry:
+    """Thread-safe, bounded store of completed call records."""
+
+    def __init__(self, max_records: int = _MAX_RECORDS) -> None:
+        self._lock = threading.Lock()
+        self._records: deque[CallMetrics] = deque(maxlen=max_records)
+
+    def record(self, metrics: CallMetrics) -> None:
+        with self._lock:
+            self._records.append(metrics)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [m.to_dict() for m in self._records]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(int(len(ordered) * pct), len(ordered) - 1)], 3)
+
+
+def summarize(records: list[dict[str, Any]], by: str = "model") -> dict[str, dict[str, Any]]:
+    """Aggregate call records per *by* label (model, provider, tier, agent or stage)."""
+    groups: dict[str, list[dict[str, Any]]] = {}
+    for rec in records:
+        groups.setdefault(str(rec.get(by, "")), []).append(rec)
+    summary: dict[str, dict[str, Any]] = {}
+    for key, recs in sorted(groups.items()):
+        ttft = [r["first_token_s"] for r in recs if r.get("first_token_s") is not None]
+        durations = [r["duration_s"] for r in recs]
+        tps = [r["tokens_per_sec"] for r in recs if r.get("tokens_per_sec")]
+        summary[key] = {
+            "calls": len(recs),
+            "errors": sum(1 for r in recs if r.get("outcome") != "ok"),
+            "retries": sum(int(r.get("retries", 0)) for r in recs),
+            "fallback_hops": sum(int(r.get("fallback_hops", 0)) for r in recs),
+            "ttft_p50": _percentile(ttft, 0.5),
+            "ttft_p90": _percentile(ttft, 0.9),
+            "duration_p50": _percentile(durations, 0.5),
+            "duration_p90": _percentile(durations, 0.9),
+            "tokens_per_sec_p50": _percentile(tps, 0.5),
+        }
+    return summary
+
+
+def dump_metrics(project_root: str | None = None) -> str | None:
+    """Write the registry to ``.trust5/metrics/llm-calls-<time>-<pid>.jsonl``; returns the path."""
+    records = _registry.snapshot()
+    if not records:
+        return None
+    metrics_dir = os.path.join(project_root or os.getcwd(), METRICS_DIR)
+    path = os.path.join(metrics_dir, f"llm-calls-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl")
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+    except OSError as e:
+        logger.warning("Failed to write LLM metrics to %s: %s", path, e)
+        return None
+    return path
+
+
+def load_metrics(project_root: str | None = None) -> list[dict[str, Any]]:
+    """Read every dumped record under ``.trust5/metrics/``."""
+    metrics_dir = os.path.join(project_root or os.getcwd(), METRICS_DIR)
+    records: list[dict[str, Any]] = []
+    if not os.path.isdir(metrics_dir):
+        return records
+    for name in sorted(os.listdir(metrics_dir)):
+        if not name.endswith(".jsonl"):
+            continue
+        try:
+            with open(os.path.join(metrics_dir, name), encoding="utf-8") as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Skipping unreadable metrics file %s: %s", name, e)
+    return records
+
+
+class LLMMetricsMixin:
+    """Mixin collecting ``CallMetrics`` for the current ``chat()`` call.
+
+    The record is bound to ``self._call_local.metrics`` (copied onto hedge
+    racers), so stream consumers and the retry loop can annotate it.
+    """
+
+    def _begin_metrics(self, model: str) -> CallMetrics:
+        labels: dict[str, str] = getattr(self, "labels", {})
+        return CallMetrics(
+            model=model,
+            provider=self._provider_name or self.backend,  # type: ignore[attr-defined]
+            tier=labels.get("tier", ""),
+            agent=labels.get("agent", ""),
+            stage=labels.get("stage", ""),
+        )
+
+    def _current_metrics(self) -> CallMetrics | None:
+        local = getattr(self, "_call_local", None)
+        return getattr(local, "metrics", None) if local is not None else None
+
+    def _note_attempt(self, model: str, hop: int) -> None:
+        metrics = self._current_metrics()
+        if metrics is not None:
+            metrics.model = model
+            metrics.fallback_hops = hop
+
+    def _note_retry(self) -> None:
+        metrics = self._current_metrics()
+        if metrics is not None:
+            metrics.retries += 1
+
+    def _since_sent(self) -> float | None:
+        sent_at = getattr(self._call_local, "sent_at", None)  # type: ignore[attr-defined]
+        return None if sent_at is None else time.monotonic() - sent_at
+
+    def _note_first_chunk(self, model: str) -> None:
+        """Called by stream consumers on the first content chunk of a response."""
+        local = getattr(self, "_call_local", None)
+        if local is None:
+            return
+        elapsed = self._since_sent()
+        if elapsed is not None:
+            record_first_token(model, elapsed)
+        metrics = getattr(local, "metrics", None)
+        if metrics is not None and metrics.first_token_s is None:
+            metrics.first_token_s = None if elapsed is None else round(elapsed, 3)
+            metrics._first_token_at = time.monotonic()
+        event = getattr(local, "first_token", None)
+        if event is not None:
+            event.set()
+
+    def _note_first_tool_call(self) -> None:
+        """Called by stream consumers when the first tool call block starts."""
+        metrics = self._current_metrics()
+        if metrics is not None and metrics.first_tool_call_s is None:
+            elapsed = self._since_sent()
+            metrics.first_tool_call_s = None if elapsed is None else round(elapsed, 3)
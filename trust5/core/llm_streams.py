@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import json
-import time
 from typing import Any
 
 import requests
@@ -12,11 +11,22 @@ from .constants import RETRY_DELAY_SERVER, STREAM_TOTAL_TIMEOUT
 from .llm_constants import MODEL_CONTEXT_WINDOW, RETRY_DELAY_CONNECT
 from .llm_errors import LLMError
 from .message import M, emit, emit_stream_end, emit_stream_start, emit_stream_token
+from .stream_parser import StreamReader, loads
 
 
 class LLMStreamsMixin:
     """Mixin providing stream consumption for each backend."""
 
+    def _stream_reader(self, response: requests.Response) -> StreamReader:
+        return StreamReader(response, self._abort, STREAM_TOTAL_TIMEOUT)  # type: ignore[attr-defined]
+
+    @staticmethod
+    def _report_stop(reader: StreamReader, model: str) -> None:
+        if reader.stopped == "abort":
+            emit(M.SWRN, f"[{model}] LLM call aborted by watchdog")
+        elif reader.stopped == "timeout":
+            emit(M.SWRN, f"[{model}] Stream total timeout ({STREAM_TOTAL_TIMEOUT}s)")
+
     def _consume_stream(
         self,
         response: requests.Response,
@@ -27,22 +37,18 @@ class LLMStreamsMixin:
         final_data: dict[str, Any] = {}
         thinking_started = False
         response_started = False
-        stream_start = time.monotonic()
+        first_chunk = True
 
         try:
-            for raw_line in response.iter_lines(decode_unicode=True):
-                if self._abort.is_set():  # type: ignore[attr-defined]
-                    emit(M.SWRN, f"[{model}] LLM call aborted by watchdog")
-                    break
-                if time.monotonic() - stream_start > STREAM_TOTAL_TIMEOUT:
-                    emit(M.SWRN, f"[{model}] Stream total timeout ({STREAM_TOTAL_TIMEOUT}s)")
-                    break
-                if not raw_line:
-                    continue
+            reader = self._stream_reader(response)
+            for raw_line in reader:
                 try:
-                    chunk = json.loads(raw_line)
-                except (json.JSONDecodeError, ValueError):
+                    chunk = loads(raw_line)
+                except ValueError:
                     continue
+                if first_chunk:
+                    first_chunk = False
+                    self._note_first_chunk(model)  # type: ignore[attr-defined]
 
                 if "error" in chunk and "message" not in chunk:
                     raise LLMError(
@@ -76,11 +82,14 @@ class LLMStreamsMixin:
 
                 chunk_tc = msg.get("tool_calls", [])
                 if chunk_tc:
+                    if not tool_calls_agg:
+                        self._note_first_tool_call()  # type: ignore[attr-defined]
                     tool_calls_agg.extend(chunk_tc)
 
                 if chunk.get("done", False):
                     final_data = chunk
                     break
+            self._report_stop(reader, model)
         except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
             raise LLMError(
                 f"Stream interrupted for {model}: {e}",
@@ -136,40 +145,42 @@ class LLMStreamsMixin:
         input_json_parts: list[str] = []
         input_tokens = 0
         output_tokens = 0
-        stream_start = time.monotonic()
+        cache_read_tokens = 0
+        cache_write_tokens = 0
+        first_chunk = True
 
         try:
-            for raw_line in response.iter_lines(decode_unicode=True):
-                if self._abort.is_set():  # type: ignore[attr-defined]
-                    emit(M.SWRN, f"[{model}] LLM call aborted by watchdog")
-                    break
-                if time.monotonic() - stream_start > STREAM_TOTAL_TIMEOUT:
-                    emit(M.SWRN, f"[{model}] Stream total timeout ({STREAM_TOTAL_TIMEOUT}s)")
-                    break
-                if not raw_line:
-                    continue
-                if raw_line.startswith("event: "):
-                    event_type = raw_line[7:].strip()
-                    if event_type == "message_stop":
+            reader = self._stream_reader(response)
+            for raw_line in reader:
+                if raw_line.startswith(b"event: "):
+                    if raw_line[7:].strip() == b"message_stop":
                         break
                     continue
-                if not raw_line.startswith("data: "):
+                if not raw_line.startswith(b"data: "):
                     continue
 
                 try:
-                    data = json.loads(raw_line[6:])
-                except (json.JSONDecodeError, ValueError):
+                    data = loads(raw_line[6:])
+                except ValueError:
                     continue
 
                 evt = data.get("type", "")
+                if first_chunk and evt.startswith("content_block"):
+                    first_chunk = False
+                    self._note_first_chunk(model)  # type: ignore[attr-defined]
 
                 if evt == "message_start":
                     usage = data.get("message", {}).get("usage", {})
                     input_tokens = usage.get("input_tokens", 0)
+                    # Prompt caching: input_tokens excludes cached prefix tokens
+                    cache_read_tokens = usage.get("cache_read_input_tokens", 0) or 0
+                    cache_write_tokens = usage.get("cache_creation_input_tokens", 0) or 0
 
                 elif evt == "content_block_start":
                     block = data.get("content_block", {})
                     if block.get("type") == "tool_use":
+                        if not tool_calls_agg and not current_tool:
+                            self._note_first_tool_call()  # type: ignore[attr-defined]
                         current_tool = {
                             "id": block.get("id", ""),
                             "function": {
@@ -223,6 +234,7 @@ class LLMStreamsMixin:
                         retry_after=10,
                         error_class="server",
                     )
+            self._report_stop(reader, model)
         finally:
             if thinking_started:
                 emit_stream_end()
@@ -244,11 +256,17 @@ class LLMStreamsMixin:
             M.CRES,
             f"LLM response model={model} content={len(full_content)} chars tool_calls={tc_count} tokens={total_tokens}",
         )
-        emit(M.MTKN, f"in={input_tokens} out={output_tokens} total={total_tokens}")
+        emit(
+            M.MTKN,
+            f"in={input_tokens} out={output_tokens} total={total_tokens} "
+            f"cache_read={cache_read_tokens} cache_write={cache_write_tokens}",
+        )
+        prompt_tokens = input_tokens + cache_read_tokens + cache_write_tokens
         ctx_window = MODEL_CONTEXT_WINDOW.get(model, 200_000)
-        emit(M.MCTX, f"used={input_tokens} remaining={ctx_window - input_tokens} window={ctx_window}")
+        emit(M.MCTX, f"used={prompt_tokens} remaining={ctx_window - prompt_tokens} window={ctx_window}")
 
-        return {"message": assembled_msg, "done": True}
+        usage = {"input_tokens": prompt_tokens, "output_tokens": output_tokens}
+        return {"message": assembled_msg, "done": True, "usage": usage}
 
     def _consume_google_stream(self, response: requests.Response, model: str) -> dict[str, Any]:
         content_parts: list[str] = []
@@ -257,22 +275,17 @@ class LLMStreamsMixin:
         response_started = False
         input_tokens = 0
         output_tokens = 0
-        stream_start = time.monotonic()
+        first_chunk = True
 
         try:
-            for raw_line in response.iter_lines(decode_unicode=True):
-                if self._abort.is_set():  # type: ignore[attr-defined]
-                    emit(M.SWRN, f"[{model}] LLM call aborted by watchdog")
-                    break
-                if time.monotonic() - stream_start > STREAM_TOTAL_TIMEOUT:
-                    emit(M.SWRN, f"[{model}] Stream total timeout ({STREAM_TOTAL_TIMEOUT}s)")
-                    break
-                if not raw_line or not raw_line.startswith("data: "):
+            reader = self._stream_reader(response)
+            for raw_line in reader:
+                if not raw_line.startswith(b"data: "):
                     continue
 
                 try:
-                    data = json.loads(raw_line[6:])
-                except (json.JSONDecodeError, ValueError):
+                    data = loads(raw_line[6:])
+                except ValueError:
                     continue
 
                 if "error" in data:
@@ -297,6 +310,9 @@ class LLMStreamsMixin:
                 candidates = data.get("candidates", [])
                 if not candidates:
                     continue
+                if first_chunk:
+                    first_chunk = False
+                    self._note_first_chunk(model)  # type: ignore[attr-defined]
 
                 parts = candidates[0].get("content", {}).get("parts", [])
                 for part in parts:
@@ -322,6 +338,8 @@ class LLMStreamsMixin:
                             content_parts.append(text)
 
                     elif "functionCall" in part:
+                        if not tool_calls_agg:
+                            self._note_first_tool_call()  # type: ignore[attr-defined]
                         fc = part["functionCall"]
                         tc: dict[str, Any] = {
                             "id": f"call_{len(tool_calls_agg):04d}",
@@ -333,6 +351,7 @@ class LLMStreamsMixin:
                         if part.get("thoughtSignature"):
                             tc["thought_signature"] = part["thoughtSignature"]
                         tool_calls_agg.append(tc)
+            self._report_stop(reader, model)
         finally:
             if thinking_started:
                 emit_stream_end()
@@ -358,4 +377,5 @@ class LLMStreamsMixin:
         ctx_window = MODEL_CONTEXT_WINDOW.get(model, 1_048_576)
         emit(M.MCTX, f"used={input_tokens} remaining={ctx_window - input_tokens} window={ctx_window}")
 
-        return {"message": assembled_msg, "done": True}
+        usage = {"input_tokens": input_tokens, "output_tokens": output_tokens}
+        return {"message": assembled_msg, "done": True, "usage": usage}
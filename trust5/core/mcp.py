@@ -1,15 +1,32 @@
 import json
 import logging
 import os
-import select
 import subprocess
+import threading
+from collections.abc import Iterator
 from typing import Any
 
+from .mcp_rpc import MultiplexedRPC, PendingRequests, RPCStats
+
 logger = logging.getLogger(__name__)
 
+_HANDSHAKE = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {},
+    "clientInfo": {"name": "trust5", "version": "0.1.0"},
+}
+
+
+def _is_response(msg: Any) -> bool:
+    return isinstance(msg, dict) and "id" in msg and ("result" in msg or "error" in msg)
+
 
-class MCPClient:
-    """JSON-RPC 2.0 stdio client for Model Context Protocol servers."""
+class MCPClient(MultiplexedRPC):
+    """JSON-RPC 2.0 stdio client for Model Context Protocol servers.
+
+    Requests are multiplexed: any number of threads may call the server at
+    once, and a reader thread per process matches responses to callers by id.
+    """
 
     def __init__(
         self,
@@ -17,38 +34,43 @@ class MCPClient:
         env: dict[str, str] | None = None,
         name: str = "mcp",
         start_timeout: float = 30.0,
+        request_timeout: float | None = None,
     ):
         self.name = name
         self.command = command
         self.env = env or os.environ.copy()
         self.start_timeout = start_timeout
+        self.request_timeout = request_timeout or start_timeout
         self.process: subprocess.Popen[str] | None = None
         self.server_capabilities: dict[str, Any] = {}
-        self.msg_id = 0
+        self.tools: list[dict[str, Any]] | None = None
+        self.rpc_stats = RPCStats()
+        self._pending = PendingRequests(name, self.rpc_stats)
+        self._write_lock = threading.Lock()
 
     @property
     def is_running(self) -> bool:
         return self.process is not None and self.process.poll() is None
 
     def start(self) -> None:
+        # stderr is discarded: a long-lived server would block once an unread pipe fills up
         self.process = subprocess.Popen(
             self.command,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             env=self.env,
             text=True,
         )
+        self._pending = PendingRequests(self.name, self.rpc_stats)
+        threading.Thread(
+            target=self._read_loop,
+            args=(self.process, self._pending),
+            name=f"mcp-{self.name}-reader",
+            daemon=True,
+        ).start()
         try:
-            self._send_request(
-                "initialize",
-                {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {"name": "trust5", "version": "0.1.0"},
-                },
-            )
-            resp = self._read_response()
+            resp = self._send_request("initialize", _HANDSHAKE, timeout=self.start_timeout)
             self.server_capabilities = resp.get("result", {}).get("capabilities", {})
             self._send_notification("notifications/initialized")
         except (OSError, RuntimeError):  # MCP server start/handshake errors
@@ -77,65 +99,65 @@ class MCPClient:
                         pass  # Race: process exited between poll() and kill()
             self.process = None
 
-    def list_tools(self) -> list[dict[str, Any]]:
-        resp = self._send_request("tools/list")
-        result: list[dict[str, Any]] = resp.get("result", {}).get("tools", [])
-        return result
+    def list_tools(self, refresh: bool = False) -> list[dict[str, Any]]:
+        """Tool catalog of the server; fetched once, then served from cache."""
+        if self.tools is None or refresh:
+            resp = self._send_request("tools/list")
+            self.tools = resp.get("result", {}).get("tools", [])
+        return list(self.tools)
 
-    def call_tool(self, name: str, arguments: dict[str, Any]) -> dict[str, Any] | None:
-        resp = self._send_request("tools/call", {"name": name, "arguments": arguments})
+    def ping(self) -> bool:
+        """Round-trip health check; any JSON-RPC reply (even an error) means alive."""
+        try:
+            self._send_request("ping")
+        except (OSError, RuntimeError, ValueError):  # ping: dead process/connection
+            return False
+        return True
+
+    def call_tool(
+        self,
+        name: str,
+        arguments: dict[str, Any],
+        timeout: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, Any] | None:
+        params = {"name": name, "arguments": arguments}
+        resp = self._send_request("tools/call", params, timeout=timeout, cancel=cancel)
         result: dict[str, Any] | None = resp.get("result")
         return result
 
-    def _send_request(self, method: str, params: Any = None) -> dict[str, Any]:
-        self.msg_id += 1
-        req = {"jsonrpc": "2.0", "id": self.msg_id, "method": method}
-        if params is not None:
-            req["params"] = params
-
-        self._write_json(req)
-        return self._read_response()
-
-    def _send_notification(self, method: str, params: Any = None) -> None:
-        req: dict[str, Any] = {"jsonrpc": "2.0", "method": method}
-        if params is not None:
-            req["params"] = params
-        self._write_json(req)
-
-    def _write_json(self, data: dict[str, Any]) -> None:
+    def _transmit(self, message: dict[str, Any]) -> None:
         if not self.process or not self.process.stdin:
             raise RuntimeError(f"MCP server '{self.name}' not running")
 
-        json_str = json.dumps(data)
-        self.process.stdin.write(json_str + "\n")
-        self.process.stdin.flush()
-
-    def _read_response(self) -> dict[str, Any]:
-        if not self.process or not self.process.stdout:
-            raise RuntimeError(f"MCP server '{self.name}' not running")
-
-        fd = self.process.stdout.fileno()
-        ready, _, _ = select.select([fd], [], [], self.start_timeout)
-        if not ready:
-            raise RuntimeError(f"MCP server '{self.name}' timed out after {self.start_timeout}s")
-
-        line = self.process.stdout.readline()
-        if not line:
-            raise RuntimeError(f"MCP server '{self.name}' closed connection")
+        json_str = json.dumps(message)
+        with self._write_lock:
+            self.process.stdin.write(json_str + "\n")
+            self.process.stdin.flush()
 
+    def _read_loop(self, process: "subprocess.Popen[str]", pending: PendingRequests) -> None:
+        """Dispatch every response line of *process* until its stdout closes."""
+        stdout = process.stdout
         try:
-            result: dict[str, Any] = json.loads(line)
-        except (json.JSONDecodeError, ValueError):
-            raise RuntimeError(f"MCP server '{self.name}' returned invalid JSON")
-        return result
-
-
-class MCPSSEClient:
+            for line in iter(stdout.readline, "") if stdout else ():
+                try:
+                    msg = json.loads(line)
+                except (json.JSONDecodeError, ValueError):
+                    logger.debug("Invalid JSON from MCP server '%s': %.200s", self.name, line)
+                    continue
+                if _is_response(msg):
+                    pending.resolve(msg)
+        except (OSError, ValueError):  # pipe closed under the reader
+            logger.debug("MCP server '%s' reader stopped", self.name, exc_info=True)
+        pending.fail_all(RuntimeError(f"MCP server '{self.name}' closed connection"))
+
+
+class MCPSSEClient(MultiplexedRPC):
     """MCP client using SSE (Server-Sent Events) transport.
 
-    Fully synchronous — no threading. Trust5 agents process tool calls
-    one at a time, so we simply POST a request then read the SSE stream
-    until the matching response arrives.
+    Requests are POSTed from the calling thread; one reader thread consumes
+    the SSE stream and completes each request's future by id, so calls from
+    several agents can be in flight at once.
 
     SSE protocol flow:
     1. GET /sse -> server opens SSE stream, sends 'endpoint' event with POST URL
@@ -152,12 +174,15 @@ class MCPSSEClient:
         self.url = url
         self.name = name
         self.timeout = timeout
-        self.msg_id = 0
+        self.request_timeout = timeout
         self._message_url: str | None = None
         self._session: Any = None
         self._sse_response: Any = None
-        self._sse_lines: Any = None
+        self._sse_events: Iterator[tuple[str, str]] | None = None
         self.server_capabilities: dict[str, Any] = {}
+        self.tools: list[dict[str, Any]] | None = None
+        self.rpc_stats = RPCStats()
+        self._pending = PendingRequests(name, self.rpc_stats)
 
     @property
     def is_running(self) -> bool:
@@ -174,10 +199,10 @@ class MCPSSEClient:
             timeout=self.timeout,
         )
         self._sse_response.raise_for_status()
-        self._sse_lines = self._sse_response.iter_lines(decode_unicode=True)
+        self._sse_events = self._iter_sse_events(self._sse_response.iter_lines(decode_unicode=True))
 
         # Read SSE stream until we get the 'endpoint' event
-        endpoint = self._read_sse_event("endpoint")
+        endpoint = next((data for kind, data in self._sse_events if kind == "endpoint"), None)
         if not endpoint:
             raise RuntimeError(f"MCP SSE server '{self.name}' didn't send endpoint event")
 
@@ -190,15 +215,16 @@ class MCPSSEClient:
         else:
             self._message_url = base + "/" + endpoint
 
+        self._pending = PendingRequests(self.name, self.rpc_stats)
+        threading.Thread(
+            target=self._read_loop,
+            args=(self._sse_events, self._pending),
+            name=f"mcp-{self.name}-reader",
+            daemon=True,
+        ).start()
+
         # MCP initialize handshake
-        resp = self._send_request(
-            "initialize",
-            {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {"name": "trust5", "version": "0.1.0"},
-            },
-        )
+        resp = self._send_request("initialize", _HANDSHAKE)
         self.server_capabilities = resp.get("result", {}).get("capabilities", {})
         self._send_notification("notifications/initialized")
 
@@ -216,54 +242,50 @@ class MCPSSEClient:
         self._sse_response = None
         self._session = None
         self._message_url = None
-        self._sse_lines = None
+        self._sse_events = None
 
-    def list_tools(self) -> list[dict[str, Any]]:
-        resp = self._send_request("tools/list")
-        result: list[dict[str, Any]] = resp.get("result", {}).get("tools", [])
-        return result
+    def list_tools(self, refresh: bool = False) -> list[dict[str, Any]]:
+        """Tool catalog of the server; fetched once, then served from cache."""
+        if self.tools is None or refresh:
+            resp = self._send_request("tools/list")
+            self.tools = resp.get("result", {}).get("tools", [])
+        return list(self.tools)
 
-    def call_tool(self, name: str, arguments: dict[str, Any]) -> dict[str, Any] | None:
-        resp = self._send_request("tools/call", {"name": name, "arguments": arguments})
+    def ping(self) -> bool:
+        """Round-trip health check; any JSON-RPC reply (even an error) means alive."""
+        try:
+            self._send_request("ping")
+        except (OSError, RuntimeError, ValueError):  # ping: dead process/connection
+            return False
+        return True
+
+    def call_tool(
+        self,
+        name: str,
+        arguments: dict[str, Any],
+        timeout: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, Any] | None:
+        params = {"name": name, "arguments": arguments}
+        resp = self._send_request("tools/call", params, timeout=timeout, cancel=cancel)
         result: dict[str, Any] | None = resp.get("result")
         return result
 
-    def _send_request(self, method: str, params: Any = None) -> dict[str, Any]:
-        self.msg_id += 1
-        msg_id = self.msg_id
-
-        req: dict[str, Any] = {"jsonrpc": "2.0", "id": msg_id, "method": method}
-        if params is not None:
-            req["params"] = params
-
-        # POST the JSON-RPC request
-        resp = self._session.post(
-            self._message_url,
-            json=req,
-            timeout=self.timeout,
-        )
+    def _transmit(self, message: dict[str, Any]) -> None:
+        session, url = self._session, self._message_url
+        if session is None or url is None:
+            raise RuntimeError(f"MCP SSE server '{self.name}' not connected")
+        # The response arrives on the SSE stream; the POST itself is only acknowledged.
+        resp = session.post(url, json=message, timeout=self.timeout)
         resp.raise_for_status()
 
-        # Read SSE stream until we get the matching response
-        return self._read_sse_response(msg_id)
-
-    def _send_notification(self, method: str, params: Any = None) -> None:
-        req: dict[str, Any] = {"jsonrpc": "2.0", "method": method}
-        if params is not None:
-            req["params"] = params
-
-        self._session.post(
-            self._message_url,
-            json=req,
-            timeout=self.timeout,
-        )
-
-    def _read_sse_event(self, target_type: str) -> str | None:
-        """Read SSE stream until an event of `target_type` arrives."""
+    @staticmethod
+    def _iter_sse_events(lines: Any) -> Iterator[tuple[str, str]]:
+        """Yield ``(event type, data)`` for each complete SSE event in *lines*."""
         event_type = ""
         data_lines: list[str] = []
 
-        for line in self._sse_lines:
+        for line in lines:
             if line is None:
                 continue
             if isinstance(line, bytes):
@@ -275,38 +297,26 @@ class MCPSSEClient:
                 data_lines.append(line[5:].strip())
             elif line == "":
                 # Empty line = end of SSE event
-                if data_lines and event_type == target_type:
-                    return "\n".join(data_lines)
-                event_type = ""
-                data_lines = []
-
-        return None
-
-    def _read_sse_response(self, msg_id: int) -> dict[str, Any]:
-        """Read SSE stream until a JSON-RPC response with matching id arrives."""
-        event_type = ""
-        data_lines: list[str] = []
-
-        for line in self._sse_lines:
-            if line is None:
-                continue
-            if isinstance(line, bytes):
-                line = line.decode("utf-8", errors="replace")
-
-            if line.startswith("event:"):
-                event_type = line[6:].strip()
-            elif line.startswith("data:"):
-                data_lines.append(line[5:].strip())
-            elif line == "":
-                if data_lines and event_type == "message":
-                    data = "\n".join(data_lines)
-                    try:
-                        msg: dict[str, Any] = json.loads(data)
-                        if msg.get("id") == msg_id:
-                            return msg
-                    except json.JSONDecodeError:
-                        logger.debug("Invalid JSON in SSE from '%s'", self.name)
+                if data_lines:
+                    yield event_type, "\n".join(data_lines)
                 event_type = ""
                 data_lines = []
 
-        raise RuntimeError(f"MCP SSE server '{self.name}' stream ended without response")
+    def _read_loop(self, events: Iterator[tuple[str, str]], pending: PendingRequests) -> None:
+        """Dispatch every ``message`` event of the stream until it ends."""
+        try:
+            for kind, data in events:
+                if kind != "message":
+                    continue
+                try:
+                    msg = json.loads(data)
+                except json.JSONDecodeError:
+                    logger.debug("Invalid JSON in SSE from '%s'", self.name)
+                    continue
+                if _is_response(msg):
+                    pending.resolve(msg)
+        except (OSError, ValueError, AttributeError):  # stream closed under the reader
+            logger.debug("MCP SSE server '%s' reader stopped", self.name, exc_info=True)
+        if pending is self._pending:
+            self._message_url = None
+        pending.fail_all(RuntimeError(f"MCP SSE server '{self.name}' stream ended"))
@@ -4,11 +4,12 @@ Provides a module-level singleton that loads MCP server config from
 .trust5/mcp.json at startup, then acts as a **factory** for creating
 per-agent MCP client instances on demand.
 
-Architecture: Each Agent gets its own exclusive set of MCP clients.
-This prevents shared-state concurrency bugs when Stabilize runs
-parallel pipeline stages (e.g., multi-module builds). The MCPManager
-itself holds only *configuration* — never live connections or
-subprocess handles.
+Architecture: The MCPManager itself holds only *configuration* — never
+live connections or subprocess handles. When the pool is enabled
+(``mcp.pool``, the default), init_mcp() also creates an MCPPool that
+starts each server once and leases long-lived clients to agents through
+mcp_clients(); with the pool disabled every mcp_clients() block gets a
+fresh, exclusive set of clients that is stopped on exit.
 
 Supports two transports:
 - stdio (default): spawns a subprocess, communicates via JSON-RPC on stdin/stdout
@@ -23,16 +24,26 @@ import logging
 import os
 import shutil
 import subprocess
+import threading
 from collections.abc import Generator
 from contextlib import contextmanager
 from typing import Any
 
+from .constants import (
+    MCP_HEALTH_CHECK_INTERVAL,
+    MCP_POOL,
+    MCP_POOL_MAX_PER_SERVER,
+    MCP_REQUEST_TIMEOUT,
+    MCP_START_TIMEOUT,
+)
 from .mcp import MCPClient, MCPSSEClient
+from .mcp_pool import MCPPool
 from .message import M, emit
 
 logger = logging.getLogger(__name__)
 
 _manager: "MCPManager | None" = None
+_pool: MCPPool | None = None
 
 # Default MCP config used when no .trust5/mcp.json exists.
 # Empty by default — MCP servers are opt-in. Users can configure
@@ -143,7 +154,20 @@ class MCPManager:
 
         return clients
 
-    def _create_client(self, name: str, server_def: dict[str, Any]) -> MCPClient | MCPSSEClient:
+    @property
+    def server_names(self) -> list[str]:
+        return list(self._server_configs)
+
+    def start_client(self, name: str, tools: list[dict[str, Any]] | None = None) -> MCPClient | MCPSSEClient:
+        """Start one client for server *name*; a known tool catalog skips ``tools/list``."""
+        return self._create_client(name, self._server_configs[name], tools)
+
+    def _create_client(
+        self,
+        name: str,
+        server_def: dict[str, Any],
+        tools: list[dict[str, Any]] | None = None,
+    ) -> MCPClient | MCPSSEClient:
         """Create, start, and return a single MCP client."""
         transport = server_def.get("transport", "stdio")
 
@@ -151,16 +175,25 @@ class MCPManager:
             client: MCPClient | MCPSSEClient = MCPSSEClient(
                 url=server_def["url"],
                 name=name,
+                timeout=MCP_REQUEST_TIMEOUT,
             )
             client.start()
+            client.tools = list(tools) if tools is not None else None
             tools = client.list_tools()
             emit(M.SINF, f"MCP server '{name}' connected via SSE ({len(tools)} tools)")
             return client
         else:
             command = self._build_command(server_def)
             env = self._build_env(server_def)
-            client = MCPClient(command=command, env=env, name=name)
+            client = MCPClient(
+                command=command,
+                env=env,
+                name=name,
+                start_timeout=MCP_START_TIMEOUT,
+                request_timeout=MCP_REQUEST_TIMEOUT,
+            )
             client.start()
+            client.tools = list(tools) if tools is not None else None
             tools = client.list_tools()
             emit(M.SINF, f"MCP server '{name}' started via stdio ({len(tools)} tools)")
             return client
@@ -219,20 +252,33 @@ class MCPManager:
 def init_mcp(config_path: str | None = None) -> None:
     """Initialize the global MCP manager (loads config, checks Docker).
 
-    Does NOT start any MCP servers. Servers are created on demand
-    via create_mcp_clients() or the mcp_clients() context manager.
+    With the pool enabled, also creates the shared MCPPool and starts one
+    instance of each server in the background, so the first agents find
+    them warm. Without it, servers are created on demand via
+    create_mcp_clients() or the mcp_clients() context manager.
     """
-    global _manager
+    global _manager, _pool
     if _manager is not None:
         return
     _manager = MCPManager(config_path)
     _manager.initialize()
+    if MCP_POOL and _manager.server_names:
+        _pool = MCPPool(
+            _manager.server_names,
+            _manager.start_client,
+            max_per_server=MCP_POOL_MAX_PER_SERVER,
+            health_interval=MCP_HEALTH_CHECK_INTERVAL,
+        )
+        threading.Thread(target=_pool.warm, name="mcp-pool-warm", daemon=True).start()
 
 
 def shutdown_mcp() -> None:
-    """Clear the global MCP manager."""
-    global _manager
+    """Stop pooled MCP servers and clear the global MCP manager."""
+    global _manager, _pool
+    if _pool is not None:
+        _pool.close()
     _manager = None
+    _pool = None
 
 
 def create_mcp_clients() -> list[MCPClient | MCPSSEClient]:
@@ -249,15 +295,23 @@ def create_mcp_clients() -> list[MCPClient | MCPSSEClient]:
 
 @contextmanager
 def mcp_clients() -> Generator[list[MCPClient | MCPSSEClient], None, None]:
-    """Context manager that creates exclusive MCP clients and ensures cleanup.
+    """Context manager that provides MCP clients and ensures cleanup.
 
     Usage::
 
         with mcp_clients() as clients:
             agent = Agent(name="impl", ..., mcp_clients=clients)
             result = agent.run(user_input)
-        # clients are automatically stopped here
+        # clients are returned to the pool (or stopped) here
     """
+    pool = _pool
+    if pool is not None:
+        leased = pool.lease()
+        try:
+            yield leased
+        finally:
+            pool.release(leased)
+        return
     clients = create_mcp_clients()
     try:
         yield clients
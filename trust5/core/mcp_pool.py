@@ -0,0 +1,170 @@
+"""Long-lived pool of MCP server clients shared by pipeline agents.
+
+Starting an MCP server is expensive: a stdio server is a fresh subprocess
+(often ``npx`` or ``docker``), an SSE server a new HTTP session, and both
+need the ``initialize`` handshake plus ``tools/list`` before the first call.
+``MCPPool`` keeps started clients alive for the whole run and leases them
+to agents instead:
+
+* ``lease`` hands out one client per configured server, preferring an
+  unleased instance; it starts another instance (up to ``max_per_server``)
+  only when every existing one is busy, and otherwise shares the least
+  loaded one (requests on a client are multiplexed, see ``mcp_rpc``).
+* Before an instance is handed out it is health-checked: a dead process
+  is restarted in place, and an instance idle for ``health_interval``
+  seconds must answer a ``ping`` first.
+* Each server's tool catalog is fetched once and seeded into every later
+  instance (``client.tools``), so neither the pool nor ``Agent`` repeats
+  ``tools/list``.
+* ``release`` returns the clients; ``close`` stops every instance.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .mcp import MCPClient, MCPSSEClient
+from .message import M, emit
+
+logger = logging.getLogger(__name__)
+
+Client = MCPClient | MCPSSEClient
+# (server name, cached tool catalog or None) -> started client
+StartFn = Callable[[str, list[dict[str, Any]] | None], Client]
+
+
+@dataclass
+class _Slot:
+    client: Client
+    leases: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def _stop_quietly(client: Client) -> None:
+    try:
+        client.stop()
+    except (OSError, RuntimeError):  # client stop: process/connection errors
+        logger.debug("Failed to stop MCP client %s", client.name, exc_info=True)
+
+
+class MCPPool:
+    """Leases long-lived MCP clients, one per configured server, to agents."""
+
+    def __init__(
+        self,
+        server_names: list[str],
+        start: StartFn,
+        max_per_server: int = 4,
+        health_interval: float = 30.0,
+    ):
+        self._start = start
+        self.max_per_server = max(1, max_per_server)
+        self.health_interval = health_interval
+        self._slots: dict[str, list[_Slot]] = {name: [] for name in server_names}
+        self._starting: dict[str, int] = dict.fromkeys(server_names, 0)
+        self._catalogs: dict[str, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.starts = 0
+        self.restarts = 0
+
+    def warm(self) -> None:
+        """Start one instance of every server ahead of the first lease."""
+        self.release(self.lease())
+
+    def lease(self) -> list[Client]:
+        """One healthy client per server; servers that fail to start are skipped."""
+        clients: list[Client] = []
+        for name in self._slots:
+            try:
+                clients.append(self._acquire(name))
+            except (OSError, RuntimeError) as e:  # client creation: spawn/connect errors
+                emit(M.SWRN, f"MCP server '{name}' failed to start: {e}")
+        return clients
+
+    def release(self, clients: list[Client]) -> None:
+        """Return leased clients; instances of a closed pool are stopped."""
+        for client in clients:
+            with self._lock:
+                slot = self._find(client)
+                if slot is not None:
+                    slot.leases = max(0, slot.leases - 1)
+                    slot.last_used = time.monotonic()
+                stop = self._closed or slot is None
+            if stop:
+                _stop_quietly(client)
+
+    def close(self) -> None:
+        """Stop every idle instance; leased ones stop when released."""
+        with self._lock:
+            self._closed = True
+            idle = [s.client for slots in self._slots.values() for s in slots if s.leases == 0]
+            for slots in self._slots.values():
+                slots[:] = [s for s in slots if s.leases > 0]
+        for client in idle:
+            _stop_quietly(client)
+
+    def size(self, name: str) -> int:
+        with self._lock:
+            return len(self._slots.get(name, []))
+
+    def _find(self, client: Client) -> _Slot | None:
+        for slot in self._slots.get(client.name, []):
+            if slot.client is client:
+                return slot
+        return None
+
+    def _acquire(self, name: str) -> Client:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MCP pool is closed")
+            slots = self._slots[name]
+            slot = min(slots, key=lambda s: s.leases, default=None)
+            grow = slot is None or (slot.leases > 0 and len(slots) + self._starting[name] < self.max_per_server)
+            if grow:
+                self._starting[name] += 1
+            else:
+                assert slot is not None
+                slot.leases += 1
+        if not grow:
+            assert slot is not None
+            self._check(name, slot)
+            return slot.client
+
+        try:
+            client = self._start(name, self._catalogs.get(name))
+        finally:
+            with self._lock:
+                self._starting[name] -= 1
+        catalog = client.list_tools()
+        with self._lock:
+            self.starts += 1
+            self._catalogs.setdefault(name, catalog)
+            self._slots[name].append(_Slot(client, leases=1))
+        return client
+
+    def _check(self, name: str, slot: _Slot) -> None:
+        """Restart *slot*'s client in place if its server died or stopped answering."""
+        client = slot.client
+        alive = client.is_running
+        if alive and slot.leases == 1 and time.monotonic() - slot.last_used >= self.health_interval:
+            alive = client.ping()
+        if alive:
+            return
+        emit(M.SWRN, f"MCP server '{name}' is not responding; restarting it")
+        _stop_quietly(client)
+        try:
+            client.start()
+        except (OSError, RuntimeError):
+            with self._lock:
+                if slot in self._slots[name]:
+                    self._slots[name].remove(slot)
+            raise
+        with self._lock:
+            self.restarts += 1
+            slot.last_used = time.monotonic()
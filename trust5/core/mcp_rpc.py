@@ -0,0 +1,215 @@
+"""Multiplexed JSON-RPC 2.0 requests for MCP clients.
+
+A pooled MCP client is shared by every agent that leases it, so requests
+must not queue behind each other.  Each connection gets one reader thread
+(owned by the transport in ``mcp.py``) that hands every response to
+``PendingRequests.resolve``; callers block only on their own future:
+
+    caller A ─ write {"id": 7} ─┐            ┌─ future 7 ← {"id": 7, ...}
+    caller B ─ write {"id": 8} ─┼─ server ───┤
+    caller C ─ write {"id": 9} ─┘  (reader)  └─ future 9 ← {"id": 9, ...}
+
+Every request has a deadline and an optional ``cancel`` event; an abandoned
+request is reported to the server with ``notifications/cancelled`` and its
+late response is dropped.  ``RPCStats`` keeps per-client queue depth
+(requests in flight) and latency counters.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_CANCEL_POLL = 0.05  # seconds between cancel-event checks while waiting
+_LATENCY_SAMPLES = 1024
+
+
+class MCPTimeoutError(RuntimeError):
+    """The server did not answer within the request's deadline."""
+
+
+class MCPCancelledError(RuntimeError):
+    """The caller cancelled the request before the server answered."""
+
+
+class RPCStats:
+    """Queue depth and latency counters for one client, kept across reconnects."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+    def sent(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def done(self, latency: float | None = None, outcome: str = "") -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if latency is not None:
+                self._latencies.append(latency)
+            if outcome == "timeout":
+                self.timeouts += 1
+            elif outcome == "cancelled":
+                self.cancelled += 1
+            elif outcome:
+                self.errors += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self._latencies)
+
+            def pct(p: float) -> float | None:
+                return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 3) if ordered else None
+
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "requests": self.requests,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+                "latency_p50": pct(0.5),
+                "latency_p90": pct(0.9),
+            }
+
+
+class PendingRequests:
+    """Outstanding requests of one connection, matched to responses by ``id``."""
+
+    def __init__(self, name: str, stats: RPCStats) -> None:
+        self.name = name
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._pending: dict[int, tuple[Future[dict[str, Any]], float]] = {}
+        self._closed: Exception | None = None
+
+    def register(self) -> tuple[int, Future[dict[str, Any]]]:
+        """Allocate an id and the future its response will complete."""
+        with self._lock:
+            if self._closed is not None:
+                raise RuntimeError(f"MCP server '{self.name}' not running: {self._closed}")
+            self._next_id += 1
+            future: Future[dict[str, Any]] = Future()
+            self._pending[self._next_id] = (future, time.monotonic())
+            self.stats.sent()
+            return self._next_id, future
+
+    def resolve(self, msg: dict[str, Any]) -> bool:
+        """Complete the request *msg* answers; False for unknown or abandoned ids."""
+        with self._lock:
+            entry = self._pending.pop(msg.get("id"), None)  # type: ignore[arg-type]
+        if entry is None:
+            logger.debug("MCP server '%s' answered unknown request id %r", self.name, msg.get("id"))
+            return False
+        future, sent_at = entry
+        self.stats.done(time.monotonic() - sent_at, "error" if "error" in msg else "")
+        future.set_result(msg)
+        return True
+
+    def discard(self, msg_id: int, outcome: str = "error") -> None:
+        """Forget *msg_id* (write failed, timed out or cancelled)."""
+        with self._lock:
+            entry = self._pending.pop(msg_id, None)
+        if entry is not None:
+            self.stats.done(outcome=outcome)
+
+    def wait(
+        self,
+        msg_id: int,
+        future: Future[dict[str, Any]],
+        timeout: float,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, Any]:
+        """Block until the response arrives, the deadline passes or *cancel* is set."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not future.done():
+                self.discard(msg_id, "timeout")
+                raise MCPTimeoutError(f"MCP server '{self.name}' timed out after {timeout}s")
+            try:
+                return future.result(timeout=remaining if cancel is None else min(remaining, _CANCEL_POLL))
+            except FutureTimeout:
+                pass
+            if cancel is not None and cancel.is_set():
+                self.discard(msg_id, "cancelled")
+                raise MCPCancelledError(f"MCP request {msg_id} to '{self.name}' cancelled")
+
+    def fail_all(self, error: Exception) -> None:
+        """Connection lost: fail every outstanding request and refuse new ones."""
+        with self._lock:
+            self._closed = error
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            self.stats.done(outcome="error")
+            future.set_exception(error)
+
+
+class MultiplexedRPC(ABC):
+    """Request/notification plumbing shared by the stdio and SSE transports.
+
+    Subclasses provide ``_transmit`` (send one JSON-RPC message) and, per
+    connection, a reader thread that calls ``self._pending.resolve``.
+    """
+
+    name: str
+    request_timeout: float
+    _pending: PendingRequests
+    rpc_stats: RPCStats
+
+    @abstractmethod
+    def _transmit(self, message: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _send_request(
+        self,
+        method: str,
+        params: Any = None,
+        timeout: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, Any]:
+        pending = self._pending
+        msg_id, future = pending.register()
+        req: dict[str, Any] = {"jsonrpc": "2.0", "id": msg_id, "method": method}
+        if params is not None:
+            req["params"] = params
+        try:
+            self._transmit(req)
+        except (OSError, RuntimeError):
+            pending.discard(msg_id)
+            raise
+        try:
+            return pending.wait(msg_id, future, timeout or self.request_timeout, cancel)
+        except (MCPTimeoutError, MCPCancelledError) as e:
+            self._notify_cancelled(msg_id, str(e))
+            raise
+
+    def _send_notification(self, method: str, params: Any = None) -> None:
+        req: dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            req["params"] = params
+        self._transmit(req)
+
+    def _notify_cancelled(self, msg_id: int, reason: str) -> None:
+        try:
+            self._send_notification("notifications/cancelled", {"requestId": msg_id, "reason": reason})
+        except (OSError, RuntimeError):  # best effort: the connection may be gone
+            logger.debug("Failed to send cancellation to MCP server '%s'", self.name, exc_info=True)
@@ -1,5 +1,6 @@
 import sys
 import threading
+import time
 from datetime import datetime
 from enum import StrEnum
 
@@ -190,6 +191,7 @@ def _ts() -> str:
 def emit(code: M, message: str, *, truncate: int = 0, label: str = "") -> None:
     if not _enabled:
         return
+    _flush_stream_tokens()
     if truncate > 0 and len(message) > truncate:
         message = message[:truncate] + f"... [{len(message) - truncate} chars]"
     bus = get_bus()
@@ -206,6 +208,7 @@ def emit(code: M, message: str, *, truncate: int = 0, label: str = "") -> None:
 def emit_block(code: M, label: str, content: str, *, max_lines: int = 0) -> None:
     if not _enabled:
         return
+    _flush_stream_tokens()
     lines = content.splitlines()
     if max_lines > 0 and len(lines) > max_lines:
         lines = lines[:max_lines] + [f"... [{len(lines) - max_lines} more lines]"]
@@ -231,13 +234,78 @@ def emit_block(code: M, label: str, content: str, *, max_lines: int = 0) -> None
         print(f"{tag}{_ts()} \u2514\u2500\u2500", flush=True)  # Headless mode terminal output
 
 
+def has_block_consumers() -> bool:
+    """True when an ``emit_block`` would reach someone (a bus subscriber or headless output).
+
+    Lets callers skip building expensive block content (diffs) nobody will see.
+    """
+    if not _enabled:
+        return False
+    bus = get_bus()
+    if bus is None:
+        return _print_fallback
+    return _print_fallback or bus.has_subscribers()
+
+
 _stream_local = threading.local()
 
+# Stream tokens are coalesced per thread: one K_STREAM_TOKEN event carries
+# every delta received within _STREAM_FLUSH_INTERVAL seconds, up to
+# _STREAM_FLUSH_CHARS characters.  The pending batch is flushed before any
+# other event from the same thread, so ordering is preserved; a timer armed
+# when the batch opens publishes it on schedule if the stream pauses.
+_STREAM_FLUSH_INTERVAL = 0.05
+_STREAM_FLUSH_CHARS = 4096
+
+
+class _StreamBatch:
+    """One thread's pending stream tokens (shared with its flush timer)."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.code = ""
+        self.parts: list[str] = []
+        self.chars = 0
+        self.since = 0.0
+        self.timer: threading.Timer | None = None
+
+
+def _stream_batch() -> _StreamBatch:
+    batch: _StreamBatch | None = getattr(_stream_local, "batch", None)
+    if batch is None:
+        batch = _stream_local.batch = _StreamBatch()
+    return batch
+
+
+def _flush_batch(batch: _StreamBatch) -> None:
+    with batch.lock:
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        if not batch.parts:
+            return
+        text = "".join(batch.parts)
+        batch.parts.clear()
+        # published under the lock so a timer flush cannot overtake the owner's next batch
+        bus = get_bus()
+        if bus is not None:
+            bus.publish(Event(kind=K_STREAM_TOKEN, code=batch.code, ts=_ts(), msg=text))
+        elif _print_fallback:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+
+def _flush_stream_tokens() -> None:
+    batch: _StreamBatch | None = getattr(_stream_local, "batch", None)
+    if batch is not None:
+        _flush_batch(batch)
+
 
 def emit_stream_start(code: M, label: str) -> None:
     if not _enabled:
         return
-    _stream_local.code = code.value
+    _flush_stream_tokens()
+    _stream_batch().code = code.value
     bus = get_bus()
     if bus is not None:
         bus.publish(Event(kind=K_STREAM_START, code=code.value, ts=_ts(), label=label))
@@ -248,19 +316,27 @@ def emit_stream_start(code: M, label: str) -> None:
 def emit_stream_token(token: str) -> None:
     if not _enabled:
         return
-    code = getattr(_stream_local, "code", "")
-    bus = get_bus()
-    if bus is not None:
-        bus.publish(Event(kind=K_STREAM_TOKEN, code=code, ts=_ts(), msg=token))
-    elif _print_fallback:
-        sys.stdout.write(token)
-        sys.stdout.flush()
+    now = time.monotonic()
+    batch = _stream_batch()
+    with batch.lock:
+        if not batch.parts:
+            batch.chars = 0
+            batch.since = now
+            batch.timer = threading.Timer(_STREAM_FLUSH_INTERVAL, _flush_batch, (batch,))
+            batch.timer.daemon = True
+            batch.timer.start()
+        batch.parts.append(token)
+        batch.chars += len(token)
+        due = batch.chars >= _STREAM_FLUSH_CHARS or now - batch.since >= _STREAM_FLUSH_INTERVAL
+    if due:
+        _flush_batch(batch)
 
 
 def emit_stream_end() -> None:
     if not _enabled:
         return
-    code = getattr(_stream_local, "code", "")
+    _flush_stream_tokens()
+    code = _stream_batch().code
     bus = get_bus()
     if bus is not None:
         bus.publish(Event(kind=K_STREAM_END, code=code, ts=_ts()))
@@ -0,0 +1,333 @@
+"""Incrementally maintained index of the files in a project tree.
+
+``Glob``, test discovery, the quality / mutation / compliance source scans,
+the review context builder and the watchdog's filesystem summary all used
+to walk the project with their own ``os.walk`` or ``glob``.  They now query
+one ``ProjectIndex`` per project root (``get_index``), which keeps each
+file's relative path, size, mtime, language and test classification.
+
+The first query walks the tree once.  Later queries refresh it cheaply:
+
+* every indexed directory is ``stat``-ed and only directories whose mtime
+  changed are listed again (a file was added, removed or renamed);
+* files reported through ``note_changed`` -- called by
+  ``tool_cache.note_file_changed`` wherever ``Tools`` emits ``M.FCHG`` --
+  are ``stat``-ed again, and after a ``Bash`` command or any other
+  ``run_capture`` subprocess (``note_changed()`` with no path) every
+  indexed file is;
+* entries whose mtime was within ``_RACY_NS`` of the moment they were
+  observed are re-checked on the next query, since a change in the same
+  timestamp tick would not move the mtime.
+
+The index always prunes hidden directories and ``_SKIP_DIRS_DETECT``
+(``.git``, ``node_modules``, ``.venv``, ...); callers pass their profile's
+``skip_dirs`` to ``files`` to prune more.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import stat
+import threading
+import time
+from dataclasses import dataclass
+
+from .lang_profiles import _EXT_TO_LANG, _SKIP_DIRS_DETECT, _build_ext_map
+
+_TEST_FILE_PATTERNS: list[re.Pattern[str]] = [
+    re.compile(r"(^|/)test_[^/]+$"),  # test_foo.py
+    re.compile(r"(^|/)[^/]+_test\.[^/]+$"),  # foo_test.py, foo_test.go
+    re.compile(r"(^|/)tests/"),  # tests/ directory
+    re.compile(r"(^|/)test/"),  # test/ directory (Maven, Gradle)
+    re.compile(r"(^|/)spec/"),  # spec/ directory
+    re.compile(r"(^|/)__tests__/"),  # __tests__/ directory (Jest)
+    re.compile(r"(^|/)[^/]+_spec\.[^/]+$"),  # foo_spec.rb
+    re.compile(r"(^|/)conftest\.py$"),  # pytest conftest.py
+    re.compile(r"(^|/)[^/]+\.test\.[^/]+$"),  # foo.test.ts, foo.test.js (Jest/Vitest)
+    re.compile(r"(^|/)Test[A-Z][^/]*\.java$"),  # TestFoo.java (JUnit)
+]
+
+_RACY_NS = 2_000_000_000
+_MAX_INDEXES = 8
+
+
+def matches_test_pattern(path: str) -> bool:
+    """Check if a file path matches common test file patterns."""
+    for pattern in _TEST_FILE_PATTERNS:
+        if pattern.search(path):
+            return True
+    return False
+
+
+def _pruned(name: str) -> bool:
+    return name.startswith(".") or name in _SKIP_DIRS_DETECT
+
+
+def _walk_key(rel: str) -> tuple[tuple[int, str], ...]:
+    """Sort key reproducing ``os.walk`` order with sorted names: a directory's files before its subdirectories."""
+    parts = rel.split("/")
+    return tuple((1, p) for p in parts[:-1]) + ((0, parts[-1]),)
+
+
+@dataclass(frozen=True)
+class IndexedFile:
+    rel: str  # "/"-separated, relative to the index root
+    size: int
+    mtime_ns: int
+    language: str  # "" when no language profile claims the extension
+    is_test: bool
+
+    @property
+    def dirs(self) -> list[str]:
+        return self.rel.split("/")[:-1]
+
+
+class ProjectIndex:
+    """Files under *root* (see the module docstring for the refresh rules)."""
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+        self.walks = 0
+        self.rescans = 0
+        self._files: dict[str, IndexedFile] = {}
+        self._dirs: dict[str, int] = {}  # rel dir ("" is the root) -> mtime_ns when listed
+        self._dir_files: dict[str, set[str]] = {}
+        self._dir_subdirs: dict[str, set[str]] = {}
+        self._racy_dirs: set[str] = set()
+        self._racy_files: set[str] = set()
+        self._dirty: set[str] = set()
+        self._stale_all = False
+        self._built = False
+        self._lock = threading.Lock()
+
+    # ── maintenance ──────────────────────────────────────────────────
+
+    def note_changed(self, rel: str | None = None) -> None:
+        """Re-stat *rel* on the next query (``None``: re-stat every file)."""
+        with self._lock:
+            if rel is None:
+                self._stale_all = True
+            else:
+                self._dirty.add(rel)
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, *rel.split("/")) if rel else self.root
+
+    def _entry(self, rel: str, st: os.stat_result, now: int) -> IndexedFile:
+        if now - st.st_mtime_ns < _RACY_NS:
+            self._racy_files.add(rel)
+        _build_ext_map()
+        ext = os.path.splitext(rel)[1]
+        return IndexedFile(rel, st.st_size, st.st_mtime_ns, _EXT_TO_LANG.get(ext, ""), matches_test_pattern(rel))
+
+    def _forget_file(self, rel: str) -> None:
+        self._files.pop(rel, None)
+        self._racy_files.discard(rel)
+        self._dir_files.get(rel.rpartition("/")[0], set()).discard(rel)
+
+    def _stat_file(self, rel: str, now: int) -> None:
+        self._racy_files.discard(rel)
+        parent = rel.rpartition("/")[0]
+        try:
+            st = os.stat(self._abs(rel))
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode) or parent not in self._dirs:
+            self._forget_file(rel)
+        else:
+            self._files[rel] = self._entry(rel, st, now)
+            self._dir_files[parent].add(rel)
+
+    def _drop_dir(self, rel: str) -> None:
+        for sub in self._dir_subdirs.pop(rel, set()):
+            self._drop_dir(sub)
+        for f in self._dir_files.pop(rel, set()):
+            self._forget_file(f)
+        self._dirs.pop(rel, None)
+        self._racy_dirs.discard(rel)
+        if rel:
+            self._dir_subdirs.get(rel.rpartition("/")[0], set()).discard(rel)
+
+    def _list_dir(self, rel: str, now: int) -> None:
+        """(Re)list one directory, walking any subdirectory not indexed yet."""
+        pending = [rel]
+        while pending:
+            current = pending.pop()
+            self.rescans += 1
+            try:
+                mtime = os.stat(self._abs(current)).st_mtime_ns
+                with os.scandir(self._abs(current)) as it:
+                    children = list(it)
+            except OSError:
+                self._drop_dir(current)
+                continue
+            self._dirs[current] = mtime
+            if now - mtime < _RACY_NS:
+                self._racy_dirs.add(current)
+            else:
+                self._racy_dirs.discard(current)
+
+            prefix = f"{current}/" if current else ""
+            files: set[str] = set()
+            subdirs: set[str] = set()
+            for child in children:
+                child_rel = prefix + child.name
+                try:
+                    if child.is_dir(follow_symlinks=False):
+                        if not _pruned(child.name):
+                            subdirs.add(child_rel)
+                            if child_rel not in self._dirs:
+                                pending.append(child_rel)
+                    elif child.is_file():
+                        files.add(child_rel)
+                        old = self._files.get(child_rel)
+                        st = child.stat()
+                        if old is None or (old.mtime_ns, old.size) != (st.st_mtime_ns, st.st_size):
+                            self._files[child_rel] = self._entry(child_rel, st, now)
+                except OSError:
+                    continue
+            for gone in self._dir_files.get(current, set()) - files:
+                self._forget_file(gone)
+            for gone in self._dir_subdirs.get(current, set()) - subdirs:
+                self._drop_dir(gone)
+            self._dir_files[current] = files
+            self._dir_subdirs[current] = subdirs
+
+    def refresh(self) -> None:
+        """Bring the index up to date (the first call walks the whole tree)."""
+        now = time.time_ns()
+        with self._lock:
+            if not self._built:
+                self.walks += 1
+                self._list_dir("", now)
+                self._built = True
+                self._dirty.clear()
+                self._stale_all = False
+                return
+            for rel in sorted(self._dirs):
+                if rel not in self._dirs:
+                    continue  # dropped with a parent
+                try:
+                    mtime = os.stat(self._abs(rel)).st_mtime_ns
+                except OSError:
+                    self._drop_dir(rel)
+                    continue
+                if mtime != self._dirs[rel] or rel in self._racy_dirs:
+                    self._list_dir(rel, now)
+            recheck = set(self._files) if self._stale_all else self._dirty | self._racy_files
+            self._dirty.clear()
+            self._stale_all = False
+            for rel in recheck:
+                self._stat_file(rel, now)
+
+    # ── queries ──────────────────────────────────────────────────────
+
+    def files(
+        self,
+        extensions: tuple[str, ...] | None = None,
+        skip_dirs: tuple[str, ...] | frozenset[str] = (),
+        tests: bool | None = None,
+    ) -> list[IndexedFile]:
+        """Indexed files in ``os.walk`` order, filtered by extension, directory and test classification."""
+        self.refresh()
+        skip = set(skip_dirs)
+        with self._lock:
+            entries = list(self._files.values())
+        out = [
+            e
+            for e in entries
+            if (extensions is None or e.rel.endswith(extensions))
+            and (tests is None or e.is_test == tests)
+            and not (skip and skip.intersection(e.dirs))
+        ]
+        return sorted(out, key=lambda e: _walk_key(e.rel))
+
+    def paths(
+        self,
+        extensions: tuple[str, ...] | None = None,
+        skip_dirs: tuple[str, ...] | frozenset[str] = (),
+        tests: bool | None = None,
+    ) -> list[str]:
+        """Like ``files`` but returns native relative paths."""
+        return [e.rel.replace("/", os.sep) for e in self.files(extensions, skip_dirs, tests)]
+
+    def glob(self, pattern: str) -> list[str] | None:
+        """Relative paths (files and directories) matching a ``glob`` pattern.
+
+        Returns None for patterns the index cannot answer -- absolute paths,
+        ``..``, or components naming hidden or always-pruned directories --
+        so the caller falls back to ``glob.glob``.
+        """
+        parts = [p for p in pattern.replace(os.sep, "/").split("/") if p not in ("", ".")]
+        if not parts or os.path.isabs(pattern) or any(p == ".." or p.startswith(".") or _pruned(p) for p in parts):
+            return None
+        regex = re.compile(_glob_regex(parts))
+        self.refresh()
+        with self._lock:
+            candidates = [*self._files, *(d for d in self._dirs if d)]
+        hits = [c for c in candidates if regex.fullmatch(c) and not any(n.startswith(".") for n in c.split("/"))]
+        return [h.replace("/", os.sep) for h in sorted(hits, key=_walk_key)]
+
+
+def _component_regex(part: str) -> str:
+    """Regex for one glob path component; wildcards never cross "/"."""
+    out = ""
+    i = 0
+    while i < len(part):
+        c = part[i]
+        close = part.find("]", i + 2) if c == "[" else -1
+        if c == "*":
+            out += "[^/]*"
+        elif c == "?":
+            out += "[^/]"
+        elif close > 0:
+            body = part[i + 1 : close]
+            out += "[" + ("^" + body[1:] if body.startswith("!") else body).replace("\\", "\\\\") + "]"
+            i = close
+        else:
+            out += re.escape(c)
+        i += 1
+    return out
+
+
+def _glob_regex(parts: list[str]) -> str:
+    """Regex over "/"-separated relative paths equivalent to ``glob(recursive=True)``."""
+    if parts == ["**"]:
+        return "[^/]+(?:/[^/]+)*"
+    out = ""
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == "**":
+            # a trailing "**" also matches the directory before it ("src/**" yields "src")
+            out = out[:-1] + "(?:/[^/]+)*" if last else out + "(?:[^/]+/)*"
+        else:
+            out += _component_regex(part) + ("" if last else "/")
+    return out
+
+
+_indexes: dict[str, ProjectIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: str) -> ProjectIndex:
+    """The shared index for *root* (created on first use; a few roots are kept)."""
+    real = os.path.realpath(root)
+    with _indexes_lock:
+        index = _indexes.pop(real, None) or ProjectIndex(real)
+        _indexes[real] = index  # most recently used last
+        while len(_indexes) > _MAX_INDEXES:
+            del _indexes[next(iter(_indexes))]
+        return index
+
+
+def note_changed(path: str | None = None) -> None:
+    """Dirty *path* in every index containing it (``None``: unknown paths, re-stat everything)."""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    real = os.path.realpath(path) if path is not None else None
+    for index in indexes:
+        if real is None:
+            index.note_changed()
+        elif real.startswith(index.root + os.sep):
+            index.note_changed(os.path.relpath(real, index.root).replace(os.sep, "/"))
@@ -13,6 +13,8 @@ from pydantic import BaseModel, Field
 
 from .constants import QUALITY_PASS_THRESHOLD
 from .constants import SUBPROCESS_TIMEOUT as SUBPROCESS_TIMEOUT
+from .project_index import get_index
+from .subprocess_capture import run_capture
 
 logger = logging.getLogger(__name__)
 
@@ -97,7 +99,7 @@ def _run_command(cmd: tuple[str, ...] | None, cwd: str, timeout: int = SUBPROCES
     if cmd is None:
         return 127, "no command configured"
     try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd, timeout=timeout)
+        proc = run_capture(cmd, cwd=cwd, timeout=timeout, log_name=f"quality-{os.path.basename(cmd[0])}")
         return proc.returncode, (proc.stdout + "\n" + proc.stderr).strip()
     except FileNotFoundError:
         return 127, f"command not found: {cmd[0]}"
@@ -122,13 +124,7 @@ def _parse_coverage(output: str, language: str) -> float:
 
 
 def _find_source_files(root: str, extensions: tuple[str, ...], skip_dirs: tuple[str, ...]) -> list[str]:
-    files: list[str] = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames if d not in skip_dirs and not d.startswith(".")]
-        for fname in filenames:
-            if any(fname.endswith(ext) for ext in extensions):
-                files.append(os.path.join(dirpath, fname))
-    return files
+    return [os.path.join(root, rel) for rel in get_index(root).paths(extensions, skip_dirs)]
 
 
 def _check_file_sizes(files: list[str], max_lines: int) -> list[Issue]:
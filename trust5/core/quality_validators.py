@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import contextvars
 import logging
 import os
 import re
@@ -571,7 +572,8 @@ class TrustGate:
                 )
 
         with ThreadPoolExecutor(max_workers=5) as pool:
-            futures = {pool.submit(_run_one, v): v for v in self._validators}
+            # copy_context: validator commands count toward the task's command_usage
+            futures = {pool.submit(contextvars.copy_context().run, _run_one, v): v for v in self._validators}
             for future in as_completed(futures):
                 vname, pr = future.result()
                 results[vname] = pr
@@ -0,0 +1,258 @@
+"""Shared, header-driven rate limiter for LLM provider calls.
+
+Parallel module stages all talk to the same provider at once.  Without
+coordination each ``LLM`` only learns about limits from a 429 and then
+backs off on its own.  ``RateLimiter`` keeps one token bucket per
+``(provider, model)`` for the whole process, refilled from the provider's
+rate-limit response headers:
+
+  * Anthropic: ``anthropic-ratelimit-{requests,tokens,input-tokens}-{remaining,limit,reset}``
+  * OpenAI-style: ``x-ratelimit-{remaining,limit,reset}-{requests,tokens}``
+  * ``Retry-After`` on a 429 blocks *every* caller, not just the one that got it.
+
+Calls are admitted strictly in arrival order, so one busy module stage
+cannot starve the others.  When the remaining budget runs low, admissions
+are spread evenly over the time left until the provider's reset instead
+of being spent in a burst.  Every wait is reported via ``M.MBDG``.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from .message import M, emit
+
+logger = logging.getLogger(__name__)
+
+# Start pacing once less than this fraction of the window's budget is left.
+_PACE_FRACTION = 0.2
+# Never hold a caller longer than this per admission, whatever the headers say.
+_MAX_WAIT = 120.0
+# Abort-check granularity while waiting.
+_WAIT_SLICE = 0.5
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# (kind, header names for remaining / limit / reset), most specific first
+_HEADER_SETS: tuple[tuple[str, str, str, str], ...] = (
+    (
+        "requests",
+        "anthropic-ratelimit-requests-remaining",
+        "anthropic-ratelimit-requests-limit",
+        "anthropic-ratelimit-requests-reset",
+    ),
+    (
+        "tokens",
+        "anthropic-ratelimit-input-tokens-remaining",
+        "anthropic-ratelimit-input-tokens-limit",
+        "anthropic-ratelimit-input-tokens-reset",
+    ),
+    (
+        "tokens",
+        "anthropic-ratelimit-tokens-remaining",
+        "anthropic-ratelimit-tokens-limit",
+        "anthropic-ratelimit-tokens-reset",
+    ),
+    ("requests", "x-ratelimit-remaining-requests", "x-ratelimit-limit-requests", "x-ratelimit-reset-requests"),
+    ("tokens", "x-ratelimit-remaining-tokens", "x-ratelimit-limit-tokens", "x-ratelimit-reset-tokens"),
+)
+
+
+def _parse_reset(value: str, now_wall: float) -> float | None:
+    """Seconds until reset from an RFC 3339 timestamp, a duration ("6m0s") or plain seconds."""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    if "T" in value:
+        try:
+            reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return max(reset.timestamp() - now_wall, 0.0)
+        except ValueError:
+            return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _header(headers: Any, name: str) -> str | None:
+    try:
+        value = headers.get(name)
+    except AttributeError:
+        return None
+    return value if isinstance(value, str) else None
+
+
+@dataclass
+class _Bucket:
+    """Provider-reported budget for one window (requests or tokens)."""
+
+    remaining: float | None = None  # None = unknown (no headers seen yet)
+    limit: float | None = None
+    reset_at: float = 0.0  # monotonic
+
+    def expired(self, now: float) -> bool:
+        return self.remaining is None or now >= self.reset_at
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until *amount* can be spent without exceeding the budget."""
+        if self.expired(now) or self.remaining is None:
+            return 0.0
+        if self.remaining < max(amount, 1.0):
+            return self.reset_at - now
+        return 0.0
+
+    def pace_interval(self, now: float) -> float:
+        """Even spacing over the rest of the window once the budget runs low."""
+        if self.expired(now) or self.remaining is None or not self.limit:
+            return 0.0
+        if self.remaining >= self.limit * _PACE_FRACTION:
+            return 0.0
+        return (self.reset_at - now) / max(self.remaining, 1.0)
+
+    def spend(self, amount: float) -> None:
+        if self.remaining is not None:
+            self.remaining = max(self.remaining - amount, 0.0)
+
+
+@dataclass
+class RateLimiter:
+    """Token bucket for one ``(provider, model)`` shared by every ``LLM``."""
+
+    key: str
+    requests: _Bucket = field(default_factory=_Bucket)
+    tokens: _Bucket = field(default_factory=_Bucket)
+    blocked_until: float = 0.0  # monotonic; set from Retry-After on 429
+    next_slot: float = 0.0  # monotonic; earliest next admission when pacing
+    waits: int = 0
+    wait_seconds: float = 0.0
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+    _queue: deque[int] = field(default_factory=deque, repr=False)
+    _tickets: int = field(default=0, repr=False)
+
+    def _delay(self, tokens: int, now: float) -> float:
+        return max(
+            self.blocked_until - now,
+            self.next_slot - now,
+            self.requests.wait_for(1, now),
+            self.tokens.wait_for(tokens, now),
+            0.0,
+        )
+
+    def acquire(self, tokens: int = 0, abort: threading.Event | None = None) -> float:
+        """Block until a call estimated at *tokens* input tokens may be sent.
+
+        Returns the seconds spent waiting.  An *abort* event ends the wait
+        early without spending any budget (the caller's stream will notice
+        the abort itself and send nothing).
+        """
+        start = time.monotonic()
+        with self._cond:
+            ticket = self._tickets
+            self._tickets += 1
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] == ticket:
+                        delay = min(self._delay(tokens, now), _MAX_WAIT - (now - start))
+                        if delay <= 0:
+                            break
+                    else:
+                        delay = _WAIT_SLICE
+                    if abort is not None and abort.is_set():
+                        return time.monotonic() - start
+                    self._cond.wait(timeout=min(delay, _WAIT_SLICE))
+                now = time.monotonic()
+                self.requests.spend(1)
+                self.tokens.spend(tokens)
+                interval = max(self.requests.pace_interval(now), self.tokens.pace_interval(now))
+                self.next_slot = now + interval if interval > 0 else 0.0
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+        waited = time.monotonic() - start
+        if waited >= 0.05:
+            with self._cond:
+                self.waits += 1
+                self.wait_seconds += waited
+            emit(M.MBDG, self._describe(waited))
+        return waited
+
+    def update(self, headers: Any, status_code: int) -> None:
+        """Refill the buckets from a response's rate-limit headers."""
+        now = time.monotonic()
+        now_wall = time.time()
+        seen: set[str] = set()
+        with self._cond:
+            for kind, rem_h, lim_h, reset_h in _HEADER_SETS:
+                if kind in seen:
+                    continue
+                remaining = _header(headers, rem_h)
+                if remaining is None:
+                    continue
+                try:
+                    rem = float(remaining)
+                except ValueError:
+                    continue
+                seen.add(kind)
+                bucket = self.requests if kind == "requests" else self.tokens
+                bucket.remaining = rem
+                limit = _header(headers, lim_h)
+                try:
+                    bucket.limit = float(limit) if limit is not None else bucket.limit
+                except ValueError:
+                    pass
+                reset_raw = _header(headers, reset_h)
+                reset_in = _parse_reset(reset_raw, now_wall) if reset_raw is not None else None
+                bucket.reset_at = now + (reset_in if reset_in is not None else 60.0)
+            if status_code == 429:
+                retry_after = _parse_reset(_header(headers, "Retry-After") or "", now_wall)
+                self.blocked_until = max(self.blocked_until, now + min(retry_after or 60.0, _MAX_WAIT))
+            self._cond.notify_all()
+
+    def _describe(self, waited: float) -> str:
+        parts = [f"limiter={self.key}", f"wait={waited:.2f}s"]
+        if self.requests.remaining is not None:
+            parts.append(f"requests_remaining={self.requests.remaining:.0f}")
+        if self.tokens.remaining is not None:
+            parts.append(f"tokens_remaining={self.tokens.remaining:.0f}")
+        return " ".join(parts)
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str, model: str) -> RateLimiter:
+    """Return the process-wide limiter for *provider* + *model*."""
+    key = f"{provider}/{model}"
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter(key)
+        return limiter
+
+
+def limiter_stats() -> dict[str, dict[str, float]]:
+    """Wait counters per limiter: ``{key: {"waits": n, "wait_seconds": s}}``."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {lim.key: {"waits": lim.waits, "wait_seconds": round(lim.wait_seconds, 3)} for lim in limiters}
+
+
+def reset_limiters() -> None:
+    with _limiters_lock:
+        _limiters.clear()
@@ -0,0 +1,93 @@
+"""Byte-level line splitter for streamed LLM responses.
+
+``requests.Response.iter_lines(decode_unicode=True)`` decodes every chunk,
+re-splits it and yields one ``str`` per line, and the stream consumers used
+to check the clock and the abort flag on each of those lines.  With thinking
+enabled that is thousands of iterations per turn on the pipeline thread.
+
+``StreamReader`` reads ``iter_content`` byte chunks, splits them with
+``bytes.split`` and yields raw ``bytes`` lines, which ``loads`` (orjson when
+installed, else the stdlib) parses without a decode step.  The deadline and
+abort flag are checked once per network chunk instead of once per line.
+Response-like objects that only provide ``iter_lines`` (cassette replays,
+test doubles) are read through that, with the checks every
+``_CHECK_EVERY`` lines.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import requests
+
+loads: Callable[[bytes], Any]
+try:
+    import orjson
+
+    loads = orjson.loads
+    JSON_CODEC = "orjson"
+except ImportError:
+    loads = json.loads
+    JSON_CODEC = "json"
+
+# SSE and NDJSON responses use chunked transfer encoding, so a read returns
+# as soon as one HTTP chunk arrives; the size only caps large bursts.
+_CHUNK_SIZE = 16 * 1024
+_CHECK_EVERY = 64
+
+
+class StreamReader:
+    """Iterates the raw lines of a streamed response, stopping on abort or deadline.
+
+    After iteration, ``stopped`` is ``"abort"``, ``"timeout"`` or ``""``
+    (stream ended or the consumer broke out on its own).
+    """
+
+    def __init__(self, response: Any, abort: threading.Event, timeout: float) -> None:
+        self._response = response
+        self._abort = abort
+        self._deadline = time.monotonic() + timeout
+        self.stopped = ""
+
+    def _should_stop(self) -> bool:
+        if self._abort.is_set():
+            self.stopped = "abort"
+        elif time.monotonic() > self._deadline:
+            self.stopped = "timeout"
+        return bool(self.stopped)
+
+    def __iter__(self) -> Iterator[bytes]:
+        if isinstance(self._response, requests.Response):
+            return self._iter_content()
+        return self._iter_lines()
+
+    def _iter_content(self) -> Iterator[bytes]:
+        pending = b""
+        for chunk in self._response.iter_content(chunk_size=_CHUNK_SIZE):
+            if self._should_stop():
+                return
+            if not chunk:
+                continue
+            if pending:
+                chunk = pending + chunk
+            lines = chunk.split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if line.endswith(b"\r"):
+                    line = line[:-1]
+                if line:
+                    yield line
+        if pending.strip():
+            yield pending.rstrip(b"\r")
+
+    def _iter_lines(self) -> Iterator[bytes]:
+        for count, line in enumerate(self._response.iter_lines(decode_unicode=False)):
+            if count % _CHECK_EVERY == 0 and self._should_stop():
+                return
+            if not line:
+                continue
+            yield line.encode("utf-8") if isinstance(line, str) else line
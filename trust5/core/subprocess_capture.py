@@ -0,0 +1,354 @@
+"""Bounded output capture for tool and validation subprocesses.
+
+``subprocess.run(capture_output=True)`` keeps every byte a command prints
+and decodes it all before callers cut it down to ``TEST_OUTPUT_LIMIT`` or
+the tool-result limit, so one runaway test printing hundreds of megabytes
+can exhaust memory while several modules validate in parallel.
+
+``run_capture`` streams each pipe through an ``OutputBuffer`` instead: the
+first quarter of ``SUBPROCESS_OUTPUT_LIMIT`` bytes is kept as the head, the
+most recent bytes as the tail, and everything in between is counted and
+dropped.  The decoded text marks the gap.  With a *log_name* the complete
+stream of an overflowing command is also written to ``.trust5/logs/`` so the
+dropped middle can be inspected later.
+
+Every command starts in its own session (process group).  On timeout, or
+when the caller is interrupted, the whole group is sent ``SIGKILL`` so
+pytest workers, dev servers and test binaries the command forked do not
+outlive it.  The command is reaped with ``os.wait4`` to record its wall
+time, CPU time and peak RSS as a ``CommandUsage``; tasks decorated with
+``record_command_usage`` attach those to their outputs as ``command_usage``.
+The active collectors live in a ``ContextVar``, so work handed to a thread
+pool through ``contextvars.copy_context().run`` is counted too.
+
+A finished command may have rewritten files in place (``ruff check --fix``,
+``black``, ``prettier --write``), so every run ends with
+``tool_cache.note_file_changed()``, which makes the shared ``project_index``
+re-stat its files and drops cached ``Glob`` / ``Grep`` results.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import IO, Any, BinaryIO, ParamSpec, TypeVar
+
+from .constants import SUBPROCESS_OUTPUT_LIMIT
+from .tool_cache import note_file_changed
+
+logger = logging.getLogger(__name__)
+
+_CHUNK = 65536
+_DRAIN_GRACE = 2.0  # seconds to wait for pipes held open by background children
+# ru_maxrss is KiB on Linux, bytes on macOS
+_RSS_DIVISOR = 1024 if sys.platform == "darwin" else 1
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+_collectors: contextvars.ContextVar[tuple[list[CommandUsage], ...]] = contextvars.ContextVar(
+    "command_usage_collectors", default=()
+)
+_collect_lock = threading.Lock()
+
+
+def logs_dir() -> str:
+    return os.path.join(os.path.abspath(os.getcwd()), ".trust5", "logs")
+
+
+class OutputBuffer:
+    """Head + tail of one output stream, capped at *limit* bytes in memory."""
+
+    def __init__(self, limit: int = SUBPROCESS_OUTPUT_LIMIT, spill_path: str | None = None):
+        self.limit = max(limit, 0)
+        self._head_cap = self.limit // 4
+        self._tail_cap = self.limit - self._head_cap
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+        self.spill_path = spill_path
+        self.spilled = False
+        self._spill: BinaryIO | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return len(self.head) + len(self.tail) + self.dropped
+
+    def feed(self, chunk: bytes) -> None:
+        with self._lock:
+            if self.spill_path and not self.spilled and self.total + len(chunk) > self.limit:
+                self._open_spill()
+            if self._spill is not None:
+                self._write_spill(chunk)
+            room = self._head_cap - len(self.head)
+            if room > 0:
+                self.head += chunk[:room]
+                chunk = chunk[room:]
+            self.tail += chunk
+            excess = len(self.tail) - self._tail_cap
+            if excess > 0:
+                del self.tail[:excess]
+                self.dropped += excess
+
+    def _open_spill(self) -> None:
+        assert self.spill_path is not None
+        self.spilled = True
+        try:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            self._spill = open(self.spill_path, "wb")  # noqa: SIM115 -- closed in close()
+        except OSError as e:
+            logger.warning("Cannot spill subprocess output to %s: %s", self.spill_path, e)
+            self.spill_path = None
+            return
+        self._write_spill(bytes(self.head) + bytes(self.tail))
+
+    def _write_spill(self, data: bytes) -> None:
+        assert self._spill is not None
+        try:
+            self._spill.write(data)
+        except OSError as e:
+            logger.warning("Spill log %s failed: %s", self.spill_path, e)
+            self._spill.close()
+            self._spill = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
+    def text(self) -> str:
+        """Decoded output; a marker line replaces any dropped middle."""
+        with self._lock:
+            head, tail, dropped = bytes(self.head), bytes(self.tail), self.dropped
+            where = f"; full output in {self.spill_path}" if self.spill_path and self.spilled else ""
+        if not dropped:
+            return (head + tail).decode("utf-8", errors="replace")
+        marker = f"\n... [{dropped} bytes of output omitted{where}] ...\n"
+        return head.decode("utf-8", errors="replace") + marker + tail.decode("utf-8", errors="replace")
+
+
+@dataclass
+class CommandUsage:
+    """Resources used by one command (and the children it waited for)."""
+
+    command: str
+    returncode: int
+    wall_s: float
+    user_s: float = 0.0
+    sys_s: float = 0.0
+    max_rss_kb: int = 0
+    killed: bool = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class CapturedProcess(subprocess.CompletedProcess[str]):
+    """``CompletedProcess`` plus dropped output, spill logs and resource usage."""
+
+    def __init__(
+        self,
+        args: str | Sequence[str],
+        returncode: int,
+        stdout: OutputBuffer,
+        stderr: OutputBuffer,
+        usage: CommandUsage | None = None,
+    ):
+        super().__init__(args, returncode, stdout.text(), stderr.text())
+        self.dropped_bytes = stdout.dropped + stderr.dropped
+        self.log_paths = [b.spill_path for b in (stdout, stderr) if b.spill_path and b.spilled]
+        self.usage = usage
+
+
+@contextmanager
+def collect_usage() -> Iterator[list[CommandUsage]]:
+    """Collect the ``CommandUsage`` of every ``run_capture`` call made in this context."""
+    usages: list[CommandUsage] = []
+    token = _collectors.set((*_collectors.get(), usages))
+    try:
+        yield usages
+    finally:
+        _collectors.reset(token)
+
+
+def record_command_usage(execute: Callable[_P, _R]) -> Callable[_P, _R]:
+    """Decorate a task's ``execute`` to add ``command_usage`` to the result's outputs."""
+
+    @functools.wraps(execute)
+    def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+        with collect_usage() as usages:
+            result = execute(*args, **kwargs)
+        outputs = getattr(result, "outputs", None)
+        if usages and isinstance(outputs, dict):
+            outputs["command_usage"] = [u.as_dict() for u in usages]
+        return result
+
+    return wrapper
+
+
+def _finished(usage: CommandUsage) -> None:
+    """Record a reaped command's *usage*; it may also have changed any file."""
+    with _collect_lock:
+        for usages in _collectors.get():
+            usages.append(usage)
+    note_file_changed()
+
+
+class _Reaper:
+    """Waits for the child in a thread with ``os.wait4`` so its rusage is kept."""
+
+    def __init__(self, proc: subprocess.Popen[bytes]):
+        self._proc = proc
+        self.rusage: Any = None
+        self._thread = threading.Thread(target=self._run, name=f"reap-{proc.pid}", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        if not hasattr(os, "wait4"):
+            self._proc.wait()
+            return
+        try:
+            _, status, self.rusage = os.wait4(self._proc.pid, 0)
+        except ChildProcessError:  # reaped elsewhere; Popen reports what it can
+            self._proc.wait()
+            return
+        self._proc.returncode = os.waitstatus_to_exitcode(status)
+
+    def wait(self, timeout: float | None) -> bool:
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+
+def _kill_tree(proc: subprocess.Popen[bytes]) -> None:
+    """SIGKILL the command's process group (it is the group leader)."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    except OSError:
+        proc.kill()
+
+
+def _pump(pipe: IO[bytes], buf: OutputBuffer) -> None:
+    fd = pipe.fileno()
+    try:
+        while True:
+            chunk = os.read(fd, _CHUNK)
+            if not chunk:
+                break
+            buf.feed(chunk)
+    except (OSError, ValueError):
+        pass
+    finally:
+        buf.close()
+        pipe.close()
+
+
+def _spill_paths(log_name: str | None) -> tuple[str | None, str | None]:
+    if not log_name:
+        return None, None
+    safe = re.sub(r"[^A-Za-z0-9._-]+", "-", log_name).strip("-") or "command"
+    stem = os.path.join(logs_dir(), f"{safe}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}")
+    return f"{stem}.stdout.log", f"{stem}.stderr.log"
+
+
+def run_capture(
+    args: str | Sequence[str],
+    *,
+    cwd: str | None = None,
+    env: dict[str, str] | None = None,
+    timeout: float | None = None,
+    shell: bool = False,
+    limit: int = SUBPROCESS_OUTPUT_LIMIT,
+    log_name: str | None = None,
+) -> CapturedProcess:
+    """Run *args* like ``subprocess.run(capture_output=True, text=True)`` with bounded output.
+
+    Each stream keeps at most *limit* bytes.  Raises ``subprocess.TimeoutExpired``
+    (with the partial output attached) after killing the command's process
+    group on *timeout*; spawn errors propagate as ``OSError`` just like
+    ``subprocess.run``.
+    """
+    out_path, err_path = _spill_paths(log_name)
+    out_buf, err_buf = OutputBuffer(limit, out_path), OutputBuffer(limit, err_path)
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        args,
+        cwd=cwd,
+        env=env,
+        shell=shell,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    assert proc.stdout is not None and proc.stderr is not None
+    readers = [
+        threading.Thread(target=_pump, args=(proc.stdout, out_buf), name="capture-stdout", daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, err_buf), name="capture-stderr", daemon=True),
+    ]
+    for t in readers:
+        t.start()
+
+    reaper = _Reaper(proc)
+
+    try:
+        finished = reaper.wait(timeout)
+    except BaseException:
+        _kill_tree(proc)
+        reaper.wait(None)
+        _finished(_usage(args, proc, reaper, started, killed=True))
+        raise
+    if not finished:
+        _kill_tree(proc)
+        reaper.wait(None)
+        _join(readers)
+        _finished(_usage(args, proc, reaper, started, killed=True))
+        raise subprocess.TimeoutExpired(args, timeout or 0, output=out_buf.text(), stderr=err_buf.text())
+    _join(readers)  # background children may keep the pipes open after the command exits
+    usage = _usage(args, proc, reaper, started)
+    _finished(usage)
+    result = CapturedProcess(args, proc.returncode, out_buf, err_buf, usage)
+    if result.dropped_bytes:
+        logger.info(
+            "Dropped %d bytes of output from %s%s",
+            result.dropped_bytes,
+            (args if isinstance(args, str) else " ".join(args))[:200],
+            f" (logged to {', '.join(result.log_paths)})" if result.log_paths else "",
+        )
+    return result
+
+
+def _usage(
+    args: str | Sequence[str], proc: subprocess.Popen[bytes], reaper: _Reaper, started: float, killed: bool = False
+) -> CommandUsage:
+    usage = CommandUsage(
+        command=(args if isinstance(args, str) else " ".join(args))[:200],
+        returncode=proc.returncode if proc.returncode is not None else -1,
+        wall_s=round(time.monotonic() - started, 3),
+        killed=killed,
+    )
+    ru = reaper.rusage
+    if ru is not None:
+        usage.user_s = round(ru.ru_utime, 3)
+        usage.sys_s = round(ru.ru_stime, 3)
+        usage.max_rss_kb = int(ru.ru_maxrss) // _RSS_DIVISOR
+    return usage
+
+
+def _join(threads: list[threading.Thread]) -> None:
+    deadline = time.monotonic() + _DRAIN_GRACE
+    for t in threads:
+        t.join(max(deadline - time.monotonic(), 0))
@@ -0,0 +1,203 @@
+"""Pluggable token counting with per-message memoization and provider calibration.
+
+Used by ``LLM`` for context-window pre-validation and trimming.
+
+Counters:
+  * ``TiktokenCounter`` — real BPE table (``cl100k_base``), used automatically
+    when the optional ``tiktoken`` package is installed.
+  * ``BPEApproxCounter`` — dependency-free approximation of BPE splitting
+    (words, digit groups, punctuation, whitespace runs).  Much closer than a
+    flat chars/4 ratio for code and JSON tool results.
+  * ``CharRatioCounter`` — the legacy ~4 chars per token heuristic.
+
+Whatever the counter, per-model calibration learns the ratio between our
+estimate and the provider's reported ``input_tokens`` and scales estimates
+accordingly.  Raw counts are cached per message object, so re-estimating a
+growing history costs O(new messages).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+# Bounds on the learned estimate→actual ratio (protects against bad usage data).
+_CALIBRATION_MIN = 0.5
+_CALIBRATION_MAX = 3.0
+# Exponential moving average weight for new calibration samples.
+_CALIBRATION_ALPHA = 0.3
+# Samples with fewer estimated tokens than this are too noisy to learn from.
+_CALIBRATION_MIN_SAMPLE = 200
+_MESSAGE_CACHE_SIZE = 8192
+
+
+class TokenCounter(Protocol):
+    """Counts tokens in a piece of text."""
+
+    name: str
+
+    def count_text(self, text: str) -> int: ...
+
+
+class CharRatioCounter:
+    """Legacy heuristic: ~4 characters per token."""
+
+    name = "chars"
+
+    def count_text(self, text: str) -> int:
+        return len(text) // 4
+
+
+_PIECE_RE = re.compile(r"[A-Za-z]+|[0-9]+|[ \t\r]*\n[ \t\r\n]*|[ \t\r]+|[^\sA-Za-z0-9]")
+
+
+class BPEApproxCounter:
+    """Approximates BPE tokenization without a vocabulary table.
+
+    Mirrors how byte-level BPE vocabularies split text: a word (with its
+    leading space) is usually one token, long identifiers split every ~8
+    letters, numbers split into groups of 3 digits, each punctuation
+    character is its own token, and indentation/newline runs collapse.
+    """
+
+    name = "bpe-approx"
+
+    def count_text(self, text: str) -> int:
+        total = 0
+        for piece in _PIECE_RE.findall(text):
+            first = piece[0]
+            if first.isalpha():
+                total += (len(piece) + 7) // 8
+            elif first.isdigit():
+                total += (len(piece) + 2) // 3
+            elif piece != " ":  # a lone space merges into the following word
+                total += 1
+        return total
+
+
+class TiktokenCounter:
+    """Exact BPE counts using the optional ``tiktoken`` package."""
+
+    name = "tiktoken"
+
+    def __init__(self, encoding: Any) -> None:
+        self._encoding = encoding
+
+    def count_text(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+def _default_counter() -> TokenCounter:
+    try:
+        import tiktoken  # optional: not a declared dependency
+
+        return TiktokenCounter(tiktoken.get_encoding("cl100k_base"))
+    except (ImportError, OSError, ValueError):  # not installed / table unavailable offline
+        return BPEApproxCounter()
+
+
+# ── Module state ─────────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_counter: TokenCounter | None = None
+# id(message) -> (message, fingerprint, raw token count); holds a reference so ids stay unique
+_message_cache: OrderedDict[int, tuple[dict[str, Any], tuple[int, int], int]] = OrderedDict()
+_calibration: dict[str, float] = {}
+# Agents pass the same tool list every turn: (tools, len(tools), raw count)
+_tools_cache: tuple[list[dict[str, Any]], int, int] | None = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Return the active counter, choosing the best available on first use."""
+    global _counter
+    if _counter is None:
+        with _lock:
+            if _counter is None:
+                _counter = _default_counter()
+                logger.debug("Token counter: %s", _counter.name)
+    return _counter
+
+
+def set_token_counter(counter: TokenCounter | None) -> None:
+    """Install *counter* (``None`` restores auto-selection) and drop cached counts."""
+    global _counter, _tools_cache
+    with _lock:
+        _counter = counter
+        _message_cache.clear()
+        _tools_cache = None
+
+
+def _message_text_parts(msg: dict[str, Any]) -> list[str]:
+    parts = [str(msg.get("content", "") or "")]
+    for tc in msg.get("tool_calls", None) or []:
+        fn = tc.get("function", {})
+        args = fn.get("arguments", "")
+        parts.append(str(fn.get("name", "")))
+        parts.append(args if isinstance(args, str) else json.dumps(args))
+    return parts
+
+
+def message_tokens(msg: dict[str, Any]) -> int:
+    """Raw (uncalibrated) token count of one message, memoized per message object."""
+    counter = get_token_counter()
+    content = msg.get("content", "")
+    fingerprint = (len(content) if isinstance(content, str) else -1, len(msg.get("tool_calls", None) or []))
+    key = id(msg)
+    with _lock:
+        cached = _message_cache.get(key)
+        if cached is not None and cached[0] is msg and cached[1] == fingerprint:
+            _message_cache.move_to_end(key)
+            return cached[2]
+    count = sum(counter.count_text(p) for p in _message_text_parts(msg))
+    with _lock:
+        _message_cache[key] = (msg, fingerprint, count)
+        if len(_message_cache) > _MESSAGE_CACHE_SIZE:
+            _message_cache.popitem(last=False)
+    return count
+
+
+def tools_tokens(tools: list[dict[str, Any]] | None) -> int:
+    """Raw token count of tool schemas as sent to the provider."""
+    global _tools_cache
+    if not tools:
+        return 0
+    cached = _tools_cache
+    if cached is not None and cached[0] is tools and cached[1] == len(tools):
+        return cached[2]
+    count = get_token_counter().count_text(json.dumps(tools))
+    _tools_cache = (tools, len(tools), count)
+    return count
+
+
+# ── Calibration against provider-reported usage ──────────────────────
+
+
+def calibration_factor(model: str | None) -> float:
+    if model is None:
+        return 1.0
+    return _calibration.get(model, 1.0)
+
+
+def calibrate(model: str, estimated_raw: int, reported: int) -> None:
+    """Fold one (raw estimate, provider-reported input tokens) sample into *model*'s ratio."""
+    if estimated_raw < _CALIBRATION_MIN_SAMPLE or reported <= 0:
+        return
+    sample = min(max(reported / estimated_raw, _CALIBRATION_MIN), _CALIBRATION_MAX)
+    with _lock:
+        prev = _calibration.get(model)
+        _calibration[model] = sample if prev is None else prev + _CALIBRATION_ALPHA * (sample - prev)
+
+
+def reset_calibration() -> None:
+    with _lock:
+        _calibration.clear()
+
+
+def scaled(raw: int, model: str | None) -> int:
+    return int(raw * calibration_factor(model))
@@ -0,0 +1,64 @@
+"""Coercion and summaries of the arguments LLMs send with tool calls."""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+def safe_int(value: object, default: int | None = None) -> int | None:
+    """Coerce an LLM tool argument to int, tolerating str/float/None.
+
+    LLMs frequently send ``"10"`` (string), ``10.0`` (float), or omit
+    optional parameters entirely.  This helper handles all cases without
+    crashing on unexpected types.
+    """
+    if value is None:
+        return default
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return int(float(value))
+            except (ValueError, OverflowError):
+                return default
+    return default
+
+
+def summarize_args(name: str, args: dict[str, Any]) -> str:
+    """One-line description of a tool call for the event log."""
+    if name == "Bash":
+        cmd = str(args.get("command", ""))
+        return cmd[:200] if len(cmd) > 200 else cmd
+    if name == "Read":
+        path = str(args.get("file_path", ""))
+        offset = safe_int(args.get("offset"))
+        limit = safe_int(args.get("limit"))
+        if offset or limit:
+            o = offset or 1
+            lim = limit or 0
+            return f"{path} (lines {o}-{o + lim})"
+        return path
+    if name == "Write":
+        return str(args.get("file_path", ""))
+    if name == "ReadFiles":
+        paths = args.get("file_paths", [])
+        if len(paths) <= 3:
+            return ", ".join(str(p) for p in paths)
+        return f"{len(paths)} files"
+    if name == "Edit":
+        return str(args.get("file_path", ""))
+    if name == "Glob":
+        return str(args.get("pattern", ""))
+    if name == "Grep":
+        p = str(args.get("pattern", ""))
+        path = str(args.get("path", "."))
+        return f"{p!r} in {path}" if path and path != "." else repr(p)
+    if name == "InstallPackage":
+        return str(args.get("package_name", ""))
+    keys = list(args.keys())[:3]
+    return ", ".join(f"{k}=..." for k in keys) if keys else ""
@@ -0,0 +1,117 @@
+"""Session-scoped cache for read-only tool results.
+
+Agents often ``Read`` the same file or ``Grep`` the same pattern several
+times in one session.  ``ToolResultCache`` remembers each result together
+with a *stamp* of what it depends on; when the same call repeats and the
+stamp still matches, the agent gets a one-line "unchanged since turn N"
+note instead of the full output, saving the I/O and the prompt tokens.
+
+* ``Read`` / ``ReadFiles`` stamp each file's ``(mtime_ns, size)`` (the
+  ``line_index.file_key`` ranged reads use) plus a per-path change counter.
+* ``Glob`` / ``Grep`` stamp the process-wide change counter and the search
+  root's mtime, so any file change anywhere invalidates them.
+
+The change counters are bumped by ``note_file_changed``, which ``Tools``
+calls wherever it emits ``M.FCHG`` (``write_file`` / ``edit_file``, from
+this agent or another module's agent in the same process), and after every
+``Bash`` command and every ``run_capture`` subprocess (validation and quality
+tools may rewrite files in place); it also marks the paths dirty in the
+shared ``project_index``.  Entries are only reused while the turn that produced
+the full output is still in the agent's history (``forget_before``).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from . import project_index
+from .line_index import file_key
+
+_lock = threading.Lock()
+_generation = 0
+_path_generations: dict[str, int] = {}
+
+
+def note_file_changed(path: str | None = None) -> None:
+    """Invalidate cached results that may depend on *path* (``None``: unknown paths)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        if path is not None:
+            _path_generations[os.path.realpath(path)] = _generation
+    project_index.note_changed(path)
+
+
+def _file_stamp(path: str) -> tuple[int, int, int] | None:
+    key = file_key(path)  # the same key the Read line index is validated against
+    if key is None:
+        return None
+    real, mtime_ns, size = key
+    return mtime_ns, size, _path_generations.get(real, 0)
+
+
+def _tree_stamp(root: str) -> tuple[int, int] | None:
+    try:
+        return _generation, os.stat(root).st_mtime_ns
+    except OSError:
+        return None
+
+
+@dataclass
+class _Entry:
+    stamp: tuple[Any, ...]
+    turn: int
+
+
+class ToolResultCache:
+    """Per-``Tools`` memo of read-only results, keyed by tool name and arguments."""
+
+    def __init__(self) -> None:
+        self.turn = 0
+        self.hits = 0
+        self._entries: dict[tuple[Any, ...], _Entry] = {}
+        self._lock = threading.Lock()
+
+    def files(self, tool: str, key: tuple[Any, ...], paths: list[str], run: Callable[[], str]) -> str:
+        """Cached call of a tool whose result depends only on the contents of *paths*."""
+        stamps = [_file_stamp(p) for p in paths]
+        stamp = None if any(s is None for s in stamps) else tuple(stamps)
+        return self._call(tool, key, stamp, run)
+
+    def tree(self, tool: str, key: tuple[Any, ...], root: str, run: Callable[[], str]) -> str:
+        """Cached call of a tool that scans the tree under *root*."""
+        return self._call(tool, key, _tree_stamp(root), run)
+
+    def _call(self, tool: str, key: tuple[Any, ...], stamp: tuple[Any, ...] | None, run: Callable[[], str]) -> str:
+        full_key = (tool, *key)
+        if stamp is None:
+            return run()
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry.stamp == stamp:
+                self.hits += 1
+                return (
+                    f"[{tool} result unchanged since turn {entry.turn} — "
+                    f"the output shown there is still current; reuse it]"
+                )
+        result = run()
+        if result.startswith("Error"):
+            return result
+        with self._lock:
+            self._entries[full_key] = _Entry(stamp=stamp, turn=self.turn)
+        return result
+
+    def forget_before(self, turn: int) -> None:
+        """Drop entries whose full output was produced before *turn* (no longer in history)."""
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e.turn < turn]
+            for k in stale:
+                del self._entries[k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
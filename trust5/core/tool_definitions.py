@@ -189,7 +189,11 @@ def build_tool_definitions() -> list[dict[str, Any]]:
             "type": "function",
             "function": {
                 "name": "Grep",
-                "description": "Search file contents for a regex pattern. Returns matching lines.",
+                "description": (
+                    "Search file contents for a regex pattern (Python re syntax, not grep BRE: "
+                    "use a|b for alternation, not a\\|b). Matches are per line. Returns matching "
+                    "lines as path:line:text, grouped by file (dependency and build directories are skipped)."
+                ),
                 "parameters": {
                     "type": "object",
                     "properties": {
@@ -205,6 +209,10 @@ def build_tool_definitions() -> list[dict[str, Any]]:
                             "type": "string",
                             "description": "File glob filter (e.g. '*.py')",
                         },
+                        "context": {
+                            "type": "integer",
+                            "description": "Lines of context to show around each match (default 0, max 10)",
+                        },
                     },
                     "required": ["pattern"],
                 },
@@ -0,0 +1,59 @@
+"""Concurrent dispatch of one turn's tool calls.
+
+Models often return several ``Read`` / ``Grep`` / ``Glob`` calls in a single
+turn.  ``run_tool_calls`` splits the calls into batches at every write-class
+call: runs of consecutive read-only calls execute concurrently on a bounded
+thread pool, and every other call runs alone, after everything before it
+has finished.  A later read therefore always observes an earlier write, and
+results come back in the original call order.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+# Built-in tools with no side effects on the workspace.
+READ_ONLY_TOOLS = frozenset({"Read", "ReadFiles", "Glob", "Grep"})
+
+
+def tool_name(tool_call: dict[str, Any]) -> str:
+    return str(tool_call.get("function", {}).get("name", ""))
+
+
+def plan_batches(tool_calls: list[dict[str, Any]], is_read_only: Callable[[str], bool]) -> list[list[int]]:
+    """Group call indices: consecutive read-only calls share a batch, others get their own."""
+    batches: list[list[int]] = []
+    run: list[int] = []
+    for idx, tc in enumerate(tool_calls):
+        if is_read_only(tool_name(tc)):
+            run.append(idx)
+            continue
+        if run:
+            batches.append(run)
+            run = []
+        batches.append([idx])
+    if run:
+        batches.append(run)
+    return batches
+
+
+def run_tool_calls(
+    tool_calls: list[dict[str, Any]],
+    execute: Callable[[dict[str, Any]], str],
+    is_read_only: Callable[[str], bool],
+    max_workers: int,
+) -> list[str]:
+    """Execute *tool_calls* with *execute*; returns results in call order."""
+    results: list[str] = [""] * len(tool_calls)
+    for batch in plan_batches(tool_calls, is_read_only):
+        if len(batch) == 1 or max_workers <= 1:
+            for idx in batch:
+                results[idx] = execute(tool_calls[idx])
+            continue
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batch))) as pool:
+            futures = {idx: pool.submit(execute, tool_calls[idx]) for idx in batch}
+            for idx, future in futures.items():
+                results[idx] = future.result()
+    return results
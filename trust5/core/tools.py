@@ -1,4 +1,3 @@
-import difflib
 import glob
 import json
 import logging
@@ -8,10 +7,26 @@ import shlex
 import subprocess
 from typing import Any
 
+from . import code_search
+from .bash_session import BashSession, BashSessionError, bash_env
 from .init import ProjectInitializer
-from .message import M, emit, emit_block
+from .file_durability import write_text
+from .line_diff import unified_diff
+from .line_index import get_line_index, read_lines
+from .message import M, emit, emit_block, has_block_consumers
+from .project_index import get_index, matches_test_pattern
+from .subprocess_capture import run_capture
+from .tool_cache import ToolResultCache, note_file_changed
 from .tool_definitions import build_ask_user_definition, build_tool_definitions
-from .constants import MAX_GLOB_RESULTS, MAX_READ_FILE_SIZE, MAX_READFILES_COUNT, MAX_READFILES_FILE_SIZE
+from .constants import (
+    GREP_TIMEOUT,
+    MAX_GLOB_RESULTS,
+    MAX_GREP_MATCHES,
+    MAX_GREP_MATCHES_PER_FILE,
+    MAX_READ_FILE_SIZE,
+    MAX_READFILES_COUNT,
+    MAX_READFILES_FILE_SIZE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -83,12 +98,14 @@ def _is_trust5_internal_path(path: str) -> bool:
     return False
 
 
-def _is_project_scoped_rm(command: str, workdir: str) -> bool:
+def _is_project_scoped_rm(command: str, workdir: str, cwd: str | None = None) -> bool:
     """Allow ``rm -rf`` when ALL targets resolve within the project directory.
 
     Agents legitimately need to remove directories during reimplementation
     (e.g. ``rm -rf celery_core/``).  This function parses the rm targets and
-    verifies every one resolves strictly *inside* ``workdir``.
+    verifies every one resolves strictly *inside* ``workdir``.  Relative
+    targets are resolved against *cwd*, the directory the command runs in
+    (a persistent shell may have ``cd``-ed away from ``workdir``).
 
     Returns False (unsafe) for:
     - Bare ``rm -rf`` with no targets
@@ -100,6 +117,7 @@ def _is_project_scoped_rm(command: str, workdir: str) -> bool:
         return False
 
     abs_workdir = os.path.realpath(workdir)
+    abs_cwd = os.path.realpath(cwd) if cwd else abs_workdir
 
     try:
         parts = shlex.split(command)
@@ -131,7 +149,7 @@ def _is_project_scoped_rm(command: str, workdir: str) -> bool:
         # Reject shell expansions we can't resolve statically
         if target.startswith("~") or target.startswith("$"):
             return False
-        resolved = os.path.realpath(os.path.join(abs_workdir, target))
+        resolved = os.path.realpath(os.path.join(abs_cwd, target))
         # Must be strictly inside workdir (not workdir itself)
         if not resolved.startswith(abs_workdir + os.sep):
             return False
@@ -139,26 +157,18 @@ def _is_project_scoped_rm(command: str, workdir: str) -> bool:
     return True
 
 
-_TEST_FILE_PATTERNS: list[re.Pattern[str]] = [
-    re.compile(r"(^|/)test_[^/]+$"),  # test_foo.py
-    re.compile(r"(^|/)[^/]+_test\.[^/]+$"),  # foo_test.py, foo_test.go
-    re.compile(r"(^|/)tests/"),  # tests/ directory
-    re.compile(r"(^|/)test/"),  # test/ directory (Maven, Gradle)
-    re.compile(r"(^|/)spec/"),  # spec/ directory
-    re.compile(r"(^|/)__tests__/"),  # __tests__/ directory (Jest)
-    re.compile(r"(^|/)[^/]+_spec\.[^/]+$"),  # foo_spec.rb
-    re.compile(r"(^|/)conftest\.py$"),  # pytest conftest.py
-    re.compile(r"(^|/)[^/]+\.test\.[^/]+$"),  # foo.test.ts, foo.test.js (Jest/Vitest)
-    re.compile(r"(^|/)Test[A-Z][^/]*\.java$"),  # TestFoo.java (JUnit)
-]
-
-
-def _matches_test_pattern(path: str) -> bool:
-    """Check if a file path matches common test file patterns."""
-    for pattern in _TEST_FILE_PATTERNS:
-        if pattern.search(path):
-            return True
-    return False
+def _run_in_session(session: BashSession, command: str, workdir: str) -> str:
+    try:
+        try:
+            stdout, stderr, code = session.run(command, workdir, timeout=120)
+        finally:
+            note_file_changed()  # a shell command may have changed any file
+        return f"Stdout:\n{stdout}\nStderr:\n{stderr}\nExit Code: {code}"
+    except subprocess.TimeoutExpired:
+        lost = "" if session.alive else " (the shell was restarted; cwd and exported variables were reset)"
+        return f"Error: command timed out after 120s: {command[:200]}{lost}"
+    except (OSError, BashSessionError) as e:
+        return f"Error running command '{command[:200]}': {e} (the shell will be restarted)"
 
 
 class Tools:
@@ -183,6 +193,7 @@ class Tools:
         if denied_files:
             self._denied_files = {os.path.realpath(f) for f in denied_files}
         self._deny_test_patterns = deny_test_patterns
+        self.result_cache = ToolResultCache()
 
     @classmethod
     def set_non_interactive(cls, value: bool = True) -> None:
@@ -215,7 +226,7 @@ class Tools:
             )
 
         # Layer 2: Pattern-based test file blocking
-        if self._deny_test_patterns and _matches_test_pattern(real_path):
+        if self._deny_test_patterns and matches_test_pattern(real_path):
             return (
                 f"BLOCKED: Write to {real_path} denied — matches test file pattern. "
                 f"Test files are read-only for implementer/repairer agents."
@@ -255,29 +266,22 @@ class Tools:
     ) -> str:
         """Reads a file from the local filesystem.
 
-        When offset/limit are provided, returns only the specified line range.
-        Lines are 1-indexed (offset=1 is the first line). Without offset/limit,
-        returns the full file content.
+        When offset/limit are provided, returns only the specified line range
+        (seeking via the cached ``line_index``). Lines are 1-indexed (offset=1
+        is the first line). Without offset/limit, returns the full file content.
         """
         try:
+            if offset is not None or limit is not None:
+                return read_lines(file_path, offset, limit)
             # Size check only for full reads (no offset/limit)
-            if offset is None and limit is None:
-                size = os.path.getsize(file_path)
-                if size > MAX_READ_FILE_SIZE:
-                    return (
-                        f"Error: file {file_path} is too large ({size:,} bytes, "
-                        f"limit is {MAX_READ_FILE_SIZE:,} bytes). "
-                        f"Use offset/limit to read portions."
-                    )
+            size = os.path.getsize(file_path)
+            if size > MAX_READ_FILE_SIZE:
+                return (
+                    f"Error: file {file_path} is too large ({size:,} bytes, {get_line_index(file_path).lines:,} lines, "
+                    f"limit is {MAX_READ_FILE_SIZE:,} bytes). "
+                    f"Use offset/limit to read portions."
+                )
             with open(file_path, encoding="utf-8") as f:
-                if offset is not None or limit is not None:
-                    lines = f.readlines()
-                    total = len(lines)
-                    start = max(0, (offset or 1) - 1)  # 1-indexed to 0-indexed
-                    end = start + limit if limit else total
-                    selected = lines[start:end]
-                    header = f"[Lines {start + 1}-{min(end, total)} of {total}]\n"
-                    return header + "".join(selected)
                 return f.read()
         except OSError as e:  # read: filesystem errors
             return f"Error reading file {file_path}: {str(e)}"
@@ -288,8 +292,10 @@ class Tools:
             blocked = self._check_write_allowed(real_path)
             if blocked:
                 return blocked
+            existed = os.path.exists(real_path)
+            show_blocks = has_block_consumers()  # the old content is only needed for the diff
             old_content = None
-            if os.path.exists(real_path):
+            if existed and show_blocks:
                 try:
                     with open(real_path, encoding="utf-8") as f:
                         old_content = f.read()
@@ -298,21 +304,12 @@ class Tools:
 
             emit(M.TWRT, f"Writing {len(content)} chars to {real_path}")
             os.makedirs(os.path.dirname(real_path), exist_ok=True)
-            with open(real_path, "w", encoding="utf-8") as f:
-                f.write(content)
-                f.flush()
-                os.fsync(f.fileno())
-
-            if old_content is not None and old_content != content:
-                diff = difflib.unified_diff(
-                    old_content.splitlines(),
-                    content.splitlines(),
-                    fromfile=f"a/{file_path}",
-                    tofile=f"b/{file_path}",
-                    lineterm="",
-                )
-                emit_block(M.KDIF, f"PATCH {file_path}", "\n".join(diff), max_lines=60)
-            else:
+            write_text(real_path, content)
+
+            if show_blocks and old_content is not None and old_content != content:
+                diff = unified_diff(old_content, content, f"a/{file_path}", f"b/{file_path}", max_lines=60)
+                emit_block(M.KDIF, f"PATCH {file_path}", diff, max_lines=60)
+            elif show_blocks:
                 emit_block(
                     M.KCOD,
                     f"NEW {file_path} ({len(content)} chars)",
@@ -320,7 +317,8 @@ class Tools:
                     max_lines=60,
                 )
 
-            action = "modified" if old_content is not None else "created"
+            action = "modified" if existed else "created"
+            note_file_changed(real_path)
             emit(M.FCHG, f"path={real_path} action={action}")
             return f"Successfully wrote to {file_path}"
         except OSError as e:  # write: filesystem errors
@@ -340,8 +338,8 @@ class Tools:
                 size = os.path.getsize(fp)
                 if size > MAX_READFILES_FILE_SIZE:
                     results[fp] = (
-                        f"Error: file too large ({size:,} bytes, "
-                        f"limit is {MAX_READFILES_FILE_SIZE:,} bytes)"
+                        f"Error: file too large ({size:,} bytes, {get_line_index(fp).lines:,} lines, "
+                        f"limit is {MAX_READFILES_FILE_SIZE:,} bytes). Use Read with offset/limit."
                     )
                     continue
                 with open(fp, encoding="utf-8") as f:
@@ -374,59 +372,45 @@ class Tools:
 
         new_content = content.replace(old_string, new_string, 1)
         try:
-            with open(real_path, "w", encoding="utf-8") as f:
-                f.write(new_content)
-                f.flush()
-                os.fsync(f.fileno())
+            write_text(real_path, new_content)
         except OSError as e:  # edit_file write: filesystem errors
             return f"Error writing {real_path}: {e}"
 
-        diff = difflib.unified_diff(
-            content.splitlines(),
-            new_content.splitlines(),
-            fromfile=f"a/{file_path}",
-            tofile=f"b/{file_path}",
-            lineterm="",
-        )
-        emit_block(M.KDIF, f"EDIT {file_path}", "\n".join(diff), max_lines=60)
+        if has_block_consumers():
+            diff = unified_diff(content, new_content, f"a/{file_path}", f"b/{file_path}", max_lines=60)
+            emit_block(M.KDIF, f"EDIT {file_path}", diff, max_lines=60)
+        note_file_changed(real_path)
         emit(M.FCHG, f"path={real_path} action=edited")
         return f"Successfully edited {file_path}"
 
     @staticmethod
-    def run_bash(command: str, workdir: str = ".") -> str:
+    def run_bash(command: str, workdir: str = ".", session: BashSession | None = None) -> str:
         """Executes a bash command with destructive-pattern blocklist.
 
         Automatically activates project virtualenv if .venv or venv exists
         in the workdir, preventing pollution of Trust5's own environment.
+        With a *session* the command runs in that persistent shell instead
+        of a fresh subprocess (see ``bash_session``).
         """
         is_safe_context = any(p.search(command) for p in _SAFE_COMMAND_PATTERNS)
         if not is_safe_context:
-            is_safe_context = _is_project_scoped_rm(command, workdir)
+            cwd = session.command_cwd(workdir) if session is not None else None
+            is_safe_context = _is_project_scoped_rm(command, workdir, cwd)
         if not is_safe_context:
             for pattern in _BLOCKED_COMMAND_PATTERNS:
                 if pattern.search(command):
                     emit(M.SWRN, f"BLOCKED dangerous command: {command[:200]}")
                     return f"Error: command blocked by safety filter. Pattern matched: {pattern.pattern}"
+        if session is not None:
+            return _run_in_session(session, command, workdir)
         try:
-            # Build environment with venv activation if present
-            env = os.environ.copy()
-            for venv_dir in (".venv", "venv"):
-                venv_bin = os.path.join(workdir, venv_dir, "bin")
-                if os.path.isdir(venv_bin):
-                    env["PATH"] = f"{venv_bin}:{env.get('PATH', '')}"
-                    env["VIRTUAL_ENV"] = os.path.join(os.path.abspath(workdir), venv_dir)
-                    env.pop("PYTHONHOME", None)
-                    logger.debug("Activated venv at %s for bash command", venv_bin)
-                    break
-
-            result = subprocess.run(
+            result = run_capture(
                 command,
                 shell=True,
                 cwd=workdir,
-                capture_output=True,
-                text=True,
                 timeout=120,
-                env=env,
+                env=bash_env(workdir),
+                log_name="bash",
             )
             return f"Stdout:\n{result.stdout}\nStderr:\n{result.stderr}\nExit Code: {result.returncode}"
         except subprocess.TimeoutExpired:
@@ -438,7 +422,11 @@ class Tools:
     def list_files(pattern: str, workdir: str = ".") -> list[str]:
         """Lists files matching a glob pattern."""
         try:
-            files = glob.glob(os.path.join(workdir, pattern), recursive=True)
+            indexed = get_index(workdir).glob(pattern) if os.path.isdir(workdir) else None
+            if indexed is not None:
+                files = [os.path.join(workdir, f) for f in indexed]
+            else:  # hidden, pruned or absolute patterns: not in the project index
+                files = glob.glob(os.path.join(workdir, pattern), recursive=True)
             if len(files) > MAX_GLOB_RESULTS:
                 logger.warning("Glob pattern %r matched %d files, truncated to %d", pattern, len(files), MAX_GLOB_RESULTS)
                 files = files[:MAX_GLOB_RESULTS]
@@ -447,20 +435,19 @@ class Tools:
             return [f"Error listing files: {str(e)}"]
 
     @staticmethod
-    def grep_files(pattern: str, path: str = ".", include: str = "*") -> str:
-        """Search files using grep with safe argument passing (no shell interpolation)."""
+    def grep_files(pattern: str, path: str = ".", include: str = "*", context: int = 0) -> str:
+        """Search file contents in-process (see ``code_search``); no subprocess, no shell."""
         try:
-            cmd = ["grep", "-r", pattern, path, f"--include={include}"]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=60,
+            return code_search.search(
+                pattern,
+                path,
+                include,
+                context=max(0, min(context, 10)),
+                max_per_file=MAX_GREP_MATCHES_PER_FILE,
+                max_total=MAX_GREP_MATCHES,
+                timeout=GREP_TIMEOUT,
             )
-            return f"Stdout:\n{result.stdout}\nStderr:\n{result.stderr}\nExit Code: {result.returncode}"
-        except subprocess.TimeoutExpired:
-            return "Error: grep timed out after 60s"
-        except (OSError, subprocess.SubprocessError) as e:
+        except (OSError, RuntimeError) as e:  # walk/thread pool errors
             return f"Error running grep: {e}"
 
     @staticmethod
@@ -28,7 +28,9 @@ from stabilize.recovery import recover_on_startup
 
 from .core.agent_task import AgentTask
 from .core.event_bus import init_bus, shutdown_bus
+from .core.http_pool import close_all as close_http_pool
 from .core.implementer_task import ImplementerTask
+from .core.llm_metrics import dump_metrics
 from .core.loop import LoopTask
 from .core.mcp_manager import init_mcp, shutdown_mcp
 from .core.message import M, emit
@@ -50,6 +52,7 @@ logger = logging.getLogger(__name__)
 
 _viewer_initialized = False
 _event_sourcing_configured = False
+_metrics_dump_registered = False
 
 
 def _resolve_db_path() -> str:
@@ -94,6 +97,15 @@ def _configure_event_sourcing_once(conn_str: str) -> None:
     configure_event_sourcing(event_store)
 
 
+def _register_metrics_dump_once() -> None:
+    """Write per-call LLM telemetry to ``.trust5/metrics/`` on exit."""
+    global _metrics_dump_registered
+    if _metrics_dump_registered:
+        return
+    _metrics_dump_registered = True
+    atexit.register(dump_metrics, os.path.abspath(os.getcwd()))
+
+
 def _shutdown_ipc(viewer: StdoutViewer) -> None:
     viewer.stop()
     shutdown_bus()
@@ -127,6 +139,8 @@ def setup_stabilize(
     _init_viewer_once(use_tui)
     init_mcp()
     atexit.register(shutdown_mcp)
+    atexit.register(close_http_pool)
+    _register_metrics_dump_once()
     _configure_event_sourcing_once(conn_str)
 
     store = SqliteWorkflowStore(conn_str, create_tables=True)
@@ -31,6 +31,7 @@ from .core.config import ensure_global_config, load_global_config
 from .core.git import GitManager
 from .core.init import ProjectInitializer
 from .core.llm import reset_llm_state
+from .core.llm_cassette import configure_cassette
 from .core.message import M, emit
 from .core.ollama_models import ensure_ollama_models
 from .core.plan_parser import parse_plan_output
@@ -150,11 +151,24 @@ def plan(request: str) -> None:
 
 
 @app.command()
-def develop(request: str) -> None:
+def develop(
+    request: str,
+    record: str = typer.Option("", "--record", help="Save every LLM response to this directory"),
+    replay: str = typer.Option("", "--replay", help="Serve LLM responses from a --record directory (no network)"),
+) -> None:
+    if record and replay:
+        emit(M.SERR, "--record and --replay are mutually exclusive")
+        raise typer.Exit(1)
+    if replay and not os.path.isdir(replay):
+        emit(M.SERR, f"Cassette directory not found: {replay}")
+        raise typer.Exit(1)
     Tools.set_non_interactive(True)
     _init_viewer_once(_USE_TUI)
+    if record or replay:
+        configure_cassette(replay or record, "replay" if replay else "record")
     validate_provider()
-    ensure_ollama_models()
+    if not replay:
+        ensure_ollama_models()
 
     def _pipeline(shutdown: threading.Event | None = None) -> Workflow | None:
         """Run plan -> implement pipeline.
@@ -459,6 +473,27 @@ def auth_status() -> None:
             emit(M.WFAL, f"  {name}{marker}: no token")
 
 
+@app.command()
+def metrics(by: str = typer.Option("model", "--by", help="Group by: model, provider, tier, agent or stage")) -> None:
+    """Summarize LLM call telemetry recorded under .trust5/metrics/."""
+    from .core.llm_metrics import load_metrics, summarize
+
+    if by not in ("model", "provider", "tier", "agent", "stage"):
+        emit(M.SERR, f"Unknown grouping '{by}'. Use model, provider, tier, agent or stage.")
+        raise typer.Exit(1)
+    records = load_metrics()
+    if not records:
+        emit(M.SWRN, "No LLM metrics recorded yet (.trust5/metrics/ is empty).")
+        return
+    for key, row in summarize(records, by=by).items():
+        emit(
+            M.SINF,
+            f"  {key or '-'}: calls={row['calls']} errors={row['errors']} retries={row['retries']} "
+            f"hops={row['fallback_hops']} ttft_p50={row['ttft_p50']}s ttft_p90={row['ttft_p90']}s "
+            f"dur_p50={row['duration_p50']}s dur_p90={row['duration_p90']}s tok/s={row['tokens_per_sec_p50']}",
+        )
+
+
 @app.command()
 def loop() -> None:
     Tools.set_non_interactive(True)
@@ -23,6 +23,8 @@ from stabilize import StageExecution, Task, TaskResult
 from ..core.constants import DEFAULT_MAX_MUTANTS, SUBPROCESS_TIMEOUT
 from ..core.lang import LanguageProfile
 from ..core.message import M, emit
+from ..core.project_index import get_index
+from ..core.subprocess_capture import record_command_usage, run_capture
 
 logger = logging.getLogger(__name__)
 
@@ -65,15 +67,11 @@ def _find_source_files(
     skip_dirs: tuple[str, ...],
 ) -> list[str]:
     """Find non-test source files."""
-    files: list[str] = []
-    for dirpath, dirnames, filenames in os.walk(project_root):
-        dirnames[:] = [d for d in dirnames if d not in skip_dirs and not d.startswith(".")]
-        for fname in filenames:
-            if _TEST_PATTERN.search(fname):
-                continue
-            if any(fname.endswith(ext) for ext in extensions):
-                files.append(os.path.join(dirpath, fname))
-    return files
+    return [
+        os.path.join(project_root, rel)
+        for rel in get_index(project_root).paths(extensions, skip_dirs)
+        if not _TEST_PATTERN.search(os.path.basename(rel))
+    ]
 
 
 def generate_mutants(
@@ -141,6 +139,7 @@ class MutationTask(Task):
     quality gate will factor in the low mutation score.
     """
 
+    @record_command_usage
     def execute(self, stage: StageExecution) -> TaskResult:
         project_root = stage.context.get("project_root", os.getcwd())
         profile_data: dict[str, Any] = stage.context.get("language_profile", {})
@@ -169,13 +168,8 @@ class MutationTask(Task):
             original_content = None
             try:
                 original_content = _apply_mutant(mutant)
-                result = subprocess.run(
-                    list(test_cmd),
-                    cwd=project_root,
-                    capture_output=True,
-                    text=True,
-                    timeout=SUBPROCESS_TIMEOUT,
-                )
+                # only the exit status matters; keep just enough output to debug with
+                result = run_capture(list(test_cmd), cwd=project_root, timeout=SUBPROCESS_TIMEOUT, limit=65536)
                 if result.returncode != 0:
                     killed += 1
                 else:
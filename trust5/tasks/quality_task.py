@@ -26,6 +26,7 @@ from ..core.quality_gates import (
     validate_methodology,
     validate_phase,
 )
+from ..core.subprocess_capture import record_command_usage
 from ..tasks.watchdog_task import signal_pipeline_done
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,7 @@ logger = logging.getLogger(__name__)
 class QualityTask(Task):
     """Runs TRUST 5 quality gate; jumps to repair on failure."""
 
+    @record_command_usage
     def execute(self, stage: StageExecution) -> TaskResult:
         project_root = stage.context.get("project_root", os.getcwd())
         attempt = stage.context.get("quality_attempt", 0)
@@ -133,7 +135,7 @@ class QualityTask(Task):
             from ..core.llm import LLM
 
             try:
-                compliance_llm = LLM.for_tier("fast", thinking_level=None)
+                compliance_llm = LLM.for_tier("fast", thinking_level=None, stage=stage.name)
             except (OSError, ValueError, RuntimeError) as exc:  # LLM init: auth/config/provider errors
                 logger.debug("Failed to create compliance LLM: %s", exc)
                 compliance_llm = None
@@ -9,6 +9,7 @@ from stabilize import StageExecution, Task, TaskResult
 from stabilize.errors import TransientError
 
 from ..core.agent import Agent
+from ..core.agent_checkpoint import AgentCheckpoint
 from ..core.context_builder import build_repair_prompt
 from ..core.context_keys import check_jump_limit, increment_jump_count, propagate_context
 from ..core.error_summarizer import summarize_errors
@@ -16,6 +17,7 @@ from ..core.lang import LanguageProfile, build_language_context, detect_language
 from ..core.llm import LLM, LLMError
 from ..core.mcp_manager import mcp_clients
 from ..core.message import M, emit
+from ..core.subprocess_capture import run_capture
 from .watchdog_task import check_rebuild_signal, clear_rebuild_signal
 
 logger = logging.getLogger(__name__)
@@ -179,6 +181,7 @@ class RepairTask(Task):
         summarized_output = summarize_errors(
             test_output,
             failure_type=failure_type or "test",
+            stage=module_name or stage.name,
         )
 
         system_prompt = self._load_repairer_prompt(profile_data)
@@ -264,7 +267,7 @@ class RepairTask(Task):
             if cross_mod_hint:
                 user_prompt = cross_mod_hint + user_prompt
 
-        llm = LLM.for_tier("best", stage_name="repairer")
+        llm = LLM.for_tier("best", stage_name="repairer", stage=module_name or stage.name)
 
         # Integration repair (no owned_files) operates across all modules.
         # It must be able to fix test infrastructure (imports, fixtures)
@@ -296,6 +299,7 @@ class RepairTask(Task):
                 denied_files=test_files if deny_tests else None,
                 deny_test_patterns=deny_tests,
                 mcp_clients=mcp,
+                checkpoint=AgentCheckpoint.for_stage(stage, "repairer"),
             )
 
             try:
@@ -418,11 +422,9 @@ class RepairTask(Task):
         env = _build_test_env(project_root, profile_data)
 
         try:
-            result = subprocess.run(
+            result = run_capture(
                 list(test_cmd),
                 cwd=project_root,
-                capture_output=True,
-                text=True,
                 timeout=60,
                 env=env,
             )
@@ -430,11 +432,9 @@ class RepairTask(Task):
             if result.returncode != 0 and "unrecognized arguments: --timeout" in (result.stderr or ""):
                 cleaned = [t for t in test_cmd if not t.startswith("--timeout")]
                 if len(cleaned) < len(list(test_cmd)):
-                    result = subprocess.run(
+                    result = run_capture(
                         cleaned,
                         cwd=project_root,
-                        capture_output=True,
-                        text=True,
                         timeout=60,
                         env=env,
                     )
@@ -184,6 +184,7 @@ class ReviewTask(Task):
             llm = LLM.for_tier(
                 tier=config.review_model_tier,
                 stage_name="review",
+                stage=stage.name,
             )
             with mcp_clients() as clients:
                 agent = Agent(
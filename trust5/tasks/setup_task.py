@@ -17,6 +17,7 @@ from stabilize import StageExecution, Task, TaskResult
 
 from ..core.constants import SETUP_TIMEOUT
 from ..core.message import M, emit
+from ..core.subprocess_capture import record_command_usage, run_capture
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ logger = logging.getLogger(__name__)
 class SetupTask(Task):
     """Runs planner-specified setup commands to bootstrap the project environment."""
 
+    @record_command_usage
     def execute(self, stage: StageExecution) -> TaskResult:
         project_root = stage.context.get("project_root", os.getcwd())
         setup_commands: list[str] = stage.context.get("setup_commands", [])
@@ -100,14 +102,7 @@ def _run_setup_command(cmd: str, cwd: str) -> tuple[int, str]:
     """
     safe_cmd = _quote_version_specifiers(cmd)
     try:
-        proc = subprocess.run(
-            safe_cmd,
-            shell=True,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=SETUP_TIMEOUT,
-        )
+        proc = run_capture(safe_cmd, shell=True, cwd=cwd, timeout=SETUP_TIMEOUT, log_name="setup")
         return proc.returncode, (proc.stdout + "\n" + proc.stderr).strip()
     except subprocess.TimeoutExpired:
         return 124, f"command timed out after {SETUP_TIMEOUT}s"
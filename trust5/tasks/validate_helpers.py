@@ -7,7 +7,7 @@ import re
 import shlex
 from typing import Any
 
-from ..core.tools import _matches_test_pattern
+from ..core.project_index import get_index, matches_test_pattern
 
 logger = logging.getLogger(__name__)
 
@@ -103,7 +103,7 @@ def _filter_test_file_lint(raw_output: str, owned_files: list[str] | None = None
         if m:
             path = m.group(1)
             # Drop test-file errors
-            if _matches_test_pattern(path):
+            if matches_test_pattern(path):
                 dropped += 1
                 continue
             # Drop errors in files not owned by this module
@@ -340,7 +340,7 @@ def _strip_nonexistent_files(
                         glob_expanded = True
                         for ep in expanded:
                             rel = os.path.relpath(ep, project_root)
-                            if not _matches_test_pattern(rel):
+                            if not matches_test_pattern(rel):
                                 kept_tokens.append(rel)
                     else:
                         removed_count += 1
@@ -353,7 +353,7 @@ def _strip_nonexistent_files(
                 actual_files = [
                     f
                     for f in owned_files
-                    if os.path.exists(os.path.join(project_root, f)) and not _matches_test_pattern(f)
+                    if os.path.exists(os.path.join(project_root, f)) and not matches_test_pattern(f)
                 ]
             else:
                 # Serial pipeline: discover all source files in the project.
@@ -362,7 +362,7 @@ def _strip_nonexistent_files(
                     dirnames[:] = [d for d in dirnames if d not in _FALLBACK_SKIP_DIRS and not d.startswith(".")]
                     for fname in filenames:
                         _, ext = os.path.splitext(fname)
-                        if ext.lower() in _SOURCE_EXTENSIONS and not _matches_test_pattern(fname):
+                        if ext.lower() in _SOURCE_EXTENSIONS and not matches_test_pattern(fname):
                             rel = os.path.relpath(os.path.join(dirpath, fname), project_root)
                             actual_files.append(rel)
             if actual_files:
@@ -487,18 +487,8 @@ def _discover_test_files(
     extensions: tuple[str, ...] = _FALLBACK_EXTENSIONS,
     skip_dirs: tuple[str, ...] = _FALLBACK_SKIP_DIRS,
 ) -> list[str]:
-    """Walk project_root and return relative paths matching test file patterns."""
-    test_files: list[str] = []
-    skip = set(skip_dirs)
-    for dirpath, dirnames, filenames in os.walk(project_root):
-        dirnames[:] = [d for d in dirnames if d not in skip and not d.startswith(".")]
-        for fname in filenames:
-            if not any(fname.endswith(ext) for ext in extensions):
-                continue
-            rel = os.path.relpath(os.path.join(dirpath, fname), project_root)
-            if _matches_test_pattern(rel):
-                test_files.append(rel)
-    return sorted(test_files)
+    """Relative paths under project_root matching test file patterns (from the project index)."""
+    return sorted(get_index(project_root).paths(extensions, skip_dirs, tests=True))
 
 
 def _derive_module_test_files(
@@ -623,7 +613,7 @@ def _exclude_test_files_from_lint_cmd(cmd_str: str, language: str) -> str:
 
     Language-aware: uses the correct exclude flag syntax per linter.
     For linters without exclude flags (gofmt, go vet), filters explicit
-    file paths using ``_matches_test_pattern()``.  Idempotent — safe to
+    file paths using ``matches_test_pattern()``.  Idempotent — safe to
     call on commands that already have exclude flags.
 
     Returns the modified command string.
@@ -667,7 +657,7 @@ def _exclude_segment(segment: str, language: str) -> str:
         for i, token in enumerate(tokens):
             if i in file_indices:
                 clean = token.strip("'\"")
-                if _matches_test_pattern(clean):
+                if matches_test_pattern(clean):
                     continue
             kept.append(token)
         # If all file tokens were removed, return unchanged to avoid empty command.
@@ -16,6 +16,7 @@ from ..core.constants import MAX_REPAIR_ATTEMPTS as _MAX_REPAIR_DEFAULT
 from ..core.context_keys import check_jump_limit, increment_jump_count, propagate_context
 from ..core.lang import detect_language, get_profile
 from ..core.message import M, emit, emit_block
+from ..core.subprocess_capture import record_command_usage, run_capture
 
 # Import all helpers from the extracted module.
 # Re-exported at module level so that existing imports (tests, repair_task)
@@ -81,6 +82,7 @@ __all__ = [
 class ValidateTask(Task):
     """Runs syntax checks and tests, routing failures to repair via jump_to."""
 
+    @record_command_usage
     def execute(self, stage: StageExecution) -> TaskResult:
         start_time = time.monotonic()
         project_root = stage.context.get("project_root", os.getcwd())
@@ -580,11 +582,9 @@ class ValidateTask(Task):
                 break
 
         try:
-            result = subprocess.run(
+            result = run_capture(
                 cmd_parts,
                 cwd=project_root,
-                capture_output=True,
-                text=True,
                 timeout=60,
                 env=env,
             )
@@ -606,11 +606,9 @@ class ValidateTask(Task):
             return None
 
         try:
-            result = subprocess.run(
+            result = run_capture(
                 list(syntax_cmd),
                 cwd=project_root,
-                capture_output=True,
-                text=True,
                 timeout=120,
                 env=env,
             )
@@ -640,13 +638,12 @@ class ValidateTask(Task):
         errors: list[str] = []
         for cmd in lint_cmds:
             try:
-                result = subprocess.run(
+                result = run_capture(
                     list(cmd),
                     cwd=project_root,
-                    capture_output=True,
-                    text=True,
                     timeout=120,
                     env=env,
+                    log_name=f"lint-{cmd[0]}",
                 )
                 if result.returncode != 0:
                     output = (result.stdout + "\n" + result.stderr).strip()
@@ -679,13 +676,12 @@ class ValidateTask(Task):
         env: dict[str, str] | None = None,
     ) -> dict[str, Any]:
         try:
-            result = subprocess.run(
+            result = run_capture(
                 list(test_cmd),
                 cwd=project_root,
-                capture_output=True,
-                text=True,
                 timeout=120,
                 env=env,
+                log_name="tests",
             )
             # Self-heal: if --timeout flag isn't recognized (pytest-timeout
             # not installed in the target env), retry without it so we get
@@ -694,13 +690,12 @@ class ValidateTask(Task):
                 cleaned = [t for t in test_cmd if not t.startswith("--timeout")]
                 if len(cleaned) < len(list(test_cmd)):
                     logger.info("pytest-timeout not available, retrying without --timeout")
-                    result = subprocess.run(
+                    result = run_capture(
                         cleaned,
                         cwd=project_root,
-                        capture_output=True,
-                        text=True,
                         timeout=120,
                         env=env,
+                        log_name="tests",
                     )
         except subprocess.TimeoutExpired:
             return {
@@ -26,6 +26,7 @@ from typing import Any
 from stabilize import StageExecution, Task, TaskResult
 
 from ..core.message import M, emit, emit_block
+from ..core.project_index import get_index
 
 logger = logging.getLogger(__name__)
 
@@ -230,24 +231,12 @@ def _collect_filesystem_summary(project_root: str, max_files: int = 100) -> str:
     without any hardcoded language-specific rules.
     """
     entries: list[str] = []
-    count = 0
-    try:
-        for dirpath, dirnames, filenames in os.walk(project_root):
-            dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS and not d.startswith("."))
-            for fname in sorted(filenames):
-                if count >= max_files:
-                    entries.append(f"  ... ({count}+ files, listing truncated)")
-                    return "\n".join(entries)
-                full = os.path.join(dirpath, fname)
-                rel = os.path.relpath(full, project_root)
-                try:
-                    size = os.path.getsize(full)
-                    entries.append(f"  {rel} ({size} bytes)")
-                except OSError:
-                    entries.append(f"  {rel} (unreadable)")
-                count += 1
-    except OSError:
-        entries.append("  (filesystem walk failed)")
+    files = get_index(project_root).files(skip_dirs=_SKIP_DIRS)
+    for count, f in enumerate(files):
+        if count >= max_files:
+            entries.append(f"  ... ({count}+ files, listing truncated)")
+            break
+        entries.append(f"  {f.rel.replace('/', os.sep)} ({f.size} bytes)")
     return "\n".join(entries) if entries else "  (empty project directory)"
 
 
@@ -330,12 +319,13 @@ def _run_llm_narrative(
     check_number: int,
     previous_narrative: str,
     filesystem_summary: str = "",
+    stage: str = "",
 ) -> str | None:
     """Call the LLM for a narrative pipeline summary.  Returns text or ``None`` on failure."""
     try:
         from ..core.llm import LLM
 
-        llm = LLM.for_tier("watchdog", thinking_level=None)
+        llm = LLM.for_tier("watchdog", thinking_level=None, stage=stage)
         prompt = _build_narrative_prompt(
             health,
             profile,
@@ -432,6 +422,7 @@ class WatchdogTask(Task):
                     check_count,
                     previous_narrative,
                     fs_summary,
+                    stage.name,
                 )
                 if narrative:
                     previous_narrative = narrative
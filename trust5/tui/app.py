@@ -427,7 +427,11 @@ class Trust5App(App[None]):
                 kv = _parse_kv(content)
                 tok_in = int(kv.get("in", "0"))
                 tok_out = int(kv.get("out", "0"))
-                self._sidebar_info.token_info = f"{_format_count(tok_in)} in / {_format_count(tok_out)} out"
+                cached = int(kv.get("cache_read", "0"))
+                info = f"{_format_count(tok_in)} in / {_format_count(tok_out)} out"
+                if cached:
+                    info += f" / {_format_count(cached)} cached"
+                self._sidebar_info.token_info = info
                 if self._workflow_start_time is not None:
                     elapsed = time.monotonic() - self._workflow_start_time
                     self._sidebar_info.elapsed = self._format_elapsed(elapsed)
@@ -8,6 +8,7 @@ import os
 from stabilize import StageExecution, TaskExecution, Workflow
 
 from ..core.config import ConfigManager, load_global_config  # noqa: F401
+from ..core.http_pool import ensure_pool_size
 from ..core.lang import detect_language, get_profile
 from .module_spec import (
     ModuleSpec,
@@ -261,6 +262,9 @@ def create_parallel_develop_workflow(
     _detect_dependency_cycle(modules)
     _validate_module_completeness(modules)
 
+    # One concurrent LLM stream per module — size the shared HTTP pools to match.
+    ensure_pool_size(len(modules))
+
     project_root = os.getcwd()
     limits = _load_pipeline_limits(project_root)
     language = detect_language(project_root)